@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""Decision-latency and convergence benchmarks for Drone.
+
+Sweeps window size, action-space size, context dimensions and zone count
+over the GP, acquisition, safe-set and full orchestration paths, and runs
+bandits on synthetic objectives to record regret. The startup suite times
+cold imports and CLI start in fresh interpreters, and the server suite
+measures decisions per second of the recommendation service. Results are written as
+JSON so runs from different commits can be compared with --compare.
+
+    python benchmarks/run_benchmarks.py --quick --output bench.json
+    python benchmarks/run_benchmarks.py --quick --compare bench.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drone.core.models import DroneGaussianProcess, select_ucb_action  # noqa: E402
+from drone.core.algorithms import PublicCloudBandit, PrivateCloudBandit  # noqa: E402
+
+FULL_SWEEP = {
+    "window_size": [10, 30, 60, 120],
+    "action_space_size": [50, 100, 500, 1000],
+    "context_dims": [4, 5, 8],
+    "zones": [1, 2, 4]
+}
+
+QUICK_SWEEP = {
+    "window_size": [10, 30],
+    "action_space_size": [100, 500],
+    "context_dims": [5],
+    "zones": [1, 3]
+}
+
+
+def measure(fn, repeats):
+    """Run fn `repeats` times; return latency percentiles (ms) and peak traced memory (KiB).
+
+    Latency is timed without tracemalloc, which slows allocations down; the
+    peak memory comes from one more, traced call.
+    """
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    durations = np.array(durations)
+    return {
+        "p50_ms": float(np.percentile(durations, 50)),
+        "p99_ms": float(np.percentile(durations, 99)),
+        "mean_ms": float(durations.mean()),
+        "peak_kib": peak / 1024,
+        "repeats": repeats
+    }
+
+
+def random_action_space(rng, size, zones):
+    cpu = rng.choice(np.linspace(0.1, 4.0, 10), size)
+    memory = rng.choice([128, 256, 512, 1024, 2048, 4096, 8192], size)
+    replicas = rng.integers(1, 6, size)
+    splits = rng.multinomial(1, np.ones(zones) / zones, size) * replicas[:, None]
+    return np.column_stack([cpu, memory, replicas, splits]).astype(float)
+
+
+def fitted_gp(rng, window_size, dims, backend="sklearn"):
+    gp = DroneGaussianProcess(sliding_window_size=window_size, backend=backend)
+    X = rng.random((window_size, dims))
+    gp.update(X, np.sin(X.sum(axis=1)))
+    return gp
+
+
+def bench_gp(sweep, repeats, rng):
+    results = []
+    dims = 3 + 1 + sweep["context_dims"][0]
+    for backend in ("sklearn", "native"):
+        for window_size in sweep["window_size"]:
+            gp = fitted_gp(rng, window_size, dims, backend)
+            results.append({"name": "gp_update", "params": {"window_size": window_size, "backend": backend},
+                            **measure(lambda: gp.update(rng.random((1, dims)), rng.random(1)), repeats)})
+            for size in sweep["action_space_size"]:
+                X = rng.random((size, dims))
+                params = {"window_size": window_size, "action_space_size": size, "backend": backend}
+                results.append({"name": "gp_predict", "params": params, **measure(lambda: gp.predict(X), repeats)})
+    return results
+
+
+def bench_acquisition(sweep, repeats, rng):
+    results = []
+    window_size = sweep["window_size"][-1]
+    for zones in sweep["zones"]:
+        for size in sweep["action_space_size"]:
+            action_space = random_action_space(rng, size, zones)
+            for context_dims in sweep["context_dims"]:
+                context = rng.random(context_dims)
+                dims = action_space.shape[1] + context_dims
+                gp = fitted_gp(rng, window_size, dims)
+                params = {"zones": zones, "action_space_size": size, "context_dims": context_dims}
+                results.append({"name": "select_ucb_action", "params": params,
+                                **measure(lambda: select_ucb_action(action_space, context, gp, t=50), repeats)})
+
+                bandit = PrivateCloudBandit(action_space, resource_limit=4.0, exploration_duration=0,
+                                            sliding_window_size=window_size)
+                bandit.resource_gp = gp
+                bandit.t = 50
+                results.append({"name": "private_get_safe_set", "params": params,
+                                **measure(lambda: bandit.get_safe_set(context), repeats)})
+    return results
+
+
+def bench_orchestrate(sweep, repeats, rng):
+    from drone import DroneOrchestrator
+    from drone.simulation import build_simulation
+
+    results = []
+    for zones in sweep["zones"]:
+        for mode in ("public", "private"):
+            orchestrator = DroneOrchestrator(app_name="bench", mode=mode,
+                                             **build_simulation(zones=zones, seed=int(rng.integers(1 << 31))))
+            # Get past exploration so the GP path is exercised
+            for _ in range(12):
+                orchestrator.orchestrate_once()
+            results.append({"name": "orchestrate_once", "params": {"zones": zones, "mode": mode},
+                            **measure(orchestrator.orchestrate_once, repeats)})
+    return results
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPTS = {
+    "import_drone": "import drone",
+    "cli_help": "import runpy, sys; sys.argv = ['main.py', '--help']\n"
+                "try:\n    runpy.run_path('main.py', run_name='__main__')\nexcept SystemExit:\n    pass",
+    "first_decision": "from drone.orchestrator import DroneOrchestrator\n"
+                      "from drone.simulation import build_simulation\n"
+                      "orchestrator = DroneOrchestrator(app_name='bench', **build_simulation(seed=0))\n"
+                      "orchestrator.algorithm.select_action(orchestrator.get_context())"
+}
+
+
+def bench_startup(repeats):
+    """Wall time of fresh interpreters, so nothing is already imported or cached."""
+    results = []
+    repeats = max(repeats // 4, 3)
+    for name, script in STARTUP_SCRIPTS.items():
+        def run():
+            subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        results.append({"name": "startup", "params": {"script": name}, **measure(run, repeats)})
+    return results
+
+
+def bench_server(sweep, repeats, rng, clients=32):
+    """Decisions per second of the recommendation service under concurrent select calls."""
+    import threading
+    from drone.server import RecommendationService
+
+    results = []
+    context_dims = sweep["context_dims"][0]
+    for backend in ("sklearn", "native"):
+        for size in sweep["action_space_size"]:
+            service = RecommendationService()
+            action_space = random_action_space(rng, size, sweep["zones"][0])
+            service.create("bench", {"mode": "public", "action_space": action_space.tolist(),
+                                     "gp": {"backend": backend}})
+            for _ in range(sweep["window_size"][0]):
+                context = rng.random(context_dims).tolist()
+                action = service.select("bench", {"context": context})["action"]
+                service.observe("bench", {"action": action, "context": context,
+                                          "performance": float(rng.random()), "cost": 0.0})
+            contexts = rng.random((clients, repeats, context_dims))
+
+            def client(i):
+                for context in contexts[i]:
+                    service.select("bench", {"context": context})
+
+            threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            batcher = service.models["bench"].batcher
+            results.append({"name": "server_select", "params": {"action_space_size": size, "backend": backend,
+                                                                "clients": clients},
+                            "decisions_per_s": clients * repeats / elapsed,
+                            "mean_batch": batcher.requests / max(batcher.batches, 1)})
+    return results
+
+
+def synthetic_reward(actions, context):
+    """Smooth objective with a context-dependent optimum in normalized action space."""
+    optimum = 0.3 + 0.4 * context[0]
+    scaled = actions / np.maximum(actions.max(axis=0), 1e-8)
+    return -np.sum((scaled - optimum) ** 2, axis=1)
+
+
+def bench_regret(sweep, iterations, rng):
+    results = []
+    checkpoints = sorted({max(1, iterations // 4), max(1, iterations // 2), iterations})
+    for size in sweep["action_space_size"]:
+        action_space = random_action_space(rng, size, sweep["zones"][0])
+        bandit = PublicCloudBandit(action_space, alpha=1.0, beta=0.0, sliding_window_size=sweep["window_size"][-1])
+        cumulative = 0.0
+        curve = {}
+        for t in range(1, iterations + 1):
+            context = rng.random(sweep["context_dims"][0])
+            rewards = synthetic_reward(action_space, context)
+            action = bandit.select_action(context)
+            idx = int(np.argmin(np.abs(action_space - action).sum(axis=1)))
+            cumulative += rewards.max() - rewards[idx]
+            bandit.update(action, context, rewards[idx], 0.0)
+            if t in checkpoints:
+                curve[str(t)] = cumulative
+        results.append({"name": "public_regret", "params": {"action_space_size": size, "iterations": iterations},
+                        "cumulative_regret": curve})
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def result_key(result):
+    return result["name"] + json.dumps(result["params"], sort_keys=True)
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"]}
+    regressions = 0
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if previous is None or "p50_ms" not in result or "p50_ms" not in previous:
+            continue
+        ratio = result["p50_ms"] / max(previous["p50_ms"], 1e-9)
+        flag = "REGRESSION" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(f"{result_key(result):90s} {previous['p50_ms']:10.3f} -> {result['p50_ms']:10.3f} ms "
+              f"x{ratio:5.2f} {flag}")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Drone decision-latency and convergence benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Run a reduced sweep")
+    parser.add_argument("--suites", default="gp,acquisition,orchestrate,regret,startup,server",
+                        help="Comma-separated suites to run")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=60, help="Iterations for regret runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", help="Baseline JSON results to compare p50 latency against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="p50 ratio counted as a regression")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("drone").setLevel(logging.WARNING)
+    # Optimizer bound warnings on random synthetic data are expected
+    warnings.filterwarnings("ignore", module="sklearn")
+    rng = np.random.default_rng(args.seed)
+    sweep = QUICK_SWEEP if args.quick else FULL_SWEEP
+    suites = {
+        "gp": lambda: bench_gp(sweep, args.repeats, rng),
+        "acquisition": lambda: bench_acquisition(sweep, args.repeats, rng),
+        "orchestrate": lambda: bench_orchestrate(sweep, max(args.repeats // 4, 3), rng),
+        "regret": lambda: bench_regret(sweep, args.iterations, rng),
+        "startup": lambda: bench_startup(args.repeats),
+        "server": lambda: bench_server(sweep, args.repeats, rng)
+    }
+    results = []
+    for name in args.suites.split(","):
+        results.extend(suites[name.strip()]())
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "sweep": sweep,
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
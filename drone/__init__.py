@@ -1,21 +1,19 @@
-from drone.orchestrator import DroneOrchestrator
-from drone.core import PublicCloudBandit, PrivateCloudBandit
-from drone.utils import (
-    MonitoringInterface, PrometheusMonitoring,
-    ApplicationIdentifier,
-    ObjectiveEnforcer, ResourceEnforcer
-)
-from drone.kubernetes import KubernetesClient
+from drone._lazy import lazy_exports
+
+# Submodules are imported on first use so that `import drone`, the CLI's
+# --help and simulations do not pull in scikit-learn or the Kubernetes client
+_EXPORTS = {
+    'DroneOrchestrator': 'drone.orchestrator',
+    'PublicCloudBandit': 'drone.core.algorithms.public_cloud',
+    'PrivateCloudBandit': 'drone.core.algorithms.private_cloud',
+    'MonitoringInterface': 'drone.utils.monitoring',
+    'PrometheusMonitoring': 'drone.utils.monitoring',
+    'ApplicationIdentifier': 'drone.utils.app_identifier',
+    'ObjectiveEnforcer': 'drone.utils.enforcer',
+    'ResourceEnforcer': 'drone.utils.enforcer',
+    'KubernetesClient': 'drone.kubernetes.client'
+}
 
 __version__ = "0.1"
-__all__ = [
-    'DroneOrchestrator',
-    'PublicCloudBandit',
-    'PrivateCloudBandit',
-    'MonitoringInterface',
-    'PrometheusMonitoring',
-    'ApplicationIdentifier',
-    'ObjectiveEnforcer',
-    'ResourceEnforcer',
-    'KubernetesClient'
-]
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,23 @@
+import importlib
+
+
+def lazy_exports(package, exports):
+    """Build module-level __getattr__/__dir__ that import exports on first access.
+
+    `exports` maps each public name to the submodule defining it, so importing
+    a package does not import scikit-learn or the Kubernetes client until a
+    name that needs them is used.
+    """
+
+    def __getattr__(name):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(exports[name]), name)
+        globals_ = importlib.import_module(package).__dict__
+        globals_[name] = value
+        return value
+
+    def __dir__():
+        return sorted(list(exports) + list(importlib.import_module(package).__dict__))
+
+    return __getattr__, __dir__
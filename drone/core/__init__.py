@@ -1,8 +1,10 @@
-from drone.core.algorithms import PublicCloudBandit, PrivateCloudBandit
-from drone.core.models import DroneGaussianProcess
+from drone._lazy import lazy_exports
 
-__all__ = [
-    'PublicCloudBandit',
-    'PrivateCloudBandit',
-    'DroneGaussianProcess'
-]
+_EXPORTS = {
+    'PublicCloudBandit': 'drone.core.algorithms.public_cloud',
+    'PrivateCloudBandit': 'drone.core.algorithms.private_cloud',
+    'DroneGaussianProcess': 'drone.core.models.gaussian_process'
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
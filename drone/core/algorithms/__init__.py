@@ -1,7 +1,12 @@
-from drone.core.algorithms.public_cloud import PublicCloudBandit
-from drone.core.algorithms.private_cloud import PrivateCloudBandit
+from drone._lazy import lazy_exports
 
-__all__ = [
-    'PublicCloudBandit',
-    'PrivateCloudBandit'
-]
+_EXPORTS = {
+    'PublicCloudBandit': 'drone.core.algorithms.public_cloud',
+    'PrivateCloudBandit': 'drone.core.algorithms.private_cloud',
+    'RegimeBank': 'drone.core.algorithms.regimes',
+    'RegimeBandit': 'drone.core.algorithms.regimes',
+    'SwitchingCostGate': 'drone.core.algorithms.hysteresis'
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
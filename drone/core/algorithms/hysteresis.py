@@ -0,0 +1,41 @@
+import logging
+import numpy as np
+from scipy.stats import norm
+
+logger = logging.getLogger(__name__)
+
+
+class SwitchingCostGate:
+    """Decides whether a newly selected action is worth a reconfiguration.
+
+    The candidate replaces the incumbent only if its expected improvement
+    over it exceeds `switching_cost`, in the bandit's objective units.
+    """
+
+    def __init__(self, switching_cost=0.0, warmup=5):
+        self.switching_cost = switching_cost
+        self.warmup = warmup
+
+    def expected_improvement(self, bandit, candidate, incumbent, context):
+        mean_candidate, std_candidate = bandit.predict(candidate, context)
+        mean_incumbent, std_incumbent = bandit.predict(incumbent, context)
+        delta = mean_candidate - mean_incumbent
+        sigma = float(np.hypot(std_candidate, std_incumbent))
+        if sigma <= 0:
+            return max(delta, 0.0)
+        z = delta / sigma
+        return float(delta * norm.cdf(z) + sigma * norm.pdf(z))
+
+    def should_switch(self, bandit, candidate, incumbent, context):
+        """Return (switch, expected_improvement) for replacing `incumbent` with `candidate`."""
+        if incumbent is None or len(incumbent) != len(candidate):
+            return True, None
+        if np.array_equal(candidate, incumbent):
+            return False, 0.0
+        if bandit.t <= getattr(bandit, "exploration_duration", 0) + self.warmup:
+            return True, None
+        safe_set = getattr(bandit, "safe_set", None)
+        if safe_set is not None and not np.any(np.all(safe_set == incumbent, axis=1)):
+            return True, None
+        improvement = self.expected_improvement(bandit, candidate, incumbent, context)
+        return improvement > self.switching_cost, improvement
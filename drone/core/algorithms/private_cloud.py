@@ -1,21 +1,27 @@
 import numpy as np
 import logging
-from drone.core.models import DroneGaussianProcess, select_ucb_action
+from drone.core.models import DroneGaussianProcess, action_grid, select_ucb_action, ucb_beta
+from drone.core.models.design import InitialDesign
 
 logger = logging.getLogger(__name__)
 
 class PrivateCloudBandit:
     def __init__(self, action_space, resource_limit, initial_safe_set=None, exploration_duration=10, 
-                 confidence_level=0.1, sliding_window_size=30, gp_hyperparams=None):
+                 confidence_level=0.1, sliding_window_size=30, gp_hyperparams=None, priors=None,
+                 design="maximin"):
         self.action_space = action_space
         self.resource_limit = resource_limit
         self.exploration_duration = exploration_duration
         self.confidence_level = confidence_level
         self.t = 1
         self.exploration_phase = True
+        self.initial_design = InitialDesign(design, size=exploration_duration)
         gp_params = gp_hyperparams or {}
-        self.performance_gp = DroneGaussianProcess(sliding_window_size=sliding_window_size, **gp_params)
-        self.resource_gp = DroneGaussianProcess(sliding_window_size=sliding_window_size, **gp_params)
+        priors = priors or {}
+        self.performance_gp = DroneGaussianProcess(sliding_window_size=sliding_window_size,
+                                                   **self._with_prior(gp_params, priors.get("performance")))
+        self.resource_gp = DroneGaussianProcess(sliding_window_size=sliding_window_size,
+                                                **self._with_prior(gp_params, priors.get("resource")))
         if initial_safe_set is None:
             safe_size = max(1, int(len(action_space) * 0.25))
             self.safe_set = action_space[:safe_size].copy()
@@ -24,12 +30,18 @@ class PrivateCloudBandit:
         self.history = {'actions': [], 'contexts': [], 'performance': [], 
                         'resource_usage': [], 'safe_set_size': []}
 
+    @staticmethod
+    def _with_prior(gp_params, prior):
+        if prior is None:
+            return gp_params
+        # Residual GP around a mean transferred from similar applications
+        return dict(gp_params, prior_mean=prior, length_scale=prior.length_scale)
+
     def get_safe_set(self, context, beta_t=None):
         if self.t <= self.exploration_duration:
             return self.safe_set
         if beta_t is None:
             d = self.action_space.shape[1] + context.shape[0]
-            from drone.core.models import ucb_beta
             beta_t = ucb_beta(self.t, d)
         inputs = np.array([np.concatenate([action, context]) for action in self.action_space])
         mean, std = self.resource_gp.predict(inputs)
@@ -42,7 +54,8 @@ class PrivateCloudBandit:
         return self.safe_set
 
     def select_exploration_action(self, context):
-        return self.safe_set[np.random.randint(len(self.safe_set))]
+        observed = np.array(self.history['actions']) if self.history['actions'] else None
+        return self.initial_design.next(self.safe_set, observed)
 
     def select_action(self, context):
         if self.t <= self.exploration_duration:
@@ -55,11 +68,79 @@ class PrivateCloudBandit:
                                       gp_model=self.performance_gp, t=self.t, d=d, safe_set=None)
         return action
 
-    def update(self, action, context, performance, resource_usage):
+    def select_actions(self, contexts):
+        """select_action for a batch of contexts.
+
+        The safe sets and UCB scores of all contexts come from one prediction
+        of each GP over the action space. Contexts without a safe action fall
+        back to select_action and the current safe set.
+        """
+        contexts = np.atleast_2d(contexts)
+        if self.t <= self.exploration_duration:
+            return np.array([self.select_action(context) for context in contexts])
+        self.exploration_phase = False
+        k, n = len(contexts), len(self.action_space)
+        beta_t = ucb_beta(self.t, self.action_space.shape[1] + contexts.shape[1])
+        inputs = action_grid(self.action_space, contexts)
+        mean, std = self.resource_gp.predict(inputs)
+        safe = (mean - np.sqrt(beta_t) * std).reshape(k, n) <= self.resource_limit
+        mean, std = self.performance_gp.predict(inputs)
+        ucb_values = np.where(safe, (mean + np.sqrt(beta_t) * std).reshape(k, n), -np.inf)
+        actions = self.action_space[np.argmax(ucb_values, axis=1)]
+        for i in np.flatnonzero(~safe.any(axis=1)):
+            actions[i] = self.select_action(contexts[i])
+        if safe[-1].any():
+            self.safe_set = self.action_space[safe[-1]]
+        return actions
+
+    def best_action(self, context, resource_limit=None):
+        """The action select_action would pick past exploration under `resource_limit`.
+
+        Unlike select_action it leaves the safe set alone, so it can ask what
+        the application would use under another limit than its own. Returns
+        None if no action is safe under that limit.
+        """
+        limit = self.resource_limit if resource_limit is None else resource_limit
+        beta_t = ucb_beta(self.t, self.action_space.shape[1] + context.shape[0])
+        inputs = action_grid(self.action_space, np.atleast_2d(context))
+        mean, std = self.resource_gp.predict(inputs)
+        safe = mean - np.sqrt(beta_t) * std <= limit
+        if not safe.any():
+            return None
+        mean, std = self.performance_gp.predict(inputs)
+        return self.action_space[np.argmax(np.where(safe, mean + np.sqrt(beta_t) * std, -np.inf))]
+
+    def predict(self, action, context):
+        X = np.array([np.concatenate([action, context])])
+        mean, std = self.performance_gp.predict(X)
+        return float(mean[0]), float(std[0])
+
+    def predict_given(self, action, context, performance, resource_usage, queries, noise=None):
+        """Performance posterior (means, stds) of `queries` under `context` as if update() had seen this read.
+
+        The read does not become an observation.
+        """
+        X = np.hstack((queries, np.tile(context, (len(queries), 1))))
+        return self.performance_gp.predict_conditioned(X, np.concatenate([action, context]), performance,
+                                                       noise=1.0 if noise is None else noise)
+
+    def set_pending(self, actions=None, contexts=None):
+        """Actions (with their contexts) whose performance has not been observed yet."""
+        X = None if actions is None or len(actions) == 0 else np.hstack((actions, contexts))
+        self.performance_gp.set_pending(X)
+        self.resource_gp.set_pending(X)
+
+    def update(self, action, context, performance, resource_usage, noise=None):
         is_safe = resource_usage <= self.resource_limit
         X = np.array([np.concatenate([action, context])])
-        self.performance_gp.update(X, np.array([performance]))
-        self.resource_gp.update(X, np.array([resource_usage]))
+        # A shift in either surface invalidates the history of both; low-fidelity
+        # reads (with a noise multiplier) do not feed the test
+        changed = False
+        if noise is None:
+            changed = self.performance_gp.detect_change(X, np.array([performance]))
+            changed = self.resource_gp.detect_change(X, np.array([resource_usage])) or changed
+        self.performance_gp.update(X, np.array([performance]), changed=changed, noise=noise)
+        self.resource_gp.update(X, np.array([resource_usage]), changed=changed, noise=noise)
         self.history['actions'].append(action)
         self.history['contexts'].append(context)
         self.history['performance'].append(performance)
@@ -68,6 +149,14 @@ class PrivateCloudBandit:
         self.t += 1
         return performance, is_safe
 
+    def get_observations(self):
+        """Observed inputs, targets and fitted length scale per modelled quantity."""
+        X = np.array([np.concatenate([a, c]) for a, c in zip(self.history['actions'], self.history['contexts'])])
+        return {
+            "performance": (X, np.array(self.history['performance']), self.performance_gp.fitted_length_scale),
+            "resource": (X, np.array(self.history['resource_usage']), self.resource_gp.fitted_length_scale)
+        }
+
     def reset(self):
         self.performance_gp.reset()
         self.resource_gp.reset()
@@ -1,16 +1,30 @@
 import numpy as np
 import logging
-from drone.core.models import DroneGaussianProcess, select_ucb_action
+from drone.core.models import DroneGaussianProcess, action_grid, select_ucb_action, select_ucb_actions
+from drone.core.models.design import InitialDesign
 
 logger = logging.getLogger(__name__)
 
 class PublicCloudBandit:
-    def __init__(self, action_space, alpha=0.5, beta=0.5, sliding_window_size=30, gp_hyperparams=None):
+    def __init__(self, action_space, alpha=0.5, beta=0.5, sliding_window_size=30, gp_hyperparams=None,
+                 priors=None, exploration_duration=0, design="maximin", prune_confidence=None,
+                 performance_bound=0.0):
         self.action_space = action_space
         self.alpha = alpha
         self.beta = beta
         self.t = 1
+        self.exploration_duration = exploration_duration
+        self.initial_design = InitialDesign(design, size=exploration_duration)
+        # Cost of every action of the action space, set by the caller as prices change.
+        # With a prune_confidence, actions whose cost alone rules them out are not scored
+        self.action_costs = None
+        self.prune_confidence = prune_confidence
+        self.performance_bound = performance_bound
         gp_params = gp_hyperparams or {}
+        prior = (priors or {}).get("reward")
+        if prior is not None:
+            # Residual GP around a mean transferred from similar applications
+            gp_params = dict(gp_params, prior_mean=prior, length_scale=prior.length_scale)
         self.gp_model = DroneGaussianProcess(sliding_window_size=sliding_window_size, **gp_params)
         self.history = {'actions': [], 'contexts': [], 'rewards': [], 'performance': [], 'costs': []}
 
@@ -18,16 +32,78 @@ class PublicCloudBandit:
         return self.alpha * performance - self.beta * cost
 
     def select_action(self, context):
+        if self.t <= self.exploration_duration:
+            observed = np.array(self.history['actions']) if self.history['actions'] else None
+            return self.initial_design.next(self.action_space, observed)
         d = self.action_space.shape[1] + context.shape[0]
         action, _ = select_ucb_action(action_space=self.action_space, context=context, 
-                                      gp_model=self.gp_model, t=self.t, d=d)
+                                      gp_model=self.gp_model, t=self.t, d=d,
+                                      safe_set=self.candidate_actions(context))
         return action
 
-    def update(self, action, context, performance, cost):
+    def candidate_actions(self, context):
+        """Actions that can still beat the actions observed so far, given their cost.
+
+        Performance never exceeds performance_bound (it is a negated latency
+        or job time), so the reward of an action is at most
+        alpha * performance_bound - beta * cost. Actions whose bound is below
+        the best lower confidence bound of an observed action under `context`
+        are dominated by it whatever their performance, and are dropped.
+        """
+        keep = self._candidate_mask(np.atleast_2d(context))
+        if keep is None:
+            return self.action_space
+        if not keep[0].all():
+            logger.debug(f"Pruned {int(np.sum(~keep[0]))} of {len(keep[0])} cost-dominated actions")
+        return self.action_space[keep[0]]
+
+    def _candidate_mask(self, contexts):
+        """candidate_actions of each context as a boolean row over the action space; None without pruning."""
+        if self.prune_confidence is None or self.action_costs is None or not self.history['actions']:
+            return None
+        observed = np.unique(np.array(self.history['actions'][-self.gp_model.sliding_window_size:]), axis=0)
+        mean, std = self.gp_model.predict(action_grid(observed, contexts))
+        floor = np.max((mean - self.prune_confidence * std).reshape(len(contexts), -1), axis=1)
+        bounds = self.alpha * self.performance_bound - self.beta * np.asarray(self.action_costs)
+        keep = bounds >= floor[:, None]
+        # A context whose every action is dominated keeps them all
+        keep[~keep.any(axis=1)] = True
+        return keep
+
+    def select_actions(self, contexts):
+        """select_action for a batch of contexts, scored in one GP prediction."""
+        contexts = np.atleast_2d(contexts)
+        if self.t <= self.exploration_duration:
+            return np.array([self.select_action(context) for context in contexts])
+        actions, _ = select_ucb_actions(self.action_space, contexts, self.gp_model, self.t,
+                                        candidates=self._candidate_mask(contexts))
+        return actions
+
+    def predict(self, action, context):
+        X = np.array([np.concatenate([action, context])])
+        mean, std = self.gp_model.predict(X)
+        return float(mean[0]), float(std[0])
+
+    def predict_given(self, action, context, performance, cost, queries, noise=None):
+        """Posterior (means, stds) of `queries` under `context` as if update() had seen this read.
+
+        The read does not become an observation.
+        """
+        reward = self.reward_function(performance, cost)
+        X = np.hstack((queries, np.tile(context, (len(queries), 1))))
+        return self.gp_model.predict_conditioned(X, np.concatenate([action, context]), reward,
+                                                 noise=1.0 if noise is None else noise)
+
+    def set_pending(self, actions=None, contexts=None):
+        """Actions (with their contexts) whose rewards have not been observed yet."""
+        X = None if actions is None or len(actions) == 0 else np.hstack((actions, contexts))
+        self.gp_model.set_pending(X)
+
+    def update(self, action, context, performance, cost, noise=None):
         reward = self.reward_function(performance, cost)
         X = np.array([np.concatenate([action, context])])
         y = np.array([reward])
-        self.gp_model.update(X, y)
+        self.gp_model.update(X, y, noise=noise)
         self.history['actions'].append(action)
         self.history['contexts'].append(context)
         self.history['rewards'].append(reward)
@@ -36,6 +112,11 @@ class PublicCloudBandit:
         self.t += 1
         return reward
 
+    def get_observations(self):
+        """Observed inputs, targets and fitted length scale per modelled quantity."""
+        X = np.array([np.concatenate([a, c]) for a, c in zip(self.history['actions'], self.history['contexts'])])
+        return {"reward": (X, np.array(self.history['rewards']), self.gp_model.fitted_length_scale)}
+
     def get_regret(self):
         if not self.history['rewards']:
             return 0.0
@@ -0,0 +1,193 @@
+import logging
+import numpy as np
+from scipy.spatial import cKDTree
+
+logger = logging.getLogger(__name__)
+
+
+class RegimeBank:
+    """Online clustering of context vectors into recurring regimes.
+
+    Contexts are compared in standardized units (running per-dimension mean
+    and std), so workload, utilization and byte rates weigh alike. A context
+    farther than `radius` from every centroid opens a new regime until
+    `max_regimes` exist; otherwise it joins the nearest one, found through a
+    KD-tree over the centroids. No regime is opened before `warmup` contexts
+    have been seen, as the scale is not known yet.
+    """
+
+    def __init__(self, radius=1.5, max_regimes=8, window=50, warmup=10):
+        self.radius = radius
+        self.max_regimes = max_regimes
+        self.warmup = warmup
+        # Centroids track at most the last `window` contexts of their regime
+        self.window = window
+        self.centroids = None
+        self.counts = np.zeros(0, dtype=int)
+        self._n = 0
+        self._mean = None
+        self._m2 = None
+        self._tree = None
+
+    def __len__(self):
+        return len(self.counts)
+
+    def _scale(self):
+        if self._n < 2:
+            return np.ones_like(self._mean)
+        std = np.sqrt(self._m2 / (self._n - 1))
+        return np.where(std > 1e-12, std, 1.0)
+
+    def _observe(self, context):
+        # Welford update of the running mean and variance
+        if self._mean is None:
+            self._mean = np.zeros_like(context)
+            self._m2 = np.zeros_like(context)
+        self._n += 1
+        delta = context - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (context - self._mean)
+
+    def _rebuild(self):
+        self._tree = cKDTree(self.centroids / self._scale())
+
+    def _add(self, context):
+        self.centroids = context[None, :].copy() if self.centroids is None else np.vstack((self.centroids, context))
+        self.counts = np.append(self.counts, 0)
+        logger.info(f"Opened context regime {len(self.counts) - 1}")
+        return len(self.counts) - 1
+
+    def nearest(self, context):
+        """Return (regime, distance) of the closest regime, or (None, inf) if there is none."""
+        if self.centroids is None:
+            return None, np.inf
+        if self._tree is None:
+            self._rebuild()
+        distance, regime = self._tree.query(np.asarray(context, dtype=float) / self._scale())
+        return int(regime), float(distance)
+
+    def assign(self, context, update=True):
+        """Regime of `context`, opening a new one if it is far from all of them.
+
+        With update, the context also moves the running scale and the
+        regime's centroid.
+        """
+        context = np.asarray(context, dtype=float)
+        regime, distance = self.nearest(context)
+        if regime is None or (distance > self.radius and len(self.counts) < self.max_regimes
+                              and self._n >= self.warmup):
+            regime = self._add(context)
+            self._tree = None
+        if update:
+            self._observe(context)
+            self.counts[regime] += 1
+            step = 1.0 / min(self.counts[regime], self.window)
+            self.centroids[regime] += step * (context - self.centroids[regime])
+            self._tree = None
+        return regime
+
+
+class RegimeBandit:
+    """Bank of bandits, one per context regime.
+
+    Each iteration is routed to the bandit of the nearest regime, so a
+    recurring traffic pattern resumes from the posterior it learned last
+    time instead of relearning it in a shared window. Attributes not defined
+    here (gp_model, performance_gp, safe_set, ...) are read from the bandit
+    of the active regime.
+    """
+
+    def __init__(self, make_bandit, radius=1.5, max_regimes=8, window=50):
+        self.make_bandit = make_bandit
+        self.bank = RegimeBank(radius=radius, max_regimes=max_regimes, window=window)
+        self.bandits = {}
+        self.active = None
+        self._resource_limit = None
+        self._action_costs = None
+
+    def _route(self, context, update=False):
+        regime = self.bank.assign(context, update=update)
+        if regime not in self.bandits:
+            bandit = self.make_bandit()
+            if self._resource_limit is not None:
+                bandit.resource_limit = self._resource_limit
+            if self._action_costs is not None:
+                bandit.action_costs = self._action_costs
+            self.bandits[regime] = bandit
+        if regime != self.active:
+            logger.info(f"Switching to context regime {regime}")
+            self.active = regime
+        return self.bandits[regime]
+
+    def bandit_for(self, context, update=False):
+        """Bandit of the regime of `context`, for observations made at other contexts."""
+        return self._route(context, update=update)
+
+    def select_action(self, context):
+        return self._route(context).select_action(context)
+
+    def predict(self, action, context):
+        return self._route(context).predict(action, context)
+
+    def predict_given(self, action, context, *observations, **kwargs):
+        return self._route(context).predict_given(action, context, *observations, **kwargs)
+
+    def update(self, action, context, *observations, **kwargs):
+        return self._route(context, update=True).update(action, context, *observations, **kwargs)
+
+    def set_pending(self, actions=None, contexts=None):
+        """Hand each regime's bandit the pending actions of its contexts."""
+        groups = {}
+        for action, context in zip(actions if actions is not None else [], contexts if contexts is not None else []):
+            regime, _ = self.bank.nearest(context)
+            groups.setdefault(regime, ([], []))
+            groups[regime][0].append(action)
+            groups[regime][1].append(context)
+        for regime, bandit in self.bandits.items():
+            pending_actions, pending_contexts = groups.get(regime, ([], []))
+            bandit.set_pending(np.array(pending_actions), np.array(pending_contexts))
+
+    @property
+    def resource_limit(self):
+        return self._resource_limit
+
+    @resource_limit.setter
+    def resource_limit(self, limit):
+        self._resource_limit = limit
+        for bandit in self.bandits.values():
+            bandit.resource_limit = limit
+
+    @property
+    def action_costs(self):
+        return self._action_costs
+
+    @action_costs.setter
+    def action_costs(self, costs):
+        self._action_costs = costs
+        for bandit in self.bandits.values():
+            bandit.action_costs = costs
+
+    def reset(self):
+        for bandit in self.bandits.values():
+            bandit.reset()
+
+    def get_observations(self):
+        """Observations of all regimes pooled; length scales from the most observed regime."""
+        merged = {}
+        for bandit in sorted(self.bandits.values(), key=lambda b: len(b.history['actions'])):
+            for target, (X, y, length_scale) in bandit.get_observations().items():
+                if len(y) == 0:
+                    continue
+                if target in merged:
+                    X = np.vstack((merged[target][0], X))
+                    y = np.concatenate((merged[target][1], y))
+                    length_scale = length_scale or merged[target][2]
+                merged[target] = (X, y, length_scale)
+        return merged
+
+    def __getattr__(self, name):
+        # Only called for attributes missing on the bank itself
+        bandits = self.__dict__.get("bandits")
+        if not bandits:
+            raise AttributeError(name)
+        return getattr(bandits[self.__dict__["active"]], name)
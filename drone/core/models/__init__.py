@@ -1,9 +1,21 @@
-from drone.core.models.gaussian_process import DroneGaussianProcess
-from drone.core.models.acquisition import ucb, ucb_beta, select_ucb_action
+from drone._lazy import lazy_exports
 
-__all__ = [
-    'DroneGaussianProcess',
-    'ucb',
-    'ucb_beta',
-    'select_ucb_action'
-]
+_EXPORTS = {
+    'DroneGaussianProcess': 'drone.core.models.gaussian_process',
+    'NativeGaussianProcess': 'drone.core.models.native_gp',
+    'MaternKernel': 'drone.core.models.native_gp',
+    'GPFittingService': 'drone.core.models.fitting',
+    'get_shared_fitting_service': 'drone.core.models.fitting',
+    'ucb': 'drone.core.models.acquisition',
+    'ucb_beta': 'drone.core.models.acquisition',
+    'select_ucb_action': 'drone.core.models.acquisition',
+    'select_ucb_actions': 'drone.core.models.acquisition',
+    'action_grid': 'drone.core.models.acquisition',
+    'ContextForecaster': 'drone.core.models.forecasting',
+    'CusumDetector': 'drone.core.models.changepoint',
+    'InitialDesign': 'drone.core.models.design',
+    'initial_design': 'drone.core.models.design'
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
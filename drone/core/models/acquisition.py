@@ -23,3 +23,25 @@ def select_ucb_action(action_space, context, gp_model, t, d=None, safe_set=None)
     best_action = safe_set[best_idx]
     best_ucb = ucb_values[best_idx]
     return best_action, best_ucb
+
+def action_grid(action_space, contexts):
+    """GP inputs for every (context, action) pair, context-major: row i * n + j is action j under context i."""
+    k, n = len(contexts), len(action_space)
+    return np.hstack((np.tile(action_space, (k, 1)), np.repeat(contexts, n, axis=0)))
+
+def select_ucb_actions(action_space, contexts, gp_model, t, d=None, candidates=None):
+    """select_ucb_action for several contexts with a single GP prediction.
+
+    Returns the best action and its UCB value for each row of `contexts`.
+    `candidates` optionally masks the actions each context may pick, one
+    boolean row per context.
+    """
+    contexts = np.atleast_2d(contexts)
+    if d is None:
+        d = action_space.shape[1] + contexts.shape[1]
+    beta_t = ucb_beta(t, d)
+    ucb_values = ucb(action_grid(action_space, contexts), gp_model, beta=beta_t).reshape(len(contexts), -1)
+    if candidates is not None:
+        ucb_values = np.where(candidates, ucb_values, -np.inf)
+    best_idx = np.argmax(ucb_values, axis=1)
+    return action_space[best_idx], ucb_values[np.arange(len(contexts)), best_idx]
@@ -0,0 +1,29 @@
+import numpy as np
+
+
+class CusumDetector:
+    """Two-sided CUSUM test on standardized residuals.
+
+    Positive and negative excursions beyond `drift` accumulate; a change is
+    reported once either sum exceeds `threshold`. Steps are clipped to
+    `max_step` so a single outlier cannot trigger a change on its own.
+    """
+
+    def __init__(self, threshold=5.0, drift=0.5, max_step=None):
+        self.threshold = threshold
+        self.drift = drift
+        self.max_step = max_step if max_step is not None else threshold / 2
+        self.reset()
+
+    def reset(self):
+        self.upper = 0.0
+        self.lower = 0.0
+
+    def update(self, z):
+        z = float(np.clip(z, -self.max_step, self.max_step))
+        self.upper = max(0.0, self.upper + z - self.drift)
+        self.lower = max(0.0, self.lower - z - self.drift)
+        if self.upper > self.threshold or self.lower > self.threshold:
+            self.reset()
+            return True
+        return False
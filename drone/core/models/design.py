@@ -0,0 +1,111 @@
+import numpy as np
+
+METHODS = ("maximin", "sobol", "lhs", "random")
+
+
+def design_features(actions):
+    """Map actions to [0, 1]^d features for space-filling selection.
+
+    Actions are [cpu, memory, replicas, per-zone replica counts...]. Memory is
+    taken on a log scale (the grid is geometric) and zone counts are turned
+    into the fraction of replicas placed in each zone, so designs spread over
+    placements rather than over replica totals twice.
+    """
+    actions = np.asarray(actions, dtype=float)
+    replicas = np.maximum(actions[:, 2:3], 1.0)
+    features = np.hstack([actions[:, 0:1], np.log2(np.maximum(actions[:, 1:2], 1.0)), actions[:, 2:3],
+                          actions[:, 3:] / replicas])
+    low, high = features.min(axis=0), features.max(axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    return (features - low) / span
+
+
+def maximin_next(candidates, observed=None):
+    """Index of the candidate farthest from every observed action.
+
+    Without observations the candidate closest to the centre of the design
+    space is chosen.
+    """
+    features = design_features(candidates if observed is None or len(observed) == 0
+                               else np.vstack((candidates, observed)))
+    candidate_features = features[:len(candidates)]
+    if observed is None or len(observed) == 0:
+        return int(np.argmin(np.linalg.norm(candidate_features - 0.5, axis=1)))
+    observed_features = features[len(candidates):]
+    distances = np.linalg.norm(candidate_features[:, None, :] - observed_features[None, :, :], axis=2)
+    return int(np.argmax(distances.min(axis=1)))
+
+
+def _assign(candidates, points):
+    """Map unit-cube design points to distinct nearest candidates."""
+    features = design_features(candidates)
+    available = np.ones(len(candidates), dtype=bool)
+    indices = []
+    for point in points:
+        if not available.any():
+            break
+        distances = np.linalg.norm(features - point, axis=1)
+        distances[~available] = np.inf
+        idx = int(np.argmin(distances))
+        available[idx] = False
+        indices.append(idx)
+    return np.array(indices, dtype=int)
+
+
+def initial_design(candidates, n, method="maximin", seed=None):
+    """Indices of `n` candidate actions forming a space-filling design."""
+    candidates = np.asarray(candidates, dtype=float)
+    n = min(n, len(candidates))
+    if n <= 0:
+        return np.zeros(0, dtype=int)
+    if method == "random":
+        return np.random.default_rng(seed).choice(len(candidates), n, replace=False)
+    if method == "maximin":
+        indices = [maximin_next(candidates)]
+        for _ in range(n - 1):
+            indices.append(maximin_next(candidates, candidates[indices]))
+        return np.array(indices, dtype=int)
+    from scipy.stats import qmc
+
+    d = candidates.shape[1]
+    if method == "sobol":
+        m = int(np.ceil(np.log2(max(n, 2))))
+        points = qmc.Sobol(d, scramble=True, seed=seed).random_base2(m)[:n]
+    elif method == "lhs":
+        points = qmc.LatinHypercube(d, seed=seed).random(n)
+    else:
+        raise ValueError(f"Unknown design method {method!r}, expected one of {METHODS}")
+    return _assign(candidates, points)
+
+
+class InitialDesign:
+    """Hands out the actions of an initial design, one exploration step at a time.
+
+    maximin is adaptive: each step takes the candidate farthest from every
+    action observed so far, including ones the design did not choose.
+    sobol and lhs precompute a design over the candidates; random keeps the
+    previous uniform choice.
+    """
+
+    def __init__(self, method="maximin", size=10, seed=None):
+        if method not in METHODS:
+            raise ValueError(f"Unknown design method {method!r}, expected one of {METHODS}")
+        self.method = method
+        self.size = size
+        self.seed = seed
+        self._order = None
+        self._candidates = None
+        self._step = 0
+
+    def next(self, candidates, observed=None):
+        if self.method == "random":
+            return candidates[np.random.randint(len(candidates))]
+        if self.method == "maximin":
+            return candidates[maximin_next(candidates, observed)]
+        if self._order is None or self._candidates is not candidates:
+            self._order = initial_design(candidates, max(self.size, 1), self.method, self.seed)
+            self._candidates = candidates
+            self._step = 0
+        idx = self._order[self._step % len(self._order)]
+        self._step += 1
+        return candidates[idx]
@@ -0,0 +1,96 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from drone.core.models.native_gp import NativeGaussianProcess
+
+logger = logging.getLogger(__name__)
+
+
+def _attach(name):
+    """Attach to a parent's shared memory block without taking ownership of it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers the block, but pool
+        # workers share the parent's resource tracker, so it is a no-op there
+        return shared_memory.SharedMemory(name=name)
+
+
+def _fit_window(model, name, shape, dtype):
+    """Fit `model` on the window in shared memory block `name` (inputs | target)."""
+    shm = _attach(name)
+    window = None
+    try:
+        window = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        model.fit(window[:, :-1], window[:, -1])
+        if isinstance(model, NativeGaussianProcess):
+            return model.get_state()
+        # sklearn copies the training data, so the fitted model outlives the block
+        return model
+    finally:
+        # Views into the block must be gone before it can be closed
+        window = model = None
+        shm.close()
+
+
+class GPFittingService:
+    """Fits Gaussian process models in a pool of worker processes.
+
+    The training window is written once into a shared memory block that the
+    worker maps without copying or pickling it. Workers return the fitted
+    hyperparameters and factors (native backend) or the fitted regressor
+    (sklearn backend). Workers are spawned rather than forked, as the
+    controller runs watch and server threads.
+    """
+
+    def __init__(self, max_workers=None, mp_context="spawn"):
+        self.max_workers = max_workers
+        self.executor = ProcessPoolExecutor(max_workers=max_workers,
+                                            mp_context=multiprocessing.get_context(mp_context))
+
+    def submit(self, model, X, y):
+        if not isinstance(model, NativeGaussianProcess):
+            from sklearn.base import clone
+
+            # Send an unfitted copy rather than the previous fit's training data
+            model = clone(model)
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float).reshape(-1, 1)
+        window = np.hstack((X, y))
+        shm = shared_memory.SharedMemory(create=True, size=max(window.nbytes, 1))
+        np.ndarray(window.shape, dtype=window.dtype, buffer=shm.buf)[:] = window
+        try:
+            future = self.executor.submit(_fit_window, model, shm.name, window.shape, window.dtype.str)
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+
+        def _release(_):
+            shm.close()
+            shm.unlink()
+
+        future.add_done_callback(_release)
+        return future
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_shared_service = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_fitting_service(max_workers=None):
+    """Start (once per process) and return the fitting pool shared by all orchestrators."""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = GPFittingService(max_workers=max_workers)
+            logger.info(f"Started GP fitting pool with {_shared_service.executor._max_workers} workers")
+        return _shared_service
@@ -0,0 +1,92 @@
+import numpy as np
+
+
+class ContextForecaster:
+    """Incremental additive Holt-Winters forecaster over context vectors.
+
+    Every context dimension is smoothed independently but in one vectorized
+    update per observation. Recent observations and one-step forecast
+    residuals are kept in fixed-size ring buffers; the residual spread is
+    used to turn the point forecast into a peak estimate. Seasonal terms are
+    initialized from the first full season, before which the model is plain
+    Holt linear smoothing.
+    """
+
+    def __init__(self, season_length=None, alpha=0.5, beta=0.1, gamma=0.1,
+                 history_size=256, peak_quantile=1.645, min_observations=3):
+        self.season_length = season_length if season_length and season_length > 1 else None
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        # The history must hold one full season for the seasonal initialization
+        self.history_size = max(history_size, self.season_length or 0)
+        self.peak_quantile = peak_quantile
+        self.min_observations = min_observations
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.level = None
+        self.trend = None
+        self.seasonal = None
+        self.history = None
+        self.residuals = None
+
+    def _init_state(self, x):
+        d = x.shape[0]
+        self.level = x.astype(float).copy()
+        self.trend = np.zeros(d)
+        self.seasonal = np.zeros((self.season_length or 1, d))
+        self.history = np.zeros((self.history_size, d))
+        self.residuals = np.zeros((self.history_size, d))
+
+    def _season_index(self, step):
+        return step % self.season_length if self.season_length else 0
+
+    def update(self, x):
+        x = np.asarray(x, dtype=float)
+        if self.level is None:
+            self._init_state(x)
+        else:
+            i = self._season_index(self.n)
+            predicted = self.level + self.trend + self.seasonal[i]
+            self.residuals[self.n % self.history_size] = x - predicted
+            previous_level = self.level
+            self.level = self.alpha * (x - self.seasonal[i]) + (1 - self.alpha) * (self.level + self.trend)
+            self.trend = self.beta * (self.level - previous_level) + (1 - self.beta) * self.trend
+            if self.season_length and self.n >= self.season_length:
+                self.seasonal[i] = self.gamma * (x - self.level) + (1 - self.gamma) * self.seasonal[i]
+        self.history[self.n % self.history_size] = x
+        self.n += 1
+        if self.season_length and self.n == self.season_length:
+            first_season = self.history[:self.season_length]
+            self.level = first_season.mean(axis=0)
+            self.seasonal = first_season - self.level
+            self.trend = np.zeros_like(self.level)
+
+    def is_ready(self):
+        return self.n >= self.min_observations
+
+    def get_history(self):
+        if self.history is None:
+            return None
+        count = min(self.n, self.history_size)
+        order = (np.arange(self.n - count, self.n)) % self.history_size
+        return self.history[order].copy()
+
+    def forecast(self, horizon=1):
+        """Return (mean, peak) of the context over the next `horizon` steps.
+
+        Context metrics are non-negative, so forecasts are clipped at zero.
+        """
+        if self.level is None:
+            raise ValueError("Forecaster has no observations")
+        steps = np.arange(1, horizon + 1)
+        seasonal = self.seasonal[[self._season_index(self.n - 1 + h) for h in steps]]
+        path = self.level + steps[:, None] * self.trend + seasonal
+        # Residuals exist for every step but the first
+        residuals = self.residuals[1:self.n] if self.n <= self.history_size else self.residuals
+        spread = residuals.std(axis=0) if len(residuals) > 1 else np.zeros_like(self.level)
+        mean = np.maximum(path.mean(axis=0), 0.0)
+        peak = np.maximum(path.max(axis=0) + self.peak_quantile * spread, 0.0)
+        return mean, peak
@@ -1,6 +1,11 @@
+import logging
 import numpy as np
-from sklearn.gaussian_process import GaussianProcessRegressor
-from sklearn.gaussian_process.kernels import Matern
+
+from drone.core.models.changepoint import CusumDetector
+from drone.core.models.native_gp import MaternKernel, NativeGaussianProcess
+
+logger = logging.getLogger(__name__)
+
 
 class DroneGaussianProcess:
     def __init__(self,
@@ -10,50 +15,268 @@ class DroneGaussianProcess:
                  alpha=1e-2,
                  normalize_y=True,
                  n_restarts_optimizer=5,
-                 sliding_window_size=30):
-        self.kernel = Matern(length_scale=length_scale,
-                             length_scale_bounds=length_scale_bounds,
-                             nu=nu)
-        self.model = GaussianProcessRegressor(
-            kernel=self.kernel,
-            alpha=alpha,
-            normalize_y=normalize_y,
-            n_restarts_optimizer=n_restarts_optimizer
-        )
+                 sliding_window_size=30,
+                 backend="sklearn",
+                 dtype=np.float64,
+                 fitting_service=None,
+                 changepoint_threshold=None,
+                 changepoint_drift=0.5,
+                 min_window_size=5,
+                 prior_mean=None):
+        # "native" fits the same model with the NumPy engine in native_gp,
+        # avoiding sklearn's per-call overhead on small windows
+        if backend == "native":
+            self.kernel = MaternKernel(length_scale=length_scale,
+                                       length_scale_bounds=length_scale_bounds,
+                                       nu=nu)
+            self.model = NativeGaussianProcess(
+                kernel=self.kernel,
+                alpha=alpha,
+                normalize_y=normalize_y,
+                n_restarts_optimizer=n_restarts_optimizer,
+                dtype=dtype
+            )
+        elif backend == "sklearn":
+            from sklearn.gaussian_process import GaussianProcessRegressor
+            from sklearn.gaussian_process.kernels import Matern
+
+            self.kernel = Matern(length_scale=length_scale,
+                                 length_scale_bounds=length_scale_bounds,
+                                 nu=nu)
+            self.model = GaussianProcessRegressor(
+                kernel=self.kernel,
+                alpha=alpha,
+                normalize_y=normalize_y,
+                n_restarts_optimizer=n_restarts_optimizer
+            )
+        else:
+            raise ValueError(f"Unknown GP backend: {backend}")
+        self.backend = backend
+        self.alpha = alpha
         self.X = None
         self.y = None
+        # Per-observation multipliers of alpha, for observations less reliable
+        # than a full read (e.g. an early, short-window read)
+        self.noise = None
         self.sliding_window_size = sliding_window_size
         self.X_mean = None
         self.X_std = None
+        # With a fitting service, fits run in a worker process and predictions
+        # use the previous posterior until the new fit has arrived
+        self.fitting_service = fitting_service
+        self.fitted = False
+        self._pending = None
+        # With a change-point threshold, sliding_window_size is the largest
+        # window: it grows while one-step residuals look stationary and drops
+        # to min_window_size when CUSUM detects a shift
+        self.detector = None
+        if changepoint_threshold is not None:
+            self.detector = CusumDetector(threshold=changepoint_threshold, drift=changepoint_drift)
+        self.min_window_size = min_window_size
+        self.changepoints = 0
+        self._residual_var = None
+        # Mean function learned elsewhere (e.g. a TransferPrior); the GP then
+        # models the residuals of the observations from it
+        self.prior_mean = prior_mean
+        # Inputs whose targets are still outstanding (see set_pending)
+        self.pending = None
+        self._fit_data = None
+        self._believer = None
 
-    def update(self, X, y):
+    def detect_change(self, X, y):
+        """Test new observations against the current posterior; True on a detected shift."""
+        if self.detector is None or not self.fitted or len(self.y) < self.min_window_size:
+            return False
+        mean, std = self.predict(X)
+        residuals = np.atleast_1d(y) - mean
+        if self._residual_var is None:
+            self._residual_var = max(float(np.var(self.y)), 1e-12)
+        changed = False
+        for r, s in zip(residuals, std):
+            changed = self.detector.update(r / np.sqrt(s ** 2 + self._residual_var)) or changed
+            self._residual_var = 0.9 * self._residual_var + 0.1 * r ** 2
+        return changed
+
+    def update(self, X, y, changed=None, noise=None):
+        """Add observations and refit; returns whether a change point was detected.
+
+        `noise` scales the noise variance (alpha) of the new observations,
+        e.g. 4.0 for a read four times as noisy as a full one. Such reads do
+        not feed the change-point test.
+        """
+        if changed is None:
+            changed = self.detect_change(X, y) if noise is None else False
+        n = len(np.atleast_1d(y))
+        noise = np.ones(n) if noise is None else np.full(n, noise, dtype=float)
         if self.X is None:
             self.X = X
             self.y = y
+            self.noise = noise
         else:
             self.X = np.vstack((self.X, X))
             self.y = np.append(self.y, y)
+            self.noise = np.append(self.noise, noise)
 
         if len(self.y) > self.sliding_window_size:
             self.X = self.X[-self.sliding_window_size:]
             self.y = self.y[-self.sliding_window_size:]
+            self.noise = self.noise[-self.sliding_window_size:]
+        if changed:
+            self.changepoints += 1
+            self.X = self.X[-self.min_window_size:]
+            self.y = self.y[-self.min_window_size:]
+            self.noise = self.noise[-self.min_window_size:]
+            self._residual_var = None
+            if self.detector is not None:
+                self.detector.reset()
+            logger.info(f"Change point detected, shrinking GP window to {len(self.y)} observations")
+
+        X_mean = np.mean(self.X, axis=0)
+        X_std = np.std(self.X, axis=0) + 1e-8
+        X_normalized = (self.X - X_mean) / X_std
+        targets = self.y if self.prior_mean is None else self.y - self.prior_mean(self.X)
+        alpha = self.alpha * self.noise if np.any(self.noise != 1.0) else self.alpha
+        self.model.alpha = alpha
+        if self.fitting_service is None:
+            self.model.fit(X_normalized, targets)
+            self._install(X_normalized, targets, alpha, X_mean, X_std)
+            return changed
+        if self._pending is not None:
+            # Superseded by this window
+            self._pending[0].cancel()
+        future = self.fitting_service.submit(self.model, X_normalized, targets)
+        self._pending = (future, X_normalized, targets, alpha, X_mean, X_std)
+        return changed
 
-        self.X_mean = np.mean(self.X, axis=0)
-        self.X_std = np.std(self.X, axis=0) + 1e-8
-        X_normalized = (self.X - self.X_mean) / self.X_std
-        self.model.fit(X_normalized, self.y)
+    def _install(self, X_normalized, targets, alpha, X_mean, X_std):
+        self.X_mean, self.X_std = X_mean, X_std
+        self._fit_data = (X_normalized, targets, alpha)
+        self._believer = None
+        self.fitted = True
+
+    def _collect(self, wait=False, timeout=None):
+        if self._pending is None:
+            return
+        future, X_normalized, targets, alpha, X_mean, X_std = self._pending
+        if not wait and not future.done():
+            return
+        self._pending = None
+        if future.cancelled():
+            return
+        try:
+            fitted = future.result(timeout=timeout)
+        except Exception as e:
+            logger.error(f"GP fit failed, keeping the previous posterior: {e}")
+            return
+        if isinstance(fitted, dict):
+            self.model.set_state(X_normalized, fitted)
+        else:
+            self.model = fitted
+        self._install(X_normalized, targets, alpha, X_mean, X_std)
+
+    def wait_for_fit(self, timeout=None):
+        """Block until the latest submitted fit, if any, is in use."""
+        self._collect(wait=True, timeout=timeout)
+
+    def set_pending(self, X=None):
+        """Condition predictions on inputs whose targets have not arrived yet.
+
+        Pending inputs join the fitted window at their posterior mean (the
+        kriging believer), with the fitted hyperparameters kept. The mean is
+        unchanged while the std at and around pending inputs shrinks, so the
+        acquisition does not keep choosing actions that are already being
+        evaluated.
+        """
+        self.pending = None if X is None or len(X) == 0 else np.atleast_2d(X)
+        self._believer = None
+
+    def _fixed_model(self, alpha):
+        """Unfitted copy of the model with the fitted hyperparameters held fixed."""
+        if self.backend == "native":
+            kernel = MaternKernel(length_scale=self.model.length_scale_, length_scale_bounds="fixed",
+                                  nu=self.kernel.nu)
+            return NativeGaussianProcess(kernel=kernel, alpha=alpha, normalize_y=self.model.normalize_y,
+                                         n_restarts_optimizer=0, dtype=self.model.dtype)
+        from sklearn.gaussian_process import GaussianProcessRegressor
+
+        return GaussianProcessRegressor(kernel=self.model.kernel_, alpha=alpha,
+                                        normalize_y=self.model.normalize_y, optimizer=None)
+
+    def _posterior_model(self):
+        if self.pending is None:
+            return self.model
+        if self._believer is None:
+            X_fit, targets, alpha = self._fit_data
+            X_pending = (self.pending - self.X_mean) / self.X_std
+            if np.ndim(alpha) > 0:
+                alpha = np.append(alpha, np.full(len(X_pending), self.alpha))
+            believer = self._fixed_model(alpha)
+            try:
+                believer.fit(np.vstack((X_fit, X_pending)),
+                             np.concatenate((targets, self.model.predict(X_pending))))
+            except np.linalg.LinAlgError as e:
+                # e.g. pending inputs far outside a window with constant columns
+                logger.debug(f"Cannot condition on pending inputs, ignoring them: {e}")
+                believer = self.model
+            self._believer = believer
+        return self._believer
+
+    def predict_conditioned(self, X, X_new, y_new, noise=1.0):
+        """predict(X) as if (X_new, y_new) had been observed with their alpha scaled by `noise`.
+
+        The fitted hyperparameters are kept and the window is not changed,
+        so a tentative read can be weighed without becoming an observation.
+        """
+        self._collect()
+        if not self.fitted:
+            return self.predict(X)
+        X_fit, targets, alpha = self._fit_data
+        X_new = np.atleast_2d(X_new)
+        y_new = np.atleast_1d(y_new) if self.prior_mean is None else np.atleast_1d(y_new) - self.prior_mean(X_new)
+        alpha = np.append(np.broadcast_to(alpha, len(X_fit)), np.full(len(X_new), self.alpha * noise))
+        model = self._fixed_model(alpha)
+        try:
+            model.fit(np.vstack((X_fit, (X_new - self.X_mean) / self.X_std)), np.concatenate((targets, y_new)))
+        except np.linalg.LinAlgError as e:
+            logger.debug(f"Cannot condition on the new observations, ignoring them: {e}")
+            return self.predict(X)
+        prior = np.zeros(X.shape[0]) if self.prior_mean is None else self.prior_mean(X)
+        mean, std = model.predict((X - self.X_mean) / self.X_std, return_std=True)
+        return prior + mean, std
 
     def predict(self, X):
-        if self.X is None or len(self.X) == 0:
-            prior_variance = np.diag(self.kernel(X, X))
-            return np.zeros(X.shape[0]), np.sqrt(prior_variance)
+        self._collect()
+        prior = np.zeros(X.shape[0]) if self.prior_mean is None else self.prior_mean(X)
+        if self.X is None or len(self.X) == 0 or not self.fitted:
+            prior_variance = self.kernel.diag(X)
+            return prior, np.sqrt(prior_variance)
         X_normalized = (X - self.X_mean) / self.X_std
-        mean, std = self.model.predict(X_normalized, return_std=True)
-        return mean, std
+        mean, std = self._posterior_model().predict(X_normalized, return_std=True)
+        return prior + mean, std
+
+    @property
+    def fitted_length_scale(self):
+        """Length scale of the current fit, in normalized input units, or None."""
+        if not self.fitted:
+            return None
+        if self.backend == "native":
+            return float(self.model.length_scale_)
+        return float(self.model.kernel_.length_scale)
 
     def get_data(self):
         return self.X.copy() if self.X is not None else None, self.y.copy() if self.y is not None else None
 
     def reset(self):
+        if self._pending is not None:
+            self._pending[0].cancel()
+            self._pending = None
         self.X = None
         self.y = None
+        self.noise = None
+        self.fitted = False
+        self.pending = None
+        self._fit_data = None
+        self._believer = None
+        self._residual_var = None
+        if self.detector is not None:
+            self.detector.reset()
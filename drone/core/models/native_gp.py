@@ -0,0 +1,216 @@
+import numpy as np
+from scipy.linalg import get_lapack_funcs, solve_triangular
+from scipy.optimize import minimize
+
+_SQRT3 = 3.0 ** 0.5
+_SQRT5 = 5.0 ** 0.5
+
+
+class MaternKernel:
+    """Isotropic Matérn kernel evaluated on precomputed Euclidean distances.
+
+    Matches sklearn's ``Matern(length_scale, length_scale_bounds, nu)`` for
+    a scalar length scale and nu in {0.5, 1.5, 2.5, inf}. Gradients are taken
+    with respect to log(length_scale), as sklearn's ``theta`` is.
+    """
+
+    def __init__(self, length_scale=1.0, length_scale_bounds=(1e-5, 1e5), nu=1.5):
+        if nu not in (0.5, 1.5, 2.5, np.inf):
+            raise ValueError(f"Unsupported Matern nu={nu}, expected 0.5, 1.5, 2.5 or inf")
+        self.length_scale = length_scale
+        self.length_scale_bounds = length_scale_bounds
+        self.nu = nu
+
+    @property
+    def fixed(self):
+        return isinstance(self.length_scale_bounds, str) and self.length_scale_bounds == "fixed"
+
+    @property
+    def bounds(self):
+        return np.log(np.asarray([self.length_scale_bounds], dtype=float))
+
+    def from_distances(self, D, length_scale, eval_gradient=False):
+        d = D / float(length_scale)
+        if self.nu == 0.5:
+            E = np.exp(-d)
+            K = E
+            dK = d * E if eval_gradient else None
+        elif self.nu == 1.5:
+            a = _SQRT3 * d
+            E = np.exp(-a)
+            K = (1.0 + a) * E
+            dK = a * a * E if eval_gradient else None
+        elif self.nu == 2.5:
+            a = _SQRT5 * d
+            E = np.exp(-a)
+            K = (1.0 + a + a * a / 3.0) * E
+            dK = a * a * (1.0 + a) / 3.0 * E if eval_gradient else None
+        else:
+            sq = d * d
+            K = np.exp(-0.5 * sq)
+            dK = sq * K if eval_gradient else None
+        return (K, dK) if eval_gradient else K
+
+    def __call__(self, X, Y=None):
+        Y = X if Y is None else Y
+        return self.from_distances(_distances(X, Y), self.length_scale)
+
+    def diag(self, X):
+        return np.ones(X.shape[0], dtype=X.dtype)
+
+
+def _cholesky(K):
+    """Lower Cholesky factor of K through LAPACK directly, skipping scipy's checks."""
+    potrf, = get_lapack_funcs(("potrf",), (K,))
+    L, info = potrf(K, lower=True, clean=True, overwrite_a=False)
+    if info != 0:
+        raise np.linalg.LinAlgError(f"Kernel matrix is not positive definite (info={info})")
+    return L
+
+
+def _cho_solve(L, b):
+    potrs, = get_lapack_funcs(("potrs",), (L, b))
+    x, info = potrs(L, b, lower=True)
+    if info != 0:
+        raise ValueError(f"Illegal value in potrs argument {-info}")
+    return x
+
+
+def _distances(X, Y, out=None):
+    """Euclidean distances via ||x||² + ||y||² - 2xy, written into `out` if given."""
+    sq = np.einsum("ij,ij->i", X, X)[:, None] + np.einsum("ij,ij->i", Y, Y)[None, :]
+    out = np.matmul(X, Y.T, out=out)
+    np.multiply(out, -2.0, out=out)
+    np.add(out, sq, out=out)
+    np.maximum(out, 0.0, out=out)
+    return np.sqrt(out, out=out)
+
+
+class NativeGaussianProcess:
+    """Exact GP regression in NumPy, a drop-in for sklearn's GaussianProcessRegressor.
+
+    Follows sklearn's model without its per-call validation and kernel cloning.
+    """
+
+    def __init__(self, kernel, alpha=1e-2, normalize_y=True, n_restarts_optimizer=5,
+                 dtype=np.float64, random_state=None):
+        self.kernel = kernel
+        self.alpha = alpha
+        self.normalize_y = normalize_y
+        self.n_restarts_optimizer = n_restarts_optimizer
+        self.dtype = np.dtype(dtype)
+        self.random_state = random_state
+        self.length_scale_ = kernel.length_scale
+        self.log_marginal_likelihood_value_ = None
+        self._cross_buffer = None
+
+    def __getstate__(self):
+        # Models are pickled to be refitted in a worker, which needs neither
+        # the last fit's training data and factors nor the prediction buffer
+        state = {name: value for name, value in self.__dict__.items()
+                 if name not in ("X_train_", "_y", "_D", "L_", "alpha_")}
+        state["_cross_buffer"] = None
+        return state
+
+    def _rng(self):
+        if self.random_state is None:
+            # Same global stream sklearn draws its restarts from
+            return np.random.mtrand._rand
+        if isinstance(self.random_state, np.random.RandomState):
+            return self.random_state
+        return np.random.RandomState(self.random_state)
+
+    def log_marginal_likelihood(self, theta, eval_gradient=False):
+        K, dK = self.kernel.from_distances(self._D, np.exp(theta[0]), eval_gradient=True)
+        K[np.diag_indices_from(K)] += self.alpha
+        try:
+            L = _cholesky(K)
+        except np.linalg.LinAlgError:
+            return (-np.inf, np.zeros_like(theta)) if eval_gradient else -np.inf
+        alpha = _cho_solve(L, self._y)
+        lml = (-0.5 * float(self._y @ alpha) - float(np.log(np.diag(L)).sum())
+               - 0.5 * len(self._y) * np.log(2 * np.pi))
+        if not eval_gradient:
+            return lml
+        K_inv = _cho_solve(L, np.eye(len(self._y), dtype=K.dtype))
+        # d lml / d theta = 0.5 tr((αα^T - K^-1) dK/dtheta); both factors are symmetric
+        grad = 0.5 * float(np.sum((np.outer(alpha, alpha) - K_inv) * dK))
+        return lml, np.array([grad])
+
+    def _optimize(self):
+        def objective(theta):
+            lml, grad = self.log_marginal_likelihood(theta, eval_gradient=True)
+            return -lml, -grad
+
+        bounds = self.kernel.bounds
+        starts = [np.log([self.kernel.length_scale])]
+        if self.n_restarts_optimizer > 0:
+            if not np.isfinite(bounds).all():
+                raise ValueError("Multiple optimizer restarts require finite length_scale_bounds")
+            rng = self._rng()
+            starts += [rng.uniform(bounds[:, 0], bounds[:, 1]) for _ in range(self.n_restarts_optimizer)]
+        best_theta, best_value = starts[0], np.inf
+        for theta0 in starts:
+            result = minimize(objective, theta0, method="L-BFGS-B", jac=True, bounds=bounds)
+            if result.fun < best_value:
+                best_theta, best_value = result.x, result.fun
+        return best_theta, -best_value
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=self.dtype)
+        y = np.asarray(y, dtype=self.dtype).ravel()
+        if self.normalize_y:
+            self._y_mean = y.mean()
+            std = y.std()
+            self._y_std = std if std > 0 else 1.0
+            y = (y - self._y_mean) / self._y_std
+        else:
+            self._y_mean, self._y_std = 0.0, 1.0
+        self.X_train_ = X
+        self._y = y
+        self._D = _distances(X, X)
+        np.fill_diagonal(self._D, 0.0)
+        if self.kernel.fixed:
+            theta = np.log([self.kernel.length_scale])
+            self.log_marginal_likelihood_value_ = self.log_marginal_likelihood(theta)
+        else:
+            theta, self.log_marginal_likelihood_value_ = self._optimize()
+        self.length_scale_ = float(np.exp(theta[0]))
+        K = self.kernel.from_distances(self._D, self.length_scale_)
+        K[np.diag_indices_from(K)] += self.alpha
+        self.L_ = _cholesky(K)
+        self.alpha_ = _cho_solve(self.L_, y)
+        return self
+
+    def get_state(self):
+        """Fitted hyperparameters and factors, without the training inputs."""
+        return {
+            "length_scale_": self.length_scale_,
+            "log_marginal_likelihood_value_": self.log_marginal_likelihood_value_,
+            "L_": self.L_,
+            "alpha_": self.alpha_,
+            "_y_mean": self._y_mean,
+            "_y_std": self._y_std
+        }
+
+    def set_state(self, X, state):
+        """Install a fit computed elsewhere on training inputs X."""
+        self.X_train_ = np.asarray(X, dtype=self.dtype)
+        for name, value in state.items():
+            setattr(self, name, value)
+        return self
+
+    def predict(self, X, return_std=False):
+        X = np.asarray(X, dtype=self.dtype)
+        shape = (X.shape[0], self.X_train_.shape[0])
+        if self._cross_buffer is None or self._cross_buffer.shape != shape:
+            self._cross_buffer = np.empty(shape, dtype=self.dtype)
+        K_trans = self.kernel.from_distances(_distances(X, self.X_train_, out=self._cross_buffer),
+                                             self.length_scale_)
+        mean = (K_trans @ self.alpha_) * self._y_std + self._y_mean
+        if not return_std:
+            return mean
+        V = solve_triangular(self.L_, K_trans.T, lower=True, check_finite=False)
+        var = 1.0 - np.einsum("ij,ij->j", V, V)
+        np.maximum(var, 0.0, out=var)
+        return mean, np.sqrt(var) * self._y_std
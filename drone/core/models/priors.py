@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import threading
+import numpy as np
+
+from drone.core.models.gaussian_process import DroneGaussianProcess
+
+logger = logging.getLogger(__name__)
+
+_INTENSITIES = ("cpu_intensive", "memory_intensive", "network_intensive")
+
+
+def prior_key(characteristics, mode):
+    """Store key of an application class, e.g. ``public/microservice/cpu_intensive``."""
+    parts = [mode, characteristics.get("app_type", "microservice")]
+    parts += [name for name in _INTENSITIES if characteristics.get(name)]
+    if characteristics.get("stateful"):
+        parts.append("stateful")
+    return "/".join(parts)
+
+
+class TransferPrior:
+    """Prior mean and length scale learned from other applications' histories.
+
+    The mean is the posterior mean of a GP fitted once, with the stored
+    length scale fixed, on the pooled observations; it is used as the mean
+    function of a residual GP for the new application.
+    """
+
+    def __init__(self, X, y, length_scale):
+        self.length_scale = length_scale
+        self.n = len(y)
+        self.mean_gp = DroneGaussianProcess(length_scale=length_scale, length_scale_bounds="fixed",
+                                            n_restarts_optimizer=0, sliding_window_size=len(y),
+                                            backend="native")
+        self.mean_gp.update(X, y)
+
+    def __call__(self, X):
+        return self.mean_gp.predict(X)[0]
+
+
+class PriorStore:
+    """JSON-persisted observation histories keyed by application class.
+
+    Each key and target (reward, performance or resource) holds the latest
+    observations and fitted GP length scale of every application recorded
+    under it, at most `max_points` per application.
+    """
+
+    def __init__(self, path=None, max_points=200, seed=0):
+        self.path = path
+        self.max_points = max_points
+        self.seed = seed
+        self.entries = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Error loading prior store {path}: {e}")
+
+    def record(self, key, target, app, X, y, length_scale=None):
+        X = np.asarray(X, dtype=float)[-self.max_points:]
+        y = np.asarray(y, dtype=float)[-self.max_points:]
+        if len(y) == 0:
+            return
+        with self._lock:
+            apps = self.entries.setdefault(key, {}).setdefault(target, {})
+            apps[app] = {"X": X.tolist(), "y": y.tolist(), "length_scale": length_scale}
+
+    def get(self, key, target, dims, exclude=None):
+        """Prior for inputs of `dims` dimensions, or None if nothing matching is stored."""
+        with self._lock:
+            apps = dict(self.entries.get(key, {}).get(target, {}))
+        histories = [h for app, h in apps.items() if app != exclude and len(h["X"][0]) == dims]
+        if not histories:
+            return None
+        X = np.vstack([h["X"] for h in histories])
+        y = np.concatenate([h["y"] for h in histories])
+        if len(y) > self.max_points:
+            keep = np.sort(np.random.default_rng(self.seed).choice(len(y), self.max_points, replace=False))
+            X, y = X[keep], y[keep]
+        length_scales = [h["length_scale"] for h in histories if h.get("length_scale")]
+        length_scale = float(np.median(length_scales)) if length_scales else 1.0
+        return TransferPrior(X, y, length_scale)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self.entries)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+
+_shared_stores = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_prior_store(path, max_points=200):
+    """Return the store for `path` shared by all orchestrators in this process."""
+    with _shared_lock:
+        if path not in _shared_stores:
+            _shared_stores[path] = PriorStore(path, max_points=max_points)
+        return _shared_stores[path]
@@ -1,3 +1,13 @@
-from drone.kubernetes.client import KubernetesClient
+from drone._lazy import lazy_exports
 
-__all__ = ['KubernetesClient']
+_EXPORTS = {
+    'KubernetesClient': 'drone.kubernetes.client',
+    'ClusterCapacityIndex': 'drone.kubernetes.capacity',
+    'LeaseManager': 'drone.kubernetes.lease',
+    'parse_quantity': 'drone.kubernetes.quantity',
+    'parse_cpu': 'drone.kubernetes.quantity',
+    'parse_memory': 'drone.kubernetes.quantity'
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,218 @@
+import logging
+import threading
+import numpy as np
+
+from drone.kubernetes.quantity import parse_cpu, parse_memory
+
+logger = logging.getLogger(__name__)
+
+RESOURCES = ("cpu", "memory")
+# Zone id of nodes without a zone label
+UNLABELLED = -1
+
+
+class ClusterCapacityIndex:
+    """Per-node and per-zone allocatable/capacity of the cluster.
+
+    Node quantities are parsed once into ``allocatable`` and ``capacity``
+    arrays (one row per node, columns ordered as ``RESOURCES``: cores and
+    bytes). The index is populated from a single node listing and then kept
+    current from node watch events, so consumers never re-list the cluster.
+    """
+
+    def __init__(self, k8s_client, zone_label="zone", default_zone="zone-1"):
+        self.k8s_client = k8s_client
+        self.zone_label = zone_label
+        self.default_zone = default_zone
+        self.node_names = []
+        self.node_labels = []
+        self.node_zone_ids = np.zeros(0, dtype=int)
+        self.allocatable = np.zeros((0, len(RESOURCES)))
+        self.capacity = np.zeros((0, len(RESOURCES)))
+        self.zone_names = []
+        self.version = 0
+        self.loaded = False
+        self._node_index = {}
+        self._lock = threading.RLock()
+        self._watch_thread = None
+        self._watching = False
+        self._prefetch_thread = None
+
+    def refresh(self):
+        nodes = self.k8s_client.get_nodes() if self.k8s_client else []
+        with self._lock:
+            self.node_names = []
+            self.node_labels = []
+            self.node_zone_ids = np.zeros(0, dtype=int)
+            self.allocatable = np.zeros((0, len(RESOURCES)))
+            self.capacity = np.zeros((0, len(RESOURCES)))
+            self.zone_names = []
+            self._node_index = {}
+            for node in nodes:
+                self._upsert(node)
+            self.loaded = True
+            self.version += 1
+        logger.info(f"Indexed {len(self.node_names)} nodes across {len(self.zone_names)} zones")
+
+    def prefetch(self):
+        """List the nodes in the background; the first reader waits for it."""
+        if self.loaded or self._prefetch_thread is not None:
+            return
+        self._prefetch_thread = threading.Thread(target=self._prefetch, name="drone-node-prefetch", daemon=True)
+        self._prefetch_thread.start()
+
+    def _prefetch(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Error prefetching nodes: {e}")
+
+    def ensure_loaded(self):
+        thread = self._prefetch_thread
+        if thread is not None:
+            thread.join()
+            self._prefetch_thread = None
+        if not self.loaded:
+            self.refresh()
+
+    def apply_event(self, event_type, node):
+        with self._lock:
+            if event_type == "DELETED":
+                self._remove(node["name"])
+            elif event_type in ("ADDED", "MODIFIED"):
+                self._upsert(node)
+            else:
+                return
+            self.version += 1
+
+    def watch(self, timeout_seconds=60):
+        self.ensure_loaded()
+        for event_type, node in self.k8s_client.watch_nodes(timeout_seconds=timeout_seconds):
+            self.apply_event(event_type, node)
+
+    def start_watch(self, timeout_seconds=60):
+        if self._watch_thread is not None or not hasattr(self.k8s_client, "watch_nodes"):
+            return
+        if not getattr(self.k8s_client, "configured", True):
+            return
+        self._watching = True
+
+        def _run():
+            while self._watching:
+                try:
+                    self.watch(timeout_seconds=timeout_seconds)
+                    if getattr(self.k8s_client, "nodes_resource_version", True) is None:
+                        # The watch expired, re-list to resynchronise
+                        self.refresh()
+                except Exception as e:
+                    logger.error(f"Error in node watch: {e}")
+                    self._watching = False
+
+        self._watch_thread = threading.Thread(target=_run, name="drone-node-watch", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watch(self):
+        self._watching = False
+        self._watch_thread = None
+
+    def _zone_id(self, labels):
+        if not labels or self.zone_label not in labels:
+            return UNLABELLED
+        zone = labels[self.zone_label]
+        if zone not in self.zone_names:
+            self.zone_names.append(zone)
+        return self.zone_names.index(zone)
+
+    def _resources_row(self, quantities):
+        quantities = quantities or {}
+        return np.array([parse_cpu(quantities.get("cpu"), default=0.0),
+                         parse_memory(quantities.get("memory"), default=0.0)])
+
+    def _upsert(self, node):
+        name = node["name"]
+        zone_id = self._zone_id(node.get("labels"))
+        allocatable = self._resources_row(node.get("allocatable"))
+        capacity = self._resources_row(node.get("capacity"))
+        idx = self._node_index.get(name)
+        if idx is None:
+            self._node_index[name] = len(self.node_names)
+            self.node_names.append(name)
+            self.node_labels.append(node.get("labels") or {})
+            self.node_zone_ids = np.append(self.node_zone_ids, zone_id)
+            self.allocatable = np.vstack([self.allocatable, allocatable])
+            self.capacity = np.vstack([self.capacity, capacity])
+        else:
+            self.node_labels[idx] = node.get("labels") or {}
+            self.node_zone_ids[idx] = zone_id
+            self.allocatable[idx] = allocatable
+            self.capacity[idx] = capacity
+
+    def _remove(self, name):
+        idx = self._node_index.pop(name, None)
+        if idx is None:
+            return
+        # Swap the last row into the freed slot to keep the arrays dense
+        last = len(self.node_names) - 1
+        if idx != last:
+            self.node_names[idx] = self.node_names[last]
+            self.node_labels[idx] = self.node_labels[last]
+            self.node_zone_ids[idx] = self.node_zone_ids[last]
+            self.allocatable[idx] = self.allocatable[last]
+            self.capacity[idx] = self.capacity[last]
+            self._node_index[self.node_names[idx]] = idx
+        self.node_names.pop()
+        self.node_labels.pop()
+        self.node_zone_ids = self.node_zone_ids[:last]
+        self.allocatable = self.allocatable[:last]
+        self.capacity = self.capacity[:last]
+
+    def get_zones(self):
+        """Map zone name to node names, in zone discovery order.
+
+        Unlabelled nodes only form the default zone when no node carries a
+        zone label.
+        """
+        self.ensure_loaded()
+        with self._lock:
+            zones = {}
+            for zone_id, zone in enumerate(self.zone_names):
+                members = [self.node_names[i] for i in np.where(self.node_zone_ids == zone_id)[0]]
+                if members:
+                    zones[zone] = members
+            if not zones:
+                unlabelled = [self.node_names[i] for i in np.where(self.node_zone_ids == UNLABELLED)[0]]
+                if unlabelled:
+                    zones[self.default_zone] = unlabelled
+            return zones
+
+    def get_zone_totals(self, kind="allocatable"):
+        """Return (zone_names, array of shape (n_zones, len(RESOURCES)))."""
+        self.ensure_loaded()
+        with self._lock:
+            values = self.allocatable if kind == "allocatable" else self.capacity
+            labelled = self.node_zone_ids != UNLABELLED
+            if not labelled.any():
+                # As in get_zones, unlabelled nodes form the default zone only on their own
+                if not len(self.node_zone_ids):
+                    return [], np.zeros((0, len(RESOURCES)))
+                return [self.default_zone], values.sum(axis=0, keepdims=True)
+            totals = np.zeros((len(self.zone_names), len(RESOURCES)))
+            np.add.at(totals, self.node_zone_ids[labelled], values[labelled])
+            # Zones whose nodes have all gone are dropped, as in get_zones
+            present = np.bincount(self.node_zone_ids[labelled], minlength=len(self.zone_names)) > 0
+            return [zone for zone, keep in zip(self.zone_names, present) if keep], totals[present]
+
+    def get_total(self, kind="allocatable"):
+        self.ensure_loaded()
+        with self._lock:
+            values = self.allocatable if kind == "allocatable" else self.capacity
+            return dict(zip(RESOURCES, values.sum(axis=0).tolist()))
+
+    def get_max_node(self, kind="allocatable"):
+        """Largest per-node quantity of each resource, i.e. the biggest pod that can fit."""
+        self.ensure_loaded()
+        with self._lock:
+            values = self.allocatable if kind == "allocatable" else self.capacity
+            if len(values) == 0:
+                return dict.fromkeys(RESOURCES, 0.0)
+            return dict(zip(RESOURCES, values.max(axis=0).tolist()))
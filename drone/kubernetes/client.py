@@ -1,5 +1,7 @@
 import logging
-from kubernetes import client, config
+from kubernetes import client, config, watch
+
+from drone.kubernetes.quantity import parse_cpu, parse_memory, format_memory
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +16,7 @@ class KubernetesClient:
                 config.load_kube_config()
             self.apps_v1 = client.AppsV1Api()
             self.core_v1 = client.CoreV1Api()
+            self.batch_v1 = client.BatchV1Api()
             self.configured = True
         except Exception as e:
             logger.error(f"Error configuring Kubernetes client: {e}")
@@ -198,6 +201,61 @@ class KubernetesClient:
             logger.error(f"Error updating StatefulSet: {e}")
             return False
 
+    def canary_name(self, app_name):
+        return f"{app_name}-drone-canary"
+
+    def apply_canary(self, app_name, cpu, memory, replicas=1, node_affinities=None):
+        """Create or resize the canary Deployment of `app_name` with the given resources.
+
+        The canary is a copy of the application's Deployment whose pods keep
+        its labels, so the same Service routes to them, plus a
+        ``drone/track: canary`` label its own selector requires. Only
+        Deployments can be canaried.
+        """
+        if not self.configured:
+            logger.error("Kubernetes client not properly configured")
+            return False
+        name = self.canary_name(app_name)
+        try:
+            canaries = self.apps_v1.list_namespaced_deployment(namespace=self.namespace,
+                                                                field_selector=f"metadata.name={name}")
+            if canaries.items:
+                return self._update_deployment(canaries.items[0], cpu, memory, replicas, node_affinities)
+            deployments = self.apps_v1.list_namespaced_deployment(namespace=self.namespace,
+                                                                   field_selector=f"metadata.name={app_name}")
+            if not deployments.items:
+                logger.error(f"No Deployment found for {app_name} to canary")
+                return False
+            main = deployments.items[0]
+            selector = dict(main.spec.selector.match_labels or {}, **{"drone/track": "canary"})
+            template = main.spec.template
+            template.metadata.labels = dict(template.metadata.labels or {}, **{"drone/track": "canary"})
+            canary = client.V1Deployment(
+                metadata=client.V1ObjectMeta(name=name, namespace=self.namespace,
+                                             labels=dict(main.metadata.labels or {}, **{"drone/track": "canary"})),
+                spec=client.V1DeploymentSpec(replicas=0, template=template,
+                                             selector=client.V1LabelSelector(match_labels=selector)))
+            self.apps_v1.create_namespaced_deployment(namespace=self.namespace, body=canary)
+            # Created empty, so that no pod starts before the candidate resources are set
+            canary = self.apps_v1.read_namespaced_deployment(name=name, namespace=self.namespace)
+            return self._update_deployment(canary, cpu, memory, replicas, node_affinities)
+        except Exception as e:
+            logger.error(f"Error applying canary: {e}")
+            return False
+
+    def delete_canary(self, app_name):
+        if not self.configured:
+            logger.error("Kubernetes client not properly configured")
+            return False
+        try:
+            self.apps_v1.delete_namespaced_deployment(name=self.canary_name(app_name), namespace=self.namespace)
+            return True
+        except client.exceptions.ApiException as e:
+            if e.status == 404:
+                return True
+            logger.error(f"Error deleting canary: {e}")
+            return False
+
     def get_current_resources(self, app_name):
         if not self.configured:
             logger.error("Kubernetes client not properly configured")
@@ -237,39 +295,18 @@ class KubernetesClient:
         # Aggregate resources from all containers
         total_cpu = 0.0
         total_memory = 0.0
-        
+
         for container in resource.spec.template.spec.containers:
             if container.resources and container.resources.requests:
                 if "cpu" in container.resources.requests:
-                    cpu_str = container.resources.requests["cpu"]
-                    # Parse CPU value (e.g., "100m" -> 0.1, "1" -> 1.0)
-                    try:
-                        if cpu_str.endswith('m'):
-                            total_cpu += float(cpu_str[:-1]) / 1000
-                        else:
-                            total_cpu += float(cpu_str)
-                    except ValueError:
-                        pass
+                    total_cpu += parse_cpu(container.resources.requests["cpu"], default=0.0)
 
                 if "memory" in container.resources.requests:
-                    mem_str = container.resources.requests["memory"]
-                    # Parse memory value to Mi
-                    try:
-                        if mem_str.endswith('Mi'):
-                            total_memory += float(mem_str[:-2])
-                        elif mem_str.endswith('Gi'):
-                            total_memory += float(mem_str[:-2]) * 1024
-                        elif mem_str.endswith('Ki'):
-                            total_memory += float(mem_str[:-2]) / 1024
-                        else:
-                            # Assume bytes
-                            total_memory += float(mem_str) / (1024 * 1024)
-                    except ValueError:
-                        pass
-        
+                    total_memory += parse_memory(container.resources.requests["memory"], default=0.0)
+
         # Set aggregated values
         result["cpu"] = total_cpu if total_cpu > 0 else 0.5  # Default to 0.5 CPU
-        result["memory"] = f"{int(total_memory)}Mi" if total_memory > 0 else "512Mi"  # Default to 512Mi
+        result["memory"] = format_memory(total_memory) if total_memory > 0 else "512Mi"  # Default to 512Mi
 
         # Extract node affinities if present
         if (resource.spec.template.spec.affinity and
@@ -284,27 +321,77 @@ class KubernetesClient:
 
         return result
 
-    def get_nodes(self):
+    def get_completed_jobs(self, app_name, since=None):
+        """Successful runs of the application's jobs, optionally only those started at or after `since`.
+
+        Jobs belong to the application if they are named after it (directly
+        or as a CronJob run, ``<app>-<suffix>``) or carry an ``app`` label
+        with its name. Times are epoch seconds.
+        """
         if not self.configured:
             logger.error("Kubernetes client not properly configured")
             return []
 
         try:
-            nodes = self.core_v1.list_node()
-            result = []
+            jobs = self.batch_v1.list_namespaced_job(namespace=self.namespace)
+        except Exception as e:
+            logger.error(f"Error listing jobs: {e}")
+            return []
 
-            for node in nodes.items:
-                node_info = {
-                    "name": node.metadata.name,
-                    "labels": node.metadata.labels,
-                    "allocatable": node.status.allocatable,
-                    "capacity": node.status.capacity
-                }
+        completed = []
+        for job in jobs.items:
+            name = job.metadata.name
+            labels = job.metadata.labels or {}
+            if name != app_name and not name.startswith(f"{app_name}-") and labels.get("app") != app_name:
+                continue
+            status = job.status
+            if not status.succeeded or status.start_time is None or status.completion_time is None:
+                continue
+            start = status.start_time.timestamp()
+            if since is not None and start < since:
+                continue
+            completion = status.completion_time.timestamp()
+            completed.append({"name": name, "start_time": start, "completion_time": completion,
+                              "duration": completion - start})
+        return completed
 
-                result.append(node_info)
+    def get_nodes(self):
+        if not self.configured:
+            logger.error("Kubernetes client not properly configured")
+            return []
 
-            return result
+        try:
+            nodes = self.core_v1.list_node()
+            self.nodes_resource_version = nodes.metadata.resource_version
+            return [self._node_info(node) for node in nodes.items]
 
         except Exception as e:
             logger.error(f"Error getting nodes: {e}")
             return []
+
+    def watch_nodes(self, timeout_seconds=60, resource_version=None):
+        """Yield (event_type, node_info) for node changes since the last listing."""
+        if not self.configured:
+            logger.error("Kubernetes client not properly configured")
+            return
+        if resource_version is None:
+            resource_version = getattr(self, "nodes_resource_version", None)
+        kwargs = {"timeout_seconds": timeout_seconds}
+        if resource_version:
+            kwargs["resource_version"] = resource_version
+        try:
+            for event in watch.Watch().stream(self.core_v1.list_node, **kwargs):
+                node = event["object"]
+                self.nodes_resource_version = node.metadata.resource_version
+                yield event["type"], self._node_info(node)
+        except Exception as e:
+            logger.error(f"Error watching nodes: {e}")
+            self.nodes_resource_version = None
+
+    def _node_info(self, node):
+        return {
+            "name": node.metadata.name,
+            "labels": node.metadata.labels,
+            "allocatable": node.status.allocatable,
+            "capacity": node.status.capacity
+        }
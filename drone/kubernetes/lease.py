@@ -0,0 +1,118 @@
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+
+logger = logging.getLogger(__name__)
+
+
+def lease_name(*parts):
+    """Lease object name for `parts`, reduced to the characters Kubernetes allows."""
+    name = ".".join(re.sub(r"[^a-z0-9-]+", "-", str(part).lower()).strip("-") for part in parts)
+    return name[:253]
+
+
+class LeaseManager:
+    """Holds coordination.k8s.io Leases on behalf of one controller replica.
+
+    Writes carry the resource version read, so racing replicas conflict;
+    held() only trusts leases renewed within their duration by the local clock.
+    """
+
+    def __init__(self, coordination_api=None, namespace="default", identity=None, lease_duration=15, clock=None):
+        if coordination_api is None:
+            coordination_api = client.CoordinationV1Api()
+        self.api = coordination_api
+        self.namespace = namespace
+        self.identity = identity
+        self.lease_duration = lease_duration
+        self.clock = clock or time
+        self._renewed = {}
+        self._lock = threading.Lock()
+
+    def _timestamp(self, now):
+        return datetime.fromtimestamp(now, tz=timezone.utc)
+
+    def _expired(self, lease, now):
+        spec = lease.spec
+        if not spec.holder_identity or spec.renew_time is None:
+            return True
+        duration = spec.lease_duration_seconds or self.lease_duration
+        return spec.renew_time.timestamp() + duration < now
+
+    def _read(self, name):
+        try:
+            return self.api.read_namespaced_lease(name, self.namespace)
+        except ApiException as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def acquire(self, name, labels=None):
+        """Acquire or renew lease `name`; return whether this replica holds it."""
+        now = self.clock.time()
+        try:
+            lease = self._read(name)
+            if lease is None:
+                body = client.V1Lease(
+                    metadata=client.V1ObjectMeta(name=name, namespace=self.namespace, labels=labels),
+                    spec=client.V1LeaseSpec(holder_identity=self.identity,
+                                            lease_duration_seconds=int(self.lease_duration),
+                                            acquire_time=self._timestamp(now), renew_time=self._timestamp(now),
+                                            lease_transitions=0))
+                self.api.create_namespaced_lease(self.namespace, body)
+            else:
+                if lease.spec.holder_identity != self.identity:
+                    if not self._expired(lease, now):
+                        self._forget(name)
+                        return False
+                    lease.spec.acquire_time = self._timestamp(now)
+                    lease.spec.lease_transitions = (lease.spec.lease_transitions or 0) + 1
+                    logger.info(f"Taking over lease {name} from {lease.spec.holder_identity or 'nobody'}")
+                lease.spec.holder_identity = self.identity
+                lease.spec.lease_duration_seconds = int(self.lease_duration)
+                lease.spec.renew_time = self._timestamp(now)
+                if labels:
+                    lease.metadata.labels = dict(lease.metadata.labels or {}, **labels)
+                self.api.replace_namespaced_lease(name, self.namespace, lease)
+        except ApiException as e:
+            if e.status != 409:
+                logger.error(f"Error acquiring lease {name}: {e}")
+            self._forget(name)
+            return False
+        with self._lock:
+            self._renewed[name] = now
+        return True
+
+    def release(self, name):
+        """Give up lease `name` so that another replica can take it over at once."""
+        self._forget(name)
+        try:
+            lease = self._read(name)
+            if lease is None or lease.spec.holder_identity != self.identity:
+                return
+            lease.spec.holder_identity = None
+            lease.spec.renew_time = None
+            self.api.replace_namespaced_lease(name, self.namespace, lease)
+        except ApiException as e:
+            logger.warning(f"Error releasing lease {name}: {e}")
+
+    def _forget(self, name):
+        with self._lock:
+            self._renewed.pop(name, None)
+
+    def held(self, name):
+        """Whether this replica renewed lease `name` within the lease duration."""
+        with self._lock:
+            renewed = self._renewed.get(name)
+        return renewed is not None and self.clock.time() - renewed < self.lease_duration
+
+    def holders(self, label_selector=None):
+        """Map the unexpired leases matching `label_selector` to their holders."""
+        now = self.clock.time()
+        leases = self.api.list_namespaced_lease(self.namespace, label_selector=label_selector)
+        return {lease.metadata.name: lease.spec.holder_identity for lease in leases.items
+                if not self._expired(lease, now)}
@@ -0,0 +1,80 @@
+import re
+from functools import lru_cache
+
+BINARY_SUFFIXES = {
+    "Ki": 1024,
+    "Mi": 1024 ** 2,
+    "Gi": 1024 ** 3,
+    "Ti": 1024 ** 4,
+    "Pi": 1024 ** 5,
+    "Ei": 1024 ** 6
+}
+
+DECIMAL_SUFFIXES = {
+    "n": 1e-9,
+    "u": 1e-6,
+    "m": 1e-3,
+    "": 1.0,
+    "k": 1e3,
+    "M": 1e6,
+    "G": 1e9,
+    "T": 1e12,
+    "P": 1e15,
+    "E": 1e18
+}
+
+# <sign><digits>[.<digits>]<suffix>, where suffix is a binary SI suffix,
+# a decimal SI suffix or a decimal exponent such as "e3" / "E-2"
+_QUANTITY_RE = re.compile(r"^([+-]?(?:\d+\.?\d*|\.\d+))([eE][+-]?\d+|[KMGTPE]i|[numkMGTPE])?$")
+
+MIB = 1024 ** 2
+GIB = 1024 ** 3
+
+
+@lru_cache(maxsize=4096)
+def _parse(value):
+    match = _QUANTITY_RE.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid Kubernetes quantity: {value!r}")
+    number, suffix = match.groups()
+    if not suffix:
+        return float(number)
+    if suffix[0] in "eE":
+        return float(number + suffix)
+    if suffix in BINARY_SUFFIXES:
+        return float(number) * BINARY_SUFFIXES[suffix]
+    return float(number) * DECIMAL_SUFFIXES[suffix]
+
+
+def parse_quantity(value, default=None):
+    """Parse a Kubernetes quantity ("500m", "1.5Gi", "2G", "1e3") into a float.
+
+    Numbers are passed through unchanged. Parsed strings are cached, so
+    repeatedly parsing the same node or container quantities is cheap.
+    """
+    if value is None:
+        if default is None:
+            raise ValueError("Quantity is None")
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return _parse(str(value))
+    except ValueError:
+        if default is None:
+            raise
+        return default
+
+
+def parse_cpu(value, default=None):
+    """Parse a CPU quantity into cores."""
+    return parse_quantity(value, default)
+
+
+def parse_memory(value, default=None):
+    """Parse a memory quantity into bytes."""
+    return parse_quantity(value, default)
+
+
+def format_memory(memory_bytes):
+    return f"{int(round(memory_bytes / MIB))}Mi"
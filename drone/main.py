@@ -4,9 +4,6 @@
 import argparse
 import logging
 import sys
-import time
-
-from drone import DroneOrchestrator
 
 # Configure logging
 logging.basicConfig(
@@ -52,6 +49,24 @@ def parse_args():
         help='Use in-cluster Kubernetes configuration'
     )
 
+    parser.add_argument(
+        '--mock',
+        action='store_true',
+        help='Run against a simulated cluster and workload instead of Kubernetes/Prometheus'
+    )
+
+    parser.add_argument(
+        '--trace-file',
+        help='JSONL workload trace for --mock (default: synthetic diurnal trace)'
+    )
+
+    parser.add_argument(
+        '--app-type',
+        choices=['microservice', 'batch'],
+        default='microservice',
+        help='Application type simulated by --mock (default: microservice)'
+    )
+
     parser.add_argument(
         '--config-file',
         help='Path to configuration file'
@@ -70,6 +85,12 @@ def parse_args():
         help='Interval between iterations in seconds (default: 60)'
     )
 
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        help='Expose orchestrator metrics on this port at /metrics'
+    )
+
     parser.add_argument(
         '--verbose',
         action='store_true',
@@ -93,14 +114,32 @@ def main():
             f"Starting Drone orchestrator for application: {args.app_name}")
         logger.info(f"Mode: {args.mode}, Namespace: {args.namespace}")
 
+        if args.metrics_port:
+            from drone.utils.instrumentation import start_metrics_server
+            start_metrics_server(args.metrics_port)
+
+        components = {}
+        if args.mock:
+            from drone.simulation import build_simulation
+            logger.info("Using simulated cluster and workload")
+            from drone.orchestrator import load_config
+            sampling = load_config(args.config_file).get("metrics", {}).get("sampling", {})
+            components = build_simulation(namespace=args.namespace, trace_file=args.trace_file,
+                                          app_type=args.app_type, settle_time=sampling.get("settle_time", 30))
+            if not args.iterations:
+                args.iterations = len(components["monitoring"].trace)
+
         # Create orchestrator instance
+        from drone.orchestrator import DroneOrchestrator
+
         orchestrator = DroneOrchestrator(
             app_name=args.app_name,
             namespace=args.namespace,
             mode=args.mode,
             prometheus_url=args.prometheus_url,
             in_cluster=args.in_cluster,
-            config_file=args.config_file
+            config_file=args.config_file,
+            **components
         )
 
         # Run orchestrator
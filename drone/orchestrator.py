@@ -1,72 +1,430 @@
 import logging
+import math
+import threading
 import time
 import numpy as np
 import os
 import yaml
 
-from drone.core.algorithms import PublicCloudBandit, PrivateCloudBandit
-from drone.utils import (
-    MonitoringInterface, PrometheusMonitoring,
-    ApplicationIdentifier,
-    ObjectiveEnforcer, ResourceEnforcer
-)
-from drone.kubernetes import KubernetesClient
+from drone.core.models.forecasting import ContextForecaster
+from drone.utils.monitoring import PrometheusMonitoring
+from drone.utils.app_identifier import ApplicationIdentifier
+from drone.utils.enforcer import ObjectiveEnforcer, ResourceEnforcer
+from drone.utils.instrumentation import OrchestratorMetrics, start_metrics_server
+from drone.utils.trace import TraceWriter
+from drone.utils.scheduler import AdaptiveIntervalScheduler
+from drone.utils.pending import PendingObservationQueue
+from drone.kubernetes.capacity import ClusterCapacityIndex
+from drone.kubernetes.quantity import parse_cpu, parse_memory, MIB
 
 logger = logging.getLogger(__name__)
 
 
+def load_config(config_file):
+    """Orchestrator configuration from a YAML file; empty if there is none."""
+    if not config_file or not os.path.exists(config_file):
+        return {}
+    with open(config_file, 'r') as f:
+        return yaml.safe_load(f) or {}
+
+
+class OwnershipLost(RuntimeError):
+    """Raised instead of actuating once the orchestrator's fence reports another owner."""
+
+
 class DroneOrchestrator:
     def __init__(self, app_name, namespace="default", mode="public", 
-                 prometheus_url="http://localhost:9090", in_cluster=False, config_file=None):
+                 prometheus_url="http://localhost:9090", in_cluster=False, config_file=None,
+                 k8s_client=None, monitoring=None, app_identifier=None, clock=None):
         self.app_name = app_name
         self.namespace = namespace
         self.mode = mode
         self.running = False
         self.iteration = 0
-        self.config = {}
-        if config_file and os.path.exists(config_file):
-            with open(config_file, 'r') as f:
-                self.config = yaml.safe_load(f)
-        self.k8s_client = KubernetesClient(namespace=namespace, in_cluster=in_cluster)
-        self.app_identifier = ApplicationIdentifier(self.k8s_client)
-        self.monitoring = PrometheusMonitoring(prometheus_url=prometheus_url, app_name=app_name, namespace=namespace)
+        self.config = load_config(config_file)
+        # Anything providing time() and sleep(); the simulator passes a virtual clock
+        self.clock = clock or time
+        if k8s_client is None:
+            from drone.kubernetes.client import KubernetesClient
+
+            k8s_client = KubernetesClient(namespace=namespace, in_cluster=in_cluster)
+        self.k8s_client = k8s_client
+        # Nodes are listed once, in the background, and shared by the action
+        # space and the resource enforcer; the first decision waits for it
+        self.capacity_index = ClusterCapacityIndex(self.k8s_client)
+        self.capacity_index.prefetch()
+        self.app_identifier = app_identifier or ApplicationIdentifier(self.k8s_client)
+        sampling = self.config.get("metrics", {}).get("sampling", {})
+        self.settle_time = sampling.get("settle_time", 30)
+        # In window mode the reward is aggregated over [actuation + settle, now],
+        # so the loop waits for an observation window after settling
+        self.observation_window = sampling.get("observation_window", 30) if sampling.get("mode") == "window" else 0
+        self.monitoring = monitoring or self._build_monitoring(prometheus_url, sampling)
+        self.metrics = OrchestratorMetrics(app_name, namespace=namespace, mode=mode)
+        instrumentation = self.config.get("instrumentation", {})
+        if instrumentation.get("port"):
+            start_metrics_server(instrumentation["port"], addr=instrumentation.get("address", "0.0.0.0"))
         if mode == "public":
             alpha = self.config.get("alpha", 0.5)
             beta = self.config.get("beta", 0.5)
             self.enforcer = ObjectiveEnforcer(alpha=alpha, beta=beta)
+            self.objective_enforcer = self.enforcer
         else:
             resource_limits = self.config.get("resource_limits", None)
-            self.enforcer = ResourceEnforcer(resource_limits=resource_limits, k8s_client=self.k8s_client)
-        self.build_action_space()
-        if mode == "public":
+            self.enforcer = ResourceEnforcer(resource_limits=resource_limits, k8s_client=self.k8s_client,
+                                             capacity_index=self.capacity_index)
+            # Only tracks the SLO; the private objective is performance alone
+            self.objective_enforcer = ObjectiveEnforcer()
+        # Other orchestrators in this process share the cluster limit through the allocator
+        self.budget = None
+        self.budget_key = f"{namespace}/{app_name}"
+        budget = self.config.get("budget", {})
+        if mode == "private" and budget.get("enabled", False):
+            from drone.utils.budget import get_shared_budget_allocator
+
+            self.budget = get_shared_budget_allocator("memory")
+            self.budget.register(self.budget_key, weight=budget.get("weight", 1.0))
+        # Either one target or one per application type
+        self.performance_targets = self.config.get("performance_target")
+        forecasting = self.config.get("forecasting", {})
+        self.forecaster = None
+        if forecasting.get("enabled", False):
+            self.forecaster = ContextForecaster(season_length=forecasting.get("season_length"),
+                                                alpha=forecasting.get("alpha", 0.5),
+                                                beta=forecasting.get("beta", 0.1),
+                                                gamma=forecasting.get("gamma", 0.1),
+                                                history_size=forecasting.get("history_size", 256))
+            self.forecast_horizon = forecasting.get("horizon", 1)
+            self.forecast_target = forecasting.get("target", "mean")
+        self.observed_context = None
+        # Action last applied to the deployment, which the switching gate compares against
+        self.current_action = None
+        # Callable telling whether this process still owns the application
+        # (set by the sharded controller); actuation stops once it is False
+        self.fence = None
+        self.switching_gate = None
+        self.pending_queue = None
+        fidelity = self.config.get("fidelity", {})
+        self.fidelity = None
+        if fidelity.get("enabled", False):
+            if fidelity.get("early_read", 15) < sampling.get("scrape_interval", 15):
+                raise ValueError(f"fidelity.early_read ({fidelity.get('early_read', 15)}s) is shorter than "
+                                 f"the scrape interval ({sampling.get('scrape_interval', 15)}s)")
+            self.fidelity = {"early_read": fidelity.get("early_read", 15),
+                             "early_noise": fidelity.get("early_noise", 4.0),
+                             "reject_probability": fidelity.get("reject_probability", 0.05)}
+        canary = self.config.get("canary", {})
+        self.canary = None
+        if canary.get("enabled", False):
+            self.canary = {"replicas": canary.get("replicas", 1), "noise": canary.get("noise", 2.0)}
+        delayed_rewards = self.config.get("delayed_rewards", {})
+        if delayed_rewards.get("enabled", False):
+            self.pending_queue = PendingObservationQueue(timeout=delayed_rewards.get("timeout", 6 * 3600),
+                                                         min_jobs=delayed_rewards.get("min_jobs", 1))
+        hysteresis = self.config.get("hysteresis", {})
+        if hysteresis.get("enabled", False):
+            from drone.core.algorithms.hysteresis import SwitchingCostGate
+
+            self.switching_gate = SwitchingCostGate(switching_cost=hysteresis.get("switching_cost", 0.0),
+                                                    warmup=hysteresis.get("warmup", 5))
+        self.prior_store = None
+        self.prior_key = None
+        self._action_space = None
+        self._zones = None
+        self._algorithm = None
+        self._cost_model = None
+        # Held while bandit histories grow, so checkpoint() from another thread reads them whole
+        self._history_lock = threading.Lock()
+        cost = self.config.get("cost", {})
+        self.spot_feed = None
+        if cost.get("spot_prices"):
+            from drone.utils.cost import SpotPriceFeed
+
+            self.spot_feed = SpotPriceFeed(cost["spot_prices"], ttl=cost.get("spot_ttl", 300), clock=self.clock)
+        trace = self.config.get("trace", {})
+        self.trace_writer = None
+        if trace.get("path"):
+            metadata = {"app": app_name, "namespace": namespace, "mode": mode}
+            if mode == "public":
+                # The normalized weights the bandit's reward is computed with
+                metadata["alpha"], metadata["beta"] = self.enforcer.get_weights()
+            self.trace_writer = TraceWriter(trace["path"], buffer_size=trace.get("buffer_size", 32),
+                                            max_bytes=trace.get("max_bytes", 64 * 1024 ** 2),
+                                            backups=trace.get("backups", 5),
+                                            metadata=metadata)
+
+    @property
+    def action_space(self):
+        if self._action_space is None:
+            self._build_model()
+        return self._action_space
+
+    @action_space.setter
+    def action_space(self, action_space):
+        self._action_space = action_space
+
+    @property
+    def zones(self):
+        if self._zones is None:
+            self._build_model()
+        return self._zones
+
+    @zones.setter
+    def zones(self, zones):
+        self._zones = zones
+
+    @property
+    def algorithm(self):
+        if self._algorithm is None:
+            self._build_model()
+        return self._algorithm
+
+    @algorithm.setter
+    def algorithm(self, algorithm):
+        self._algorithm = algorithm
+
+    @property
+    def cost_model(self):
+        if self._cost_model is None:
+            from drone.utils.cost import CostModel, DEFAULT_CPU_PRICE, DEFAULT_MEMORY_PRICE
+
+            cost = self.config.get("cost", {})
+            self._cost_model = CostModel(self.zones, cpu_price=cost.get("cpu_price", DEFAULT_CPU_PRICE),
+                                         memory_price=cost.get("memory_price", DEFAULT_MEMORY_PRICE),
+                                         zone_prices=cost.get("zones"),
+                                         instance_types=cost.get("instance_types"), spot_feed=self.spot_feed)
+        return self._cost_model
+
+    @cost_model.setter
+    def cost_model(self, cost_model):
+        self._cost_model = cost_model
+
+    def _build_model(self):
+        """Build the action space and bandit on first use, once the cluster is known."""
+        from drone.core.algorithms.public_cloud import PublicCloudBandit
+        from drone.core.algorithms.private_cloud import PrivateCloudBandit
+
+        if self._action_space is None:
+            self.build_action_space()
+        if self.trace_writer is not None:
+            self.trace_writer.action_space = self._action_space
+        if self._algorithm is not None:
+            return
+        gp_hyperparams = {"backend": self.config.get("gp_backend", "sklearn")}
+        if self.config.get("gp_dtype"):
+            gp_hyperparams["dtype"] = np.dtype(self.config["gp_dtype"])
+        window_size = self.config.get("sliding_window_size", 30)
+        changepoint = self.config.get("changepoint", {})
+        if changepoint.get("enabled", False):
+            gp_hyperparams.update(changepoint_threshold=changepoint.get("threshold", 5.0),
+                                  changepoint_drift=changepoint.get("drift", 0.5),
+                                  min_window_size=changepoint.get("min_window_size", 5))
+            window_size = changepoint.get("max_window_size", window_size)
+        fitting = self.config.get("gp_fitting", {})
+        if fitting.get("enabled", False):
+            from drone.core.models.fitting import get_shared_fitting_service
+
+            gp_hyperparams["fitting_service"] = get_shared_fitting_service(max_workers=fitting.get("processes"))
+        priors = self._load_priors()
+        exploration_duration = self.config.get("exploration_duration", 0 if self.mode == "public" else 10)
+        if priors:
+            # The transferred prior replaces most of the exploration
+            exploration_duration = min(exploration_duration,
+                                       self.config.get("priors", {}).get("exploration_duration", 2))
+        design = self.config.get("initial_design", "maximin")
+        if self.mode == "public":
             alpha, beta = self.enforcer.get_weights()
-            self.algorithm = PublicCloudBandit(action_space=self.action_space, alpha=alpha, beta=beta)
+            cost = self.config.get("cost", {})
+            prune_confidence = cost.get("prune_confidence", 2.0) if cost.get("prune_dominated", False) else None
+
+            def make_bandit():
+                return PublicCloudBandit(action_space=self._action_space, alpha=alpha, beta=beta,
+                                         sliding_window_size=window_size, gp_hyperparams=gp_hyperparams,
+                                         priors=priors, exploration_duration=exploration_duration,
+                                         design=design, prune_confidence=prune_confidence)
+        else:
+            p_max = self.get_resource_limit()
+            safe_size = max(1, int(len(self._action_space) * 0.1))
+            # Start from the actions with the smallest total footprint
+            footprint = (self._action_space[:, 0] / self._action_space[:, 0].max()
+                         + self._action_space[:, 1] / self._action_space[:, 1].max()) * self._action_space[:, 2]
+            initial_safe_set = self._action_space[np.argsort(footprint, kind="stable")[:safe_size]]
+
+            def make_bandit():
+                return PrivateCloudBandit(action_space=self._action_space, resource_limit=p_max,
+                                          initial_safe_set=initial_safe_set,
+                                          exploration_duration=exploration_duration,
+                                          sliding_window_size=window_size, gp_hyperparams=gp_hyperparams,
+                                          priors=priors, design=design)
+        regimes = self.config.get("regimes", {})
+        if regimes.get("enabled", False):
+            from drone.core.algorithms.regimes import RegimeBandit
+
+            self._algorithm = RegimeBandit(make_bandit, radius=regimes.get("radius", 1.5),
+                                           max_regimes=regimes.get("max_regimes", 8),
+                                           window=regimes.get("window", 50))
         else:
-            resource_limits = self.enforcer.get_absolute_limits()
-            memory_limit_bytes = resource_limits.get("memory", 8 * 1024 ** 3)
-            p_max = memory_limit_bytes / (1024 ** 3)
-            safe_size = max(1, int(len(self.action_space) * 0.1))
-            initial_safe_set = self.action_space[:safe_size]
-            self.algorithm = PrivateCloudBandit(action_space=self.action_space, resource_limit=p_max, 
-                                                initial_safe_set=initial_safe_set)
+            self._algorithm = make_bandit()
+
+    def _load_priors(self):
+        """Transfer priors of applications with the same characteristics, keyed by target."""
+        config = self.config.get("priors", {})
+        if not config.get("enabled", False):
+            return None
+        from drone.core.models.priors import get_shared_prior_store, prior_key
+
+        self.prior_store = get_shared_prior_store(config.get("path", "drone-priors.json"),
+                                                  max_points=config.get("max_points", 200))
+        characteristics = self.app_identifier.get_app_characteristics(self.app_name, self.namespace)
+        self.prior_key = prior_key(characteristics, self.mode)
+        if self.observed_context is None:
+            logger.warning("Context dimensions unknown, not loading transfer priors")
+            return None
+        dims = self._action_space.shape[1] + len(self.observed_context)
+        targets = ("reward",) if self.mode == "public" else ("performance", "resource")
+        priors = {}
+        for target in targets:
+            prior = self.prior_store.get(self.prior_key, target, dims,
+                                         exclude=f"{self.namespace}/{self.app_name}")
+            if prior is not None:
+                priors[target] = prior
+        if priors:
+            logger.info(f"Warm-starting from {self.prior_key} priors: "
+                        + ", ".join(f"{t} ({p.n} observations)" for t, p in priors.items()))
+        return priors
+
+    def save_priors(self):
+        """Record this application's observations in the shared prior store."""
+        if self.prior_store is None or self._algorithm is None:
+            return
+        app = f"{self.namespace}/{self.app_name}"
+        for target, (X, y, length_scale) in self._algorithm.get_observations().items():
+            self.prior_store.record(self.prior_key, target, app, X, y, length_scale)
+        try:
+            self.prior_store.save()
+        except OSError as e:
+            logger.error(f"Error saving prior store: {e}")
+
+    def _bandits(self):
+        """Bandits of every context regime, or the single bandit."""
+        bandits = getattr(self._algorithm, "bandits", None)
+        return list(bandits.values()) if bandits is not None else [self._algorithm]
+
+    def checkpoint(self):
+        """State another process needs to continue optimizing this application.
+
+        Observations are kept rather than models, which restore() rebuilds
+        from them; rewards still pending are not carried over.
+        """
+        if self._algorithm is None:
+            return None
+        observations = []
+        with self._history_lock:
+            for bandit in self._bandits():
+                history = bandit.history
+                second = history["costs"] if "costs" in history else history["resource_usage"]
+                for action, context, performance, observation in zip(history["actions"], history["contexts"],
+                                                                     history["performance"], second):
+                    observations.append([np.asarray(action).tolist(), np.asarray(context).tolist(),
+                                         float(performance), float(observation)])
+        return {"app": self.app_name, "namespace": self.namespace, "mode": self.mode,
+                "action_space": self._action_space.tolist(), "zones": self._zones,
+                "current_action": None if self.current_action is None else self.current_action.tolist(),
+                "observations": observations}
+
+    def restore(self, state):
+        """Continue from a checkpoint() of this application taken by another process."""
+        if state["mode"] != self.mode:
+            raise ValueError(f"Checkpoint of a {state['mode']} orchestrator cannot restore a {self.mode} one")
+        observations = state["observations"]
+        self._action_space = np.array(state["action_space"])
+        self._zones = state["zones"]
+        self._algorithm = None
+        self._cost_model = None
+        if observations:
+            self.observed_context = np.array(observations[-1][1])
+        self._build_model()
+        for action, context, performance, observation in observations:
+            self._algorithm.update(np.array(action), np.array(context), performance, observation)
+        if state.get("current_action") is not None:
+            self.current_action = np.array(state["current_action"])
+        logger.info(f"Restored {self.namespace}/{self.app_name} from a checkpoint with "
+                    f"{len(observations)} observations")
+
+    def _build_monitoring(self, prometheus_url, sampling):
+        cache_config = self.config.get("context_cache")
+        context_cache = None
+        if cache_config:
+            from drone.utils.context_cache import get_shared_context_cache
+
+            context_cache = get_shared_context_cache(ttl=cache_config.get("ttl", 15),
+                                                     socket_path=cache_config.get("socket"))
+        monitoring = PrometheusMonitoring(prometheus_url=prometheus_url, app_name=self.app_name,
+                                          namespace=self.namespace,
+                                          sampling_mode=sampling.get("mode", "instant"),
+                                          settle_time=self.settle_time, step=sampling.get("step", 5),
+                                          rate_window=sampling.get("rate_window"),
+                                          aggregate=sampling.get("aggregate", "mean"),
+                                          context_cache=context_cache)
+        ingestion = self.config.get("ingestion", {})
+        if ingestion.get("enabled", False):
+            from drone.utils.ingestion import PushMonitoring, get_shared_ingestion_server
+
+            # Pushed samples are read directly; Prometheus only fills in series nobody pushes
+            server = get_shared_ingestion_server(host=ingestion.get("host", "0.0.0.0"),
+                                                 port=ingestion.get("port", 9091),
+                                                 capacity=ingestion.get("capacity", 1024))
+            monitoring = PushMonitoring(server.store, app_name=self.app_name, namespace=self.namespace,
+                                        settle_time=self.settle_time,
+                                        max_age=ingestion.get("max_age", 120),
+                                        aggregate=sampling.get("aggregate", "mean"),
+                                        fallback=monitoring)
+        return monitoring
+
+    def _cluster_resource_limit(self):
+        resource_limits = self.enforcer.get_absolute_limits()
+        memory_limit_bytes = resource_limits.get("memory", 8 * 1024 ** 3)
+        return memory_limit_bytes / (1024 ** 3)
+
+    def get_resource_limit(self):
+        limit = self._cluster_resource_limit()
+        if self.budget is not None:
+            return self.budget.limit_for(self.budget_key, limit)
+        return limit
+
+    def _report_demand(self, action, context):
+        """Report the resource upper bound of the action the bandit would pick without its budget share.
+
+        The deployed action fits the share it was picked under, so reporting
+        its usage would keep an application from ever claiming more. During
+        exploration, or if nothing is safe even under the whole limit, the
+        deployed `action` is reported.
+        """
+        if self.algorithm.t > self.algorithm.exploration_duration:
+            preferred = self.algorithm.best_action(context, self._cluster_resource_limit())
+            if preferred is not None:
+                action = preferred
+        X = np.array([np.concatenate([action, context])])
+        mean, std = self.algorithm.resource_gp.predict(X)
+        confidence = self.config.get("budget", {}).get("confidence", 2.0)
+        self.budget.report(self.budget_key, float(mean[0] + confidence * std[0]))
 
     def build_action_space(self):
-        nodes = self.k8s_client.get_nodes()
-        zone_labels = {}
-        for node in nodes:
-            if "labels" in node and "zone" in node["labels"]:
-                zone = node["labels"]["zone"]
-                if zone not in zone_labels:
-                    zone_labels[zone] = []
-                zone_labels[zone].append(node["name"])
+        zone_labels = self.capacity_index.get_zones()
         if not zone_labels:
-            zone_labels = {"zone-1": [node["name"] for node in nodes]}
+            zone_labels = {"zone-1": []}
         self.zones = zone_labels
         num_zones = len(zone_labels)
         cpu_values = np.linspace(0.1, 4.0, 10)
         memory_values = np.array([128, 256, 512, 1024, 2048, 4096, 8192])
         replica_values = np.array([1, 2, 3, 4, 5])
         scheduling_values = np.array([0, 1, 2])
+        # Drop per-replica sizes that no node could schedule
+        largest_node = self.capacity_index.get_max_node()
+        if largest_node["cpu"] > 0 and np.any(cpu_values <= largest_node["cpu"]):
+            cpu_values = cpu_values[cpu_values <= largest_node["cpu"]]
+        if largest_node["memory"] > 0 and np.any(memory_values * MIB <= largest_node["memory"]):
+            memory_values = memory_values[memory_values * MIB <= largest_node["memory"]]
         action_space = []
         num_actions = 100
         for _ in range(num_actions):
@@ -105,17 +463,13 @@ class DroneOrchestrator:
         return {"cpu": cpu, "memory": memory_str, "replicas": replicas, "node_affinities": node_affinities}
 
     def parameters_to_action(self, params):
-        cpu = params.get("cpu", 0.5)
-        memory_str = params.get("memory", "512Mi")
+        cpu = parse_cpu(params.get("cpu", 0.5), default=0.5)
+        memory = params.get("memory", "512Mi")
         try:
-            if memory_str.endswith('Mi'):
-                memory = float(memory_str[:-2])
-            elif memory_str.endswith('Gi'):
-                memory = float(memory_str[:-2]) * 1024
-            else:
-                memory = float(memory_str)
-        except (ValueError, AttributeError):
-            memory = 512
+            # Bare numbers are MiB, the unit of the action space
+            memory = float(memory)
+        except (TypeError, ValueError):
+            memory = parse_memory(memory, default=512 * MIB) / MIB
         replicas = params.get("replicas", 1)
         node_affinities = params.get("node_affinities", {})
         num_zones = len(self.zones)
@@ -131,71 +485,334 @@ class DroneOrchestrator:
         context_dict = self.monitoring.get_context()
         context = np.array([context_dict.get("workload", 0.0), context_dict.get("cpu_util", 0.0),
                            context_dict.get("mem_util", 0.0), context_dict.get("net_util", 0.0)])
-        if self.mode == "public" and "spot_price" in context_dict:
+        if self.mode == "public" and self.spot_feed is not None:
+            if self._action_space is None:
+                # Average over the cluster's zones, not every zone the feed knows
+                self.build_action_space()
+            context = np.append(context, self.spot_feed.mean(self._zones))
+        elif self.mode == "public" and "spot_price" in context_dict:
             context = np.append(context, context_dict["spot_price"])
+        self.observed_context = context
+        if self.forecaster is not None:
+            # The action only takes effect after settling and then runs for a whole
+            # interval, so condition the bandit on the forecast for that period
+            self.forecaster.update(context)
+            if self.forecaster.is_ready():
+                mean, peak = self.forecaster.forecast(self.forecast_horizon)
+                context = peak if self.forecast_target == "peak" else mean
         return context
 
     def calculate_cost(self, action, context):
-        cpu = action[0]
-        memory = action[1]
-        replicas = int(action[2])
-        cpu_cost = cpu * 0.0425
-        memory_cost = (memory / 1024) * 0.00575
-        cost = (cpu_cost + memory_cost) * replicas
-        if self.mode == "public" and len(context) >= 5:
-            spot_price = context[4]
-            cost = cost * spot_price
-        return cost
+        return self.cost_model.cost(action, context if self.mode == "public" else None)
 
     def orchestrate_once(self):
         self.iteration += 1
+        started = time.perf_counter()
+        self.metrics.start_iteration()
         logger.info(f"Starting orchestration iteration {self.iteration}")
-        context = self.get_context()
+        with self.metrics.phase("context_fetch"):
+            context = self.get_context()
+            app_type = self.app_identifier.identify_app_type(self.app_name)
         logger.debug(f"Current context: {context}")
-        if self.iteration == 1:
-            current_resources = self.k8s_client.get_current_resources(self.app_name)
-            if current_resources:
-                action = self.parameters_to_action(current_resources)
-                logger.info(f"Using current configuration for first iteration: {current_resources}")
+        # Job times of batch applications arrive when their jobs complete
+        delayed = self.pending_queue is not None and app_type == "batch"
+        target = self.performance_targets
+        if isinstance(target, dict):
+            target = target.get(app_type)
+        self.objective_enforcer.performance_target = target
+        if self.mode == "private":
+            # Node events may have changed the cluster-wide budget
+            self.algorithm.resource_limit = self.get_resource_limit()
+        else:
+            # Spot prices move, so the whole action space is repriced every iteration
+            self.algorithm.action_costs = self.cost_model.costs(self.action_space, context)
+        with self.metrics.phase("acquisition"):
+            if self.iteration == 1:
+                current_resources = self.k8s_client.get_current_resources(self.app_name)
+                if current_resources:
+                    action = self.parameters_to_action(current_resources)
+                    self.current_action = action
+                    logger.info(f"Using current configuration for first iteration: {current_resources}")
+                else:
+                    action = self.algorithm.select_action(context)
+                    logger.info("No current configuration found, selecting new action")
             else:
                 action = self.algorithm.select_action(context)
-                logger.info("No current configuration found, selecting new action")
-        else:
-            action = self.algorithm.select_action(context)
+            actuate, switch_gain = True, None
+            if self.switching_gate is not None:
+                actuate, switch_gain = self.switching_gate.should_switch(self.algorithm, action,
+                                                                         self.current_action, context)
+                if not actuate:
+                    action = self.current_action
         params = self.action_to_parameters(action)
-        logger.info(f"Selected resource parameters: {params}")
-        success = self.k8s_client.apply_resource_action(app_name=self.app_name, cpu=params["cpu"],
-                                                         memory=params["memory"], replicas=params["replicas"],
-                                                         node_affinities=params["node_affinities"])
-        if not success:
-            logger.warning("Failed to apply resource action")
-        time.sleep(30)
-        perf_metrics = self.monitoring.get_performance_metrics()
-        resource_usage = self.monitoring.get_resource_usage()
-        app_type = self.app_identifier.identify_app_type(self.app_name)
-        if app_type == "microservice":
-            performance = perf_metrics.get("p90_latency", 0.0)
-            performance = -performance
+        incumbent = self.current_action
+        early = None
+        if actuate:
+            if self.fence is not None and not self.fence():
+                raise OwnershipLost(f"{self.namespace}/{self.app_name} is no longer owned by this controller")
+            logger.info(f"Selected resource parameters: {params}")
+            if (self.canary is not None and not delayed and incumbent is not None
+                    and self.monitoring.canary_metrics and hasattr(self.k8s_client, "apply_canary")):
+                result = self._canary_iteration(action, incumbent, context, app_type)
+                if result is not None:
+                    return self._finish_iteration(result, started, [result.pop("baseline")])
+            with self.metrics.phase("actuation"):
+                success = self.k8s_client.apply_resource_action(app_name=self.app_name, cpu=params["cpu"],
+                                                                 memory=params["memory"],
+                                                                 replicas=params["replicas"],
+                                                                 node_affinities=params["node_affinities"])
+            if success:
+                self.current_action = action
+            else:
+                logger.warning("Failed to apply resource action")
+                self.metrics.failed_actuation()
+            self.monitoring.mark_actuation(self.clock.time())
+            wait = self.settle_time + self.observation_window
+            if (self.fidelity is not None and not delayed and incumbent is not None
+                    and self.monitoring.early_metrics and self.fidelity["early_read"] < wait
+                    and getattr(self.algorithm, "t", 0) > getattr(self.algorithm, "exploration_duration", 0)):
+                with self.metrics.phase("settle_wait"):
+                    self.clock.sleep(self.fidelity["early_read"])
+                early = self._early_read(action, incumbent, context, app_type)
+                wait -= self.fidelity["early_read"]
+            if early is None or not early["abandoned"]:
+                with self.metrics.phase("settle_wait"):
+                    self.clock.sleep(wait)
         else:
-            performance = perf_metrics.get("job_time", 0.0)
-            performance = -performance
+            logger.info(f"Keeping resource parameters {params}, expected improvement {switch_gain:.4g} "
+                        f"is within the switching cost")
+            self.metrics.skipped_actuation()
+            # Nothing to settle: the observation window starts now
+            self.monitoring.mark_actuation(self.clock.time() - self.settle_time)
+            with self.metrics.phase("settle_wait"):
+                self.clock.sleep(self.observation_window)
+        if early is not None and early["abandoned"]:
+            return self._finish_iteration(early, started)
+        with self.metrics.phase("metric_collection"):
+            perf_metrics = {} if delayed else self.monitoring.get_performance_metrics()
+            resource_usage = self.monitoring.get_resource_usage()
+        performance = self._performance(perf_metrics, app_type)
 
         cost = self.calculate_cost(action, context)
+        # Posterior the decision was based on, before this observation is added
+        posterior_mean, posterior_std = self.algorithm.predict(action, context)
+        if early is not None:
+            posterior_mean, posterior_std = early["posterior_mean"], early["posterior_std"]
+        memory_bytes = resource_usage.get("memory", 0.0)
+        resource_value = memory_bytes / (1024 ** 3)
+        resolved = []
+        with self.metrics.phase("gp_fit"):
+            if delayed:
+                self.pending_queue.add(self.iteration, action, context, start=self.monitoring.actuation_time,
+                                       cost=cost, resource=resource_value)
+                resolved = self._resolve_pending()
+                # This iteration's own observation is pending; resolved ones are traced separately
+                performance, reward, is_safe = np.nan, np.nan, True
+            else:
+                performance, reward, is_safe = self._observe(action, context, performance, cost, resource_value)
+            if self.budget is not None:
+                self._report_demand(action, context)
+        headroom = None
+        if np.isfinite(performance):
+            headroom = self.objective_enforcer.get_performance_headroom(-performance)
+        elif resolved:
+            headroom = self.objective_enforcer.get_performance_headroom(-resolved[-1]["performance"])
+        result = {"iteration": self.iteration, "action": action, "params": params, "context": context,
+                  "observed_context": self.observed_context,
+                  "performance": performance, "cost": cost, "reward": reward, "is_safe": is_safe,
+                  "resource": resource_value, "posterior_mean": posterior_mean, "posterior_std": posterior_std,
+                  "headroom": headroom, "actuated": actuate, "switch_gain": switch_gain,
+                  "pending": len(self.pending_queue) if delayed else 0, "resolved": len(resolved),
+                  "early_read": early is not None, "abandoned": False}
+        return self._finish_iteration(result, started, resolved)
+
+    def _performance(self, perf_metrics, app_type):
+        # Higher is better: the negated latency or job time
+        if app_type == "microservice":
+            return -perf_metrics.get("p90_latency", 0.0)
+        return -perf_metrics.get("job_time", 0.0)
+
+    def _observe(self, action, context, performance, cost, resource_value, noise=None, algorithm=None):
+        """Update the bandit (or `algorithm`); returns (performance, reward, is_safe)."""
+        algorithm = algorithm or self.algorithm
+        with self._history_lock:
+            if self.mode == "public":
+                reward = algorithm.update(action, context, performance, cost, noise=noise)
+                return performance, reward, True
+            performance, is_safe = algorithm.update(action, context, performance, resource_value, noise=noise)
+        return performance, performance, is_safe
+
+    def _early_read(self, action, incumbent, context, app_type):
+        """Read a new action shortly after it was applied; abandon it if it is unsafe or unlikely to improve."""
+        with self.metrics.phase("metric_collection"):
+            readings = self.monitoring.get_early_metrics()
+        if readings is None:
+            return None
+        posterior_mean, posterior_std = self.algorithm.predict(action, context)
+        performance = self._performance(readings[0], app_type)
+        resource_value = readings[1].get("memory", 0.0) / (1024 ** 3)
+        cost = self.calculate_cost(action, context)
+        observation = cost if self.mode == "public" else resource_value
+        is_safe = self.mode == "public" or resource_value <= self.algorithm.resource_limit
+        means, stds = self.algorithm.predict_given(action, context, performance, observation,
+                                                   np.array([action, incumbent]),
+                                                   noise=self.fidelity["early_noise"])
+        mean, std, incumbent_mean = means[0], stds[0], means[1]
+        # P(f(action) > posterior mean of the incumbent)
+        improvement = 0.5 * math.erfc((incumbent_mean - mean) / (max(std, 1e-12) * math.sqrt(2)))
+        abandoned = not is_safe or improvement < self.fidelity["reject_probability"]
+        reward = np.nan
+        if abandoned:
+            logger.info(f"Abandoning action after a {self.fidelity['early_read']}s read: probability of "
+                        f"improvement {improvement:.3f}, safe {is_safe}")
+            self.metrics.abandoned_action()
+            with self.metrics.phase("gp_fit"):
+                performance, reward, is_safe = self._observe(action, context, performance, cost, resource_value,
+                                                             noise=self.fidelity["early_noise"])
+        return {"iteration": self.iteration, "action": action, "params": self.action_to_parameters(action),
+                "context": context, "observed_context": self.observed_context, "performance": performance,
+                "cost": cost, "reward": reward, "is_safe": is_safe, "resource": resource_value,
+                "posterior_mean": posterior_mean, "posterior_std": posterior_std,
+                "headroom": self.objective_enforcer.get_performance_headroom(-performance), "actuated": True,
+                "switch_gain": None, "pending": 0, "resolved": 0, "early_read": True,
+                "probability_of_improvement": improvement, "abandoned": abandoned}
+
+    def _canary_iteration(self, action, incumbent, context, app_type):
+        """Evaluate `action` on a canary beside the deployed incumbent; promote it if it wins.
+
+        Returns None if no canary could be evaluated, so that the action is rolled out.
+        """
+        params = self.action_to_parameters(action)
+        replicas = self.canary["replicas"]
+        posterior_mean, posterior_std = self.algorithm.predict(action, context)
+        with self.metrics.phase("actuation"):
+            applied = self.k8s_client.apply_canary(self.app_name, cpu=params["cpu"], memory=params["memory"],
+                                                   replicas=replicas, node_affinities=params["node_affinities"])
+        if not applied:
+            logger.warning("Failed to apply canary, rolling the action out instead")
+            return None
+        self.monitoring.mark_actuation(self.clock.time())
+        with self.metrics.phase("settle_wait"):
+            self.clock.sleep(self.settle_time + self.observation_window)
+        with self.metrics.phase("metric_collection"):
+            readings = self.monitoring.get_canary_metrics(self.k8s_client.canary_name(self.app_name))
+        self.k8s_client.delete_canary(self.app_name)
+        if readings is None:
+            logger.warning("No canary readings, rolling the action out instead")
+            return None
+        canary, stable = readings
+        pods = incumbent[2] + replicas
+        canary_context, stable_context = np.array(context, dtype=float), np.array(context, dtype=float)
+        canary_context[0] = context[0] * action[2] / pods
+        stable_context[0] = context[0] * incumbent[2] / pods
+        cost = self.calculate_cost(action, context)
+        incumbent_cost = self.calculate_cost(incumbent, context)
+        resource_value = canary.get("memory", 0.0) / replicas * action[2] / (1024 ** 3)
+        stable_resource = stable.get("memory", 0.0) / (1024 ** 3)
+        bandit_for = getattr(self.algorithm, "bandit_for", None)
+        bandit = bandit_for(context, update=True) if bandit_for is not None else self.algorithm
+        with self.metrics.phase("gp_fit"):
+            performance, reward, is_safe = self._observe(action, canary_context, self._performance(canary, app_type),
+                                                         cost, resource_value, noise=self.canary["noise"],
+                                                         algorithm=bandit)
+            baseline, baseline_reward, baseline_safe = self._observe(incumbent, stable_context,
+                                                                     self._performance(stable, app_type),
+                                                                     incumbent_cost, stable_resource,
+                                                                     algorithm=bandit)
+        promoted = bool(is_safe and reward > baseline_reward)
+        if promoted:
+            logger.info(f"Promoting canary: reward {reward:.4g} over {baseline_reward:.4g}")
+            with self.metrics.phase("actuation"):
+                success = self.k8s_client.apply_resource_action(app_name=self.app_name, cpu=params["cpu"],
+                                                                 memory=params["memory"],
+                                                                 replicas=params["replicas"],
+                                                                 node_affinities=params["node_affinities"])
+            if success:
+                self.current_action = action
+                self.monitoring.mark_actuation(self.clock.time())
+            else:
+                logger.warning("Failed to promote canary")
+                self.metrics.failed_actuation()
+                promoted = False
+        else:
+            logger.info(f"Keeping deployed configuration: canary reward {reward:.4g}, "
+                        f"deployed {baseline_reward:.4g}, safe {is_safe}")
+        self.metrics.canary_evaluated(promoted)
+        if self.budget is not None:
+            self._report_demand(self.current_action, context)
+        return {"iteration": self.iteration, "action": action, "params": params, "context": canary_context,
+                "observed_context": self.observed_context, "performance": performance, "cost": cost,
+                "reward": reward, "is_safe": is_safe, "resource": resource_value,
+                "posterior_mean": posterior_mean, "posterior_std": posterior_std,
+                "headroom": self.objective_enforcer.get_performance_headroom(-baseline), "actuated": promoted,
+                "switch_gain": None, "pending": 0, "resolved": 0, "early_read": False, "abandoned": False,
+                "canary": True, "promoted": promoted, "baseline_performance": baseline,
+                "baseline": {"iteration": self.iteration, "action": incumbent, "context": stable_context,
+                             "performance": baseline, "cost": incumbent_cost, "reward": baseline_reward,
+                             "is_safe": baseline_safe, "resource": stable_resource}}
+
+    def _finish_iteration(self, result, started, resolved=()):
+        result["timings"] = dict(self.metrics.last_timings)
+        result["samples"] = self.monitoring.get_aggregates()
+        self._record_metrics(result, time.perf_counter() - started)
+        if self.trace_writer is not None:
+            self.trace_writer.append(result, timings=result["timings"], timestamp=self.clock.time())
+            for observation in resolved:
+                self.trace_writer.append(observation, timestamp=self.clock.time())
+        save_every = self.config.get("priors", {}).get("save_every", 10)
+        if self.prior_store is not None and save_every and self.iteration % save_every == 0:
+            self.save_priors()
+        return result
+
+    def _resolve_pending(self):
+        """Update the bandit with pending observations whose jobs have completed.
+
+        Returns one result per resolved observation, for its own iteration.
+        The remaining pending actions are handed to the bandit so that new
+        selections account for them.
+        """
+        jobs = self.k8s_client.get_completed_jobs(self.app_name, since=self.pending_queue.since)
+        results = []
+        for entry in self.pending_queue.resolve(jobs, self.clock.time()):
+            performance, reward, is_safe = self._observe(entry["action"], entry["context"],
+                                                         -float(np.mean(entry["durations"])), entry["cost"],
+                                                         entry["resource"])
+            logger.info(f"Resolved iteration {entry['iteration']} from {len(entry['durations'])} jobs: "
+                        f"performance {performance:.4f}")
+            results.append({"iteration": entry["iteration"], "action": entry["action"], "context": entry["context"],
+                            "performance": performance, "cost": entry["cost"], "reward": reward,
+                            "is_safe": is_safe, "resource": entry["resource"]})
+        pending = self.pending_queue.entries
+        self.algorithm.set_pending(np.array([entry["action"] for entry in pending]),
+                                   np.array([entry["context"] for entry in pending]))
+        return results
+
+    def _record_metrics(self, result, duration):
         if self.mode == "public":
-            reward = self.algorithm.update(action, context, performance, cost)
-            is_safe = True
+            gp, safe_set_size = self.algorithm.gp_model, len(self.action_space)
         else:
-            memory_bytes = resource_usage.get("memory", 0.0)
-            resource_value = memory_bytes / (1024 ** 3)
-            performance, is_safe = self.algorithm.update(action, context, performance, resource_value)
-            reward = performance
-        return {"iteration": self.iteration, "action": action, "params": params, "context": context,
-                "performance": performance, "cost": cost, "reward": reward, "is_safe": is_safe}
+            gp, safe_set_size = self.algorithm.performance_gp, len(self.algorithm.safe_set)
+        window_size = len(gp.y) if gp.y is not None else 0
+        self.metrics.record_iteration(result, window_size, safe_set_size, duration)
+        # Each regime's GP detects its own change points
+        gp_name = "gp_model" if self.mode == "public" else "performance_gp"
+        self.metrics.sync_changepoints(sum(getattr(bandit, gp_name).changepoints for bandit in self._bandits()))
+        self.metrics.sync_prometheus_errors(getattr(self.monitoring, "error_count", 0))
 
     def start(self, iterations=None, interval=60):
         self.running = True
         self.iteration = 0
         logger.info(f"Starting Drone Orchestrator for {self.app_name} in {self.mode} mode")
+        scheduler = None
+        scheduling = self.config.get("scheduler", {})
+        if scheduling.get("enabled", False):
+            scheduler = AdaptiveIntervalScheduler(
+                base_interval=interval, min_interval=scheduling.get("min_interval", 15),
+                max_interval=scheduling.get("max_interval", 600), growth=scheduling.get("growth", 1.5),
+                uncertainty_threshold=scheduling.get("uncertainty_threshold", 0.5),
+                volatility_threshold=scheduling.get("volatility_threshold", 0.2),
+                headroom_threshold=scheduling.get("headroom_threshold", 0.1))
+        self.capacity_index.start_watch()
         try:
             while self.running:
                 result = self.orchestrate_once()
@@ -204,15 +821,31 @@ class DroneOrchestrator:
                     self.running = False
                     break
                 if self.running:
-                    logger.info(f"Waiting {interval} seconds until next iteration")
-                    time.sleep(interval)
+                    wait = scheduler.next_interval(result, result["headroom"]) if scheduler else interval
+                    if result.get("abandoned"):
+                        # Replace the abandoned action right away
+                        wait = 0
+                    self.metrics.set_interval(wait)
+                    logger.info(f"Waiting {wait:.0f} seconds until next iteration")
+                    self.clock.sleep(wait)
         except KeyboardInterrupt:
             logger.info("Orchestration interrupted by user")
             self.running = False
+        except OwnershipLost as e:
+            logger.warning(f"{e}, stopping")
+            self.running = False
         except Exception as e:
             logger.error(f"Error in orchestration: {e}")
             self.running = False
         finally:
+            self.capacity_index.stop_watch()
+            if self.canary is not None and hasattr(self.k8s_client, "delete_canary"):
+                self.k8s_client.delete_canary(self.app_name)
+            self.save_priors()
+            if self.budget is not None:
+                self.budget.unregister(self.budget_key)
+            if self.trace_writer is not None:
+                self.trace_writer.close()
             logger.info("Drone Orchestrator stopped")
 
     def stop(self):
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""Recommendation server: named Drone bandits for autoscalers that actuate themselves.
+
+    POST   /models/<name>          {"mode": "public", "action_space": [[...], ...], "params": {...}}
+    POST   /models/<name>/select   {"context": [...]}   -> {"action": [...]}
+    POST   /models/<name>/observe  {"action": [...], "context": [...], "performance": ..., "cost": ...}
+    DELETE /models/<name>
+    GET    /models
+
+Private models observe "resource" instead of "cost"; socket requests are
+JSON lines {"op": "create" | "select" | ..., "model": <name>, ...}.
+
+    python -m drone.server --port 8080 --socket /tmp/drone.sock
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class RequestError(ValueError):
+    """Invalid request; reported to the client rather than logged as a failure."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+_STOP = object()
+
+
+def _number(request, key):
+    """`request[key]` as a float, or a RequestError naming the field."""
+    try:
+        return float(request[key])
+    except (TypeError, ValueError):
+        raise RequestError(f"{key} must be a number, got {request[key]!r}")
+
+
+def _vector(values, key):
+    try:
+        return np.asarray(values, dtype=float).ravel()
+    except (TypeError, ValueError):
+        raise RequestError(f"{key} must be a list of numbers")
+
+
+class MicroBatcher:
+    """Coalesces concurrent calls into batches handled by one worker thread.
+
+    Requests that arrive while a batch is being computed are taken together
+    as the next batch, up to `max_batch`. With `max_delay` the worker also
+    waits that long after the first request of a batch for more to arrive.
+    stop() ends the worker once the requests queued before it are handled.
+    """
+
+    def __init__(self, handler, max_batch=256, max_delay=0.0, name="drone-batcher"):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.name = name
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def submit(self, item):
+        future = Future()
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError(f"{self.name} is stopped")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._queue.put((item, future))
+        return future.result()
+
+    def stop(self):
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            if self._thread is not None:
+                self._queue.put((_STOP, None))
+
+    def _take(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch and batch[-1][0] is not _STOP:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            stopping = batch[-1][0] is _STOP
+            if stopping:
+                batch.pop()
+            if not batch:
+                return
+            self.batches += 1
+            self.requests += len(batch)
+            try:
+                results = self.handler([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            if stopping:
+                return
+
+
+def build_bandit(spec):
+    """Bandit described by a create request."""
+    from drone.core.algorithms import PrivateCloudBandit, PublicCloudBandit
+
+    mode = spec.get("mode", "public")
+    if "action_space" not in spec:
+        raise RequestError("action_space is required")
+    action_space = np.atleast_2d(np.asarray(spec["action_space"], dtype=float))
+    params = dict(spec.get("params") or {})
+    try:
+        if mode == "public":
+            bandit = PublicCloudBandit(action_space, gp_hyperparams=spec.get("gp"), **params)
+            if spec.get("action_costs") is not None:
+                action_costs = np.asarray(spec["action_costs"], dtype=float).ravel()
+                if len(action_costs) != len(action_space):
+                    raise RequestError(f"action_costs has {len(action_costs)} values "
+                                       f"for {len(action_space)} actions")
+                bandit.action_costs = action_costs
+            return bandit
+        if mode == "private":
+            if "resource_limit" not in spec:
+                raise RequestError("resource_limit is required for private models")
+            initial_safe_set = spec.get("initial_safe_set")
+            if initial_safe_set is not None:
+                initial_safe_set = np.atleast_2d(np.asarray(initial_safe_set, dtype=float))
+            return PrivateCloudBandit(action_space, resource_limit=_number(spec, "resource_limit"),
+                                      initial_safe_set=initial_safe_set, gp_hyperparams=spec.get("gp"), **params)
+    except TypeError as e:
+        raise RequestError(f"Invalid model parameters: {e}")
+    raise RequestError(f"Unknown mode {mode!r}, expected 'public' or 'private'")
+
+
+class HostedModel:
+    """A bandit with its lock and select batcher.
+
+    Batched selections and observations hold the model lock, so a GP is
+    never read while its window is being refitted.
+    """
+
+    def __init__(self, name, bandit, mode, max_batch=256, max_delay=0.0, context_dim=None):
+        self.name = name
+        self.bandit = bandit
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.batcher = MicroBatcher(self._select_batch, max_batch=max_batch, max_delay=max_delay,
+                                    name=f"drone-select-{name}")
+        # Context length, fixed at creation or by the first request, so that
+        # one malformed context cannot fail a whole batch
+        self.dims = context_dim
+        self._dims_lock = threading.Lock()
+
+    def _context(self, context):
+        context = _vector(context, "context")
+        with self._dims_lock:
+            if self.dims is None:
+                self.dims = len(context)
+        if len(context) != self.dims:
+            raise RequestError(f"Model {self.name} expects contexts of {self.dims} values, got {len(context)}")
+        return context
+
+    def _select_batch(self, contexts):
+        with self.lock:
+            return self.bandit.select_actions(np.vstack(contexts))
+
+    def select(self, context):
+        return self.batcher.submit(self._context(context))
+
+    def observe(self, action, context, *observations):
+        action = _vector(action, "action")
+        if len(action) != self.bandit.action_space.shape[1]:
+            raise RequestError(f"Model {self.name} expects actions of "
+                               f"{self.bandit.action_space.shape[1]} values, got {len(action)}")
+        context = self._context(context)
+        with self.lock:
+            return self.bandit.update(action, context, *observations)
+
+    def close(self):
+        self.batcher.stop()
+
+    def describe(self):
+        return {"name": self.name, "mode": self.mode, "actions": len(self.bandit.action_space),
+                "observations": len(self.bandit.history["actions"]), "t": self.bandit.t,
+                "batches": self.batcher.batches, "selects": self.batcher.requests}
+
+
+class RecommendationService:
+    """Registry of hosted models and the operations shared by both transports."""
+
+    def __init__(self, max_batch=256, max_delay=0.0):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.models = {}
+        self._lock = threading.Lock()
+
+    def _model(self, name):
+        model = self.models.get(name)
+        if model is None:
+            raise RequestError(f"Unknown model {name!r}", status=404)
+        return model
+
+    def create(self, name, spec):
+        bandit = build_bandit(spec)
+        context_dim = spec.get("context_dim")
+        if context_dim is not None and (not isinstance(context_dim, int) or context_dim < 1):
+            raise RequestError(f"context_dim must be a positive integer, got {context_dim!r}")
+        with self._lock:
+            if name in self.models and not spec.get("replace"):
+                raise RequestError(f"Model {name!r} already exists", status=409)
+            replaced = self.models.get(name)
+            self.models[name] = HostedModel(name, bandit, spec.get("mode", "public"), max_batch=self.max_batch,
+                                            max_delay=self.max_delay, context_dim=context_dim)
+        if replaced is not None:
+            replaced.close()
+        logger.info(f"Created {spec.get('mode', 'public')} model {name} with {len(bandit.action_space)} actions")
+        return self.models[name].describe()
+
+    def delete(self, name):
+        with self._lock:
+            model = self._model(name)
+            del self.models[name]
+        model.close()
+        return {"deleted": name}
+
+    def select(self, name, request):
+        if "context" not in request:
+            raise RequestError("context is required")
+        action = self._model(name).select(request["context"])
+        return {"action": action.tolist()}
+
+    def observe(self, name, request):
+        model = self._model(name)
+        for key in ("action", "context", "performance"):
+            if key not in request:
+                raise RequestError(f"{key} is required")
+        performance = _number(request, "performance")
+        if model.mode == "private":
+            if "resource" not in request:
+                raise RequestError("resource is required for private models")
+            performance, is_safe = model.observe(request["action"], request["context"], performance,
+                                                 _number(request, "resource"))
+            return {"performance": float(performance), "safe": bool(is_safe)}
+        if "cost" not in request:
+            raise RequestError("cost is required for public models")
+        reward = model.observe(request["action"], request["context"], performance, _number(request, "cost"))
+        return {"reward": float(reward)}
+
+    def list(self):
+        return {"models": [model.describe() for model in list(self.models.values())]}
+
+    def handle(self, request):
+        """Dispatch a socket request {"op": ..., "model": ..., ...}."""
+        op = request.get("op")
+        name = request.get("model")
+        if op == "list":
+            return self.list()
+        if name is None:
+            raise RequestError("model is required")
+        if op == "create":
+            return self.create(name, request)
+        if op == "select":
+            return self.select(name, request)
+        if op == "observe":
+            return self.observe(name, request)
+        if op == "delete":
+            return self.delete(name)
+        raise RequestError(f"Unknown op {op!r}")
+
+
+class _RecommendationHTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, method):
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        service = self.server.service
+        try:
+            if method == "GET" and parts == ["healthz"]:
+                return self._reply(200, {"status": "ok"})
+            if not parts or parts[0] != "models":
+                raise RequestError("Not found", status=404)
+            if method == "GET" and len(parts) == 1:
+                return self._reply(200, service.list())
+            if method == "DELETE" and len(parts) == 2:
+                return self._reply(200, service.delete(parts[1]))
+            if method != "POST" or len(parts) not in (2, 3):
+                raise RequestError("Not found", status=404)
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError as e:
+                raise RequestError(f"Invalid JSON: {e}")
+            if len(parts) == 2:
+                return self._reply(201, service.create(parts[1], request))
+            if parts[2] == "select":
+                return self._reply(200, service.select(parts[1], request))
+            if parts[2] == "observe":
+                return self._reply(200, service.observe(parts[1], request))
+            raise RequestError("Not found", status=404)
+        except RequestError as e:
+            self._reply(e.status, {"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error handling {method} {self.path}: {e}", exc_info=True)
+            self._reply(500, {"error": str(e)})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class RecommendationHTTPServer(ThreadingHTTPServer):
+    """HTTP transport of a RecommendationService; connections are kept alive."""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, service, host="0.0.0.0", port=8080):
+        self.service = service
+        super().__init__((host, port), _RecommendationHTTPHandler)
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name="drone-recommendation-http", daemon=True)
+        thread.start()
+        logger.info(f"Recommendation server listening on {self.server_address[0]}:{self.server_address[1]}")
+        return thread
+
+
+class _RecommendationSocketHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.service.handle(json.loads(line))
+            except (RequestError, ValueError) as e:
+                response = {"error": str(e)}
+            except Exception as e:
+                logger.error(f"Error handling socket request: {e}", exc_info=True)
+                response = {"error": str(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+class RecommendationSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket transport of a RecommendationService, one JSON request per line."""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, path, service):
+        self.service = service
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _RecommendationSocketHandler)
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name="drone-recommendation-socket", daemon=True)
+        thread.start()
+        logger.info(f"Recommendation server listening on {self.server_address}")
+        return thread
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Drone recommendation server')
+    parser.add_argument('--host', default='0.0.0.0', help='HTTP bind address (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=8080, help='HTTP port, 0 to disable (default: 8080)')
+    parser.add_argument('--socket', help='Also serve JSON lines on this Unix socket')
+    parser.add_argument('--models', help='JSON file mapping model names to create requests')
+    parser.add_argument('--max-batch', type=int, default=256,
+                        help='Most select requests scored together (default: 256)')
+    parser.add_argument('--max-delay', type=float, default=0.0,
+                        help='Seconds to wait for more select requests before scoring a batch (default: 0)')
+    parser.add_argument('--verbose', action='store_true', help='Enable verbose logging')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    service = RecommendationService(max_batch=args.max_batch, max_delay=args.max_delay)
+    if args.models:
+        with open(args.models) as f:
+            for name, spec in json.load(f).items():
+                service.create(name, spec)
+    servers = []
+    if args.port:
+        servers.append(RecommendationHTTPServer(service, host=args.host, port=args.port))
+    if args.socket:
+        servers.append(RecommendationSocketServer(args.socket, service))
+    if not servers:
+        logger.error("Nothing to serve: pass --port or --socket")
+        return 1
+    for server in servers:
+        server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        logger.info("Recommendation server interrupted by user")
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
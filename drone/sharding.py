@@ -0,0 +1,286 @@
+"""Orchestrator replicas sharing applications through a consistent-hash ring of Leases:
+
+    python -m drone.sharding --apps shop/frontend,shop/cart --checkpoint-dir /var/lib/drone
+"""
+import argparse
+import bisect
+import hashlib
+import itertools
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MEMBER_LABELS = {"app.kubernetes.io/managed-by": "drone", "drone/role": "member"}
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class ConsistentHashRing:
+    """Maps keys to nodes so that adding or removing a node only moves its own keys.
+
+    Each node is placed at `vnodes` points of the ring to even out the
+    share of keys it receives.
+    """
+
+    def __init__(self, nodes=(), vnodes=64):
+        self.vnodes = vnodes
+        self._points = []
+        self._owners = []
+        self.nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            idx = bisect.bisect(self._points, point)
+            self._points.insert(idx, point)
+            self._owners.insert(idx, node)
+
+    def remove(self, node):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        keep = [i for i, owner in enumerate(self._owners) if owner != node]
+        self._points = [self._points[i] for i in keep]
+        self._owners = [self._owners[i] for i in keep]
+
+    def owner(self, key):
+        """Node owning `key`, or None while the ring is empty."""
+        if not self._points:
+            return None
+        idx = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[idx]
+
+
+class FileCheckpointStore:
+    """Orchestrator checkpoints as JSON files in a directory shared by the replicas."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key.replace("/", "__") + ".json")
+
+    def save(self, key, state):
+        path = self._path(key)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    def load(self, key):
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading checkpoint of {key}: {e}")
+            return None
+
+
+class _Worker:
+    def __init__(self, orchestrator, thread, generation):
+        self.orchestrator = orchestrator
+        self.thread = thread
+        self.generation = generation
+        self.saved_at = None
+        self.stopping = False
+        self.lost = False
+
+
+class ShardedController:
+    """Runs, in their own threads, the orchestrators of the applications the ring assigns to this replica.
+
+    `make_orchestrator(namespace, name)` builds the DroneOrchestrator of a
+    "namespace/name" in `apps`; running ones are checkpointed every
+    `checkpoint_interval` seconds and fenced on their lease and generation.
+    """
+
+    def __init__(self, apps, make_orchestrator, leases, checkpoints=None, interval=60, iterations=None,
+                 vnodes=64, lease_prefix="drone", checkpoint_interval=300, clock=None):
+        self.apps = list(apps)
+        self.make_orchestrator = make_orchestrator
+        self.leases = leases
+        self.identity = leases.identity
+        self.checkpoints = checkpoints
+        self.interval = interval
+        self.iterations = iterations
+        self.vnodes = vnodes
+        self.lease_prefix = lease_prefix
+        self.checkpoint_interval = checkpoint_interval
+        self.clock = clock or time
+        self.workers = {}
+        # Generation of the orchestrator allowed to actuate each application
+        self.generations = {}
+        self._next_generation = itertools.count(1)
+        # Applications whose orchestrator completed its `iterations`
+        self.finished = set()
+        self.running = False
+        self.member_selector = ",".join(f"{k}={v}" for k, v in MEMBER_LABELS.items())
+
+    def _app_lease(self, app):
+        from drone.kubernetes.lease import lease_name
+
+        return lease_name(f"{self.lease_prefix}-app", *app.split("/", 1))
+
+    def _member_lease(self):
+        from drone.kubernetes.lease import lease_name
+
+        return lease_name(f"{self.lease_prefix}-member", self.identity)
+
+    def members(self):
+        return sorted(set(self.leases.holders(self.member_selector).values()) | {self.identity})
+
+    def assigned(self):
+        """Applications the ring currently assigns to this replica."""
+        ring = ConsistentHashRing(self.members(), vnodes=self.vnodes)
+        return {app for app in self.apps if ring.owner(app) == self.identity}
+
+    def reconcile(self):
+        """Bring the running orchestrators in line with the ring; return the applications owned."""
+        if not self.leases.acquire(self._member_lease(), labels=MEMBER_LABELS):
+            logger.warning(f"Could not renew member lease of {self.identity}")
+        assigned = self.assigned()
+        for app, worker in list(self.workers.items()):
+            if worker.lost:
+                if not worker.thread.is_alive():
+                    del self.workers[app]
+            elif not self.leases.acquire(self._app_lease(app)):
+                logger.warning(f"Lost the lease of {app}")
+                # Fenced from actuating; another replica may already have taken over
+                self.generations.pop(app, None)
+                worker.lost = worker.stopping = True
+                worker.orchestrator.stop()
+                if not worker.thread.is_alive():
+                    del self.workers[app]
+            elif not worker.thread.is_alive():
+                if self.iterations is not None and worker.orchestrator.iteration >= self.iterations:
+                    self.finished.add(app)
+                elif not worker.stopping:
+                    logger.warning(f"Orchestrator of {app} stopped, restarting it from its checkpoint")
+                self._release(app)
+            elif app not in assigned and not worker.stopping:
+                # The lease is kept until the current iteration ends and the model is saved
+                logger.info(f"Handing {app} over to another replica")
+                worker.stopping = True
+                worker.orchestrator.stop()
+            elif self.clock.time() - worker.saved_at >= self.checkpoint_interval:
+                self._save(app, worker)
+        for app in sorted(assigned - set(self.workers) - self.finished):
+            if self.leases.acquire(self._app_lease(app)):
+                self._start(app)
+        return set(self.workers)
+
+    def _start(self, app):
+        namespace, name = app.split("/", 1)
+        orchestrator = self.make_orchestrator(namespace, name)
+        state = self.checkpoints.load(app) if self.checkpoints is not None else None
+        if state is not None:
+            orchestrator.restore(state)
+        lease = self._app_lease(app)
+        generation = self.generations[app] = next(self._next_generation)
+        orchestrator.fence = lambda: self.generations.get(app) == generation and self.leases.held(lease)
+        thread = threading.Thread(target=orchestrator.start, name=f"drone-{app}",
+                                  kwargs={"iterations": self.iterations, "interval": self.interval}, daemon=True)
+        self.workers[app] = worker = _Worker(orchestrator, thread, generation)
+        worker.saved_at = self.clock.time()
+        thread.start()
+        logger.info(f"Orchestrating {app} on {self.identity}")
+
+    def _save(self, app, worker):
+        if self.checkpoints is None:
+            return
+        state = worker.orchestrator.checkpoint()
+        if state is not None:
+            self.checkpoints.save(app, state)
+        worker.saved_at = self.clock.time()
+
+    def _release(self, app):
+        """Checkpoint a stopped orchestrator and give up its lease."""
+        worker = self.workers.pop(app)
+        self.generations.pop(app, None)
+        self._save(app, worker)
+        self.leases.release(self._app_lease(app))
+
+    def run(self, period=None):
+        """Reconcile every `period` seconds (a third of the lease duration) until stop()."""
+        period = period or self.leases.lease_duration / 3
+        self.running = True
+        try:
+            while self.running:
+                self.reconcile()
+                self.clock.sleep(period)
+        finally:
+            for app, worker in list(self.workers.items()):
+                worker.orchestrator.stop()
+                worker.thread.join()
+                if worker.lost:
+                    del self.workers[app]
+                else:
+                    self._release(app)
+            self.leases.release(self._member_lease())
+
+    def stop(self):
+        self.running = False
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded Drone controller replica")
+    parser.add_argument("--apps", required=True, help="Comma-separated namespace/name of the managed applications")
+    parser.add_argument("--identity", default=os.environ.get("POD_NAME", socket.gethostname()))
+    parser.add_argument("--lease-namespace", default=os.environ.get("POD_NAMESPACE", "default"))
+    parser.add_argument("--lease-duration", type=int, default=15)
+    parser.add_argument("--checkpoint-dir", required=True)
+    parser.add_argument("--checkpoint-interval", type=int, default=300)
+    parser.add_argument("--mode", choices=["public", "private"], default="public")
+    parser.add_argument("--prometheus-url", default="http://localhost:9090")
+    parser.add_argument("--in-cluster", action="store_true")
+    parser.add_argument("--config-file")
+    parser.add_argument("--interval", type=int, default=60)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    args = parse_args(argv)
+    from kubernetes import config
+    from drone.kubernetes.lease import LeaseManager
+    from drone.orchestrator import DroneOrchestrator
+
+    if args.in_cluster:
+        config.load_incluster_config()
+    else:
+        config.load_kube_config()
+
+    def make_orchestrator(namespace, name):
+        return DroneOrchestrator(app_name=name, namespace=namespace, mode=args.mode,
+                                 prometheus_url=args.prometheus_url, in_cluster=args.in_cluster,
+                                 config_file=args.config_file)
+
+    leases = LeaseManager(namespace=args.lease_namespace, identity=args.identity,
+                          lease_duration=args.lease_duration)
+    controller = ShardedController([app.strip() for app in args.apps.split(",") if app.strip()],
+                                   make_orchestrator, leases, FileCheckpointStore(args.checkpoint_dir),
+                                   interval=args.interval, checkpoint_interval=args.checkpoint_interval)
+    try:
+        controller.run()
+    except KeyboardInterrupt:
+        logger.info("Interrupted, handing over owned applications")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,38 @@
+from drone.simulation.clock import VirtualClock
+from drone.simulation.trace import WorkloadTrace
+from drone.simulation.model import ResponseModel
+from drone.simulation.cluster import SimulatedKubernetesClient, StaticApplicationIdentifier
+from drone.simulation.monitoring import SimulatedMonitoring
+from drone.simulation.coordination import FakeCoordinationApi
+
+
+def build_simulation(namespace="default", trace_file=None, app_type="microservice", zones=2,
+                     settle_time=30, seed=None):
+    """Return the orchestrator components (as keyword arguments) of a simulated cluster."""
+    clock = VirtualClock()
+    trace = WorkloadTrace.load(trace_file) if trace_file else WorkloadTrace.diurnal(seed=seed)
+    model = ResponseModel(seed=seed)
+    job_duration = None
+    if app_type == "batch":
+        def job_duration(state, start):
+            return model.job_time(state, trace.at(start)["workload"])
+    cluster = SimulatedKubernetesClient(namespace=namespace, zones=zones, clock=clock, job_duration=job_duration)
+    monitoring = SimulatedMonitoring(cluster, trace, model, clock, settle_time=settle_time)
+    return {
+        "k8s_client": cluster,
+        "monitoring": monitoring,
+        "app_identifier": StaticApplicationIdentifier(app_type),
+        "clock": clock
+    }
+
+
+__all__ = [
+    'VirtualClock',
+    'WorkloadTrace',
+    'ResponseModel',
+    'SimulatedKubernetesClient',
+    'StaticApplicationIdentifier',
+    'SimulatedMonitoring',
+    'FakeCoordinationApi',
+    'build_simulation'
+]
@@ -0,0 +1,15 @@
+class VirtualClock:
+    """Drop-in for the ``time`` module whose sleep() only advances a counter."""
+
+    def __init__(self, start=0.0):
+        self.now = float(start)
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
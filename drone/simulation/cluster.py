@@ -0,0 +1,118 @@
+import logging
+
+from drone.kubernetes.quantity import parse_cpu, parse_memory, MIB
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatedKubernetesClient:
+    """In-memory stand-in for KubernetesClient with one managed workload."""
+
+    def __init__(self, namespace="default", zones=2, nodes_per_zone=3, node_cpu="8",
+                 node_memory="32Gi", initial_resources=None, clock=None, job_duration=None, job_interval=300):
+        self.namespace = namespace
+        self.configured = True
+        self.clock = clock
+        self.nodes = []
+        for z in range(zones):
+            for n in range(nodes_per_zone):
+                self.nodes.append({
+                    "name": f"sim-node-{z + 1}-{n + 1}",
+                    "labels": {"zone": f"zone-{z + 1}", "kubernetes.io/hostname": f"sim-node-{z + 1}-{n + 1}"},
+                    "allocatable": {"cpu": node_cpu, "memory": node_memory},
+                    "capacity": {"cpu": node_cpu, "memory": node_memory}
+                })
+        self.resources = dict(initial_resources or {"cpu": 0.5, "memory": "512Mi", "replicas": 1})
+        self.actions_applied = 0
+        # With job_duration(state, start_time), a job of the workload starts
+        # every job_interval seconds of the clock and runs with the
+        # deployment's configuration at its start
+        self.job_duration = job_duration
+        self.job_interval = job_interval
+        self.jobs = []
+        self._next_job = 0.0
+        self._changes = [(float("-inf"), dict(self.resources))]
+        self.canary = None
+
+    def get_nodes(self):
+        return [dict(node) for node in self.nodes]
+
+    def get_current_resources(self, app_name):
+        return dict(self.resources)
+
+    def apply_resource_action(self, app_name, cpu, memory, replicas=None, node_affinities=None):
+        self.resources = {"cpu": float(cpu), "memory": memory,
+                          "replicas": replicas if replicas is not None else self.resources.get("replicas", 1),
+                          "node_affinities": dict(node_affinities or {})}
+        self.actions_applied += 1
+        if self.clock is not None:
+            self._changes.append((self.clock.time(), dict(self.resources)))
+        return True
+
+    def canary_name(self, app_name):
+        return f"{app_name}-drone-canary"
+
+    def apply_canary(self, app_name, cpu, memory, replicas=1, node_affinities=None):
+        self.canary = {"cpu": float(cpu), "memory": memory, "replicas": replicas,
+                       "node_affinities": dict(node_affinities or {})}
+        return True
+
+    def delete_canary(self, app_name):
+        self.canary = None
+        return True
+
+    def _resources_at(self, t):
+        for time, resources in reversed(self._changes):
+            if time <= t:
+                return resources
+        return self._changes[0][1]
+
+    def _launch_jobs(self, now):
+        while self._next_job <= now:
+            start = self._next_job
+            duration = self.job_duration(self.get_state(self._resources_at(start)), start)
+            self.jobs.append({"name": f"job-{len(self.jobs) + 1}", "start_time": start,
+                              "completion_time": start + duration, "duration": duration})
+            self._next_job += self.job_interval
+        # Only the configuration in place at the next start and later ones are still needed
+        while len(self._changes) > 1 and self._changes[1][0] <= self._next_job:
+            self._changes.pop(0)
+
+    def get_completed_jobs(self, app_name, since=None):
+        if self.job_duration is None or self.clock is None:
+            return []
+        now = self.clock.time()
+        self._launch_jobs(now)
+        return [dict(job, name=f"{app_name}-{job['name']}") for job in self.jobs
+                if job["completion_time"] <= now and (since is None or job["start_time"] >= since)]
+
+    def get_state(self, resources=None):
+        """Numeric view of a deployment (the current one by default) for the response model."""
+        resources = self.resources if resources is None else resources
+        return {
+            "cpu": parse_cpu(resources.get("cpu", 0.5), default=0.5),
+            "memory_mib": parse_memory(resources.get("memory", "512Mi"), default=512 * MIB) / MIB,
+            "replicas": int(resources.get("replicas", 1) or 1),
+            "zones_used": max(len(resources.get("node_affinities") or {}), 1)
+        }
+
+
+class StaticApplicationIdentifier:
+    def __init__(self, app_type="microservice", characteristics=None):
+        self.app_type = app_type
+        self.characteristics = characteristics or {}
+
+    def identify_app_type(self, app_name, namespace="default"):
+        return self.app_type
+
+    def get_app_characteristics(self, app_name, namespace="default"):
+        characteristics = {
+            "app_type": self.app_type,
+            "recurring": False,
+            "stateful": False,
+            "network_intensive": False,
+            "memory_intensive": False,
+            "cpu_intensive": False
+        }
+        characteristics.update(self.characteristics)
+        return characteristics
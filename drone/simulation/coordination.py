@@ -0,0 +1,69 @@
+import copy
+import threading
+
+
+def _api_error(status, reason):
+    from kubernetes.client.rest import ApiException
+
+    return ApiException(status=status, reason=reason)
+
+
+class FakeCoordinationApi:
+    """In-memory stand-in for CoordinationV1Api, enough for LeaseManager.
+
+    Like the API server it assigns resource versions and rejects creates of
+    existing leases and replaces carrying a stale resource version with a
+    409 conflict, so replicas sharing one instance race as they would on a
+    real cluster.
+    """
+
+    def __init__(self):
+        self.leases = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def _key(self, name, namespace):
+        return namespace, name
+
+    def _store(self, key, body):
+        self._version += 1
+        lease = copy.deepcopy(body)
+        lease.metadata.resource_version = str(self._version)
+        self.leases[key] = lease
+        return copy.deepcopy(lease)
+
+    def read_namespaced_lease(self, name, namespace, **kwargs):
+        with self._lock:
+            if self._key(name, namespace) not in self.leases:
+                raise _api_error(404, "Not Found")
+            return copy.deepcopy(self.leases[self._key(name, namespace)])
+
+    def create_namespaced_lease(self, namespace, body, **kwargs):
+        key = self._key(body.metadata.name, namespace)
+        with self._lock:
+            if key in self.leases:
+                raise _api_error(409, "AlreadyExists")
+            return self._store(key, body)
+
+    def replace_namespaced_lease(self, name, namespace, body, **kwargs):
+        key = self._key(name, namespace)
+        with self._lock:
+            if key not in self.leases:
+                raise _api_error(404, "Not Found")
+            if body.metadata.resource_version != self.leases[key].metadata.resource_version:
+                raise _api_error(409, "Conflict")
+            return self._store(key, body)
+
+    def delete_namespaced_lease(self, name, namespace, **kwargs):
+        with self._lock:
+            if self.leases.pop(self._key(name, namespace), None) is None:
+                raise _api_error(404, "Not Found")
+
+    def list_namespaced_lease(self, namespace, label_selector=None, **kwargs):
+        from kubernetes import client
+
+        selector = dict(term.split("=", 1) for term in label_selector.split(",")) if label_selector else {}
+        with self._lock:
+            items = [copy.deepcopy(lease) for (ns, _), lease in self.leases.items() if ns == namespace
+                     and all((lease.metadata.labels or {}).get(k) == v for k, v in selector.items())]
+        return client.V1LeaseList(items=items)
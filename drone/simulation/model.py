@@ -0,0 +1,62 @@
+import numpy as np
+
+
+class ResponseModel:
+    """Parametric latency and resource response of an application.
+
+    Each replica is an M/M/1-like server whose service rate grows with its
+    CPU allocation; latency blows up as utilization approaches one and
+    replicas short on memory pay a swapping/OOM penalty. Observations get
+    multiplicative log-normal noise.
+    """
+
+    def __init__(self, base_latency=0.02, requests_per_core=50.0, base_memory_mib=200.0,
+                 memory_per_request_mib=2.0, cpu_per_request=0.015, job_work=3600.0,
+                 zone_penalty=0.01, noise=0.05, seed=None):
+        self.base_latency = base_latency
+        self.requests_per_core = requests_per_core
+        self.base_memory_mib = base_memory_mib
+        self.memory_per_request_mib = memory_per_request_mib
+        self.cpu_per_request = cpu_per_request
+        self.job_work = job_work
+        self.zone_penalty = zone_penalty
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+
+    def _noisy(self, value):
+        return value * float(np.exp(self.noise * self.rng.standard_normal()))
+
+    def memory_demand_mib(self, state, workload):
+        replicas = max(state["replicas"], 1)
+        return self.base_memory_mib + self.memory_per_request_mib * workload / replicas
+
+    def utilization(self, state, workload):
+        capacity = max(state["replicas"], 1) * max(state["cpu"], 1e-3) * self.requests_per_core
+        return workload / capacity
+
+    def memory_pressure(self, state, workload):
+        return max(self.memory_demand_mib(state, workload) / max(state["memory_mib"], 1.0) - 1.0, 0.0)
+
+    def latency(self, state, workload):
+        rho = min(self.utilization(state, workload), 0.99)
+        service_time = 1.0 / (max(state["cpu"], 1e-3) * self.requests_per_core)
+        latency = self.base_latency + service_time / (1.0 - rho)
+        latency *= 1.0 + 10.0 * self.memory_pressure(state, workload)
+        # Spreading replicas over zones costs cross-zone hops
+        latency += self.zone_penalty * max(state.get("zones_used", 1) - 1, 0)
+        return self._noisy(latency)
+
+    def job_time(self, state, workload):
+        cores = max(state["replicas"], 1) * max(state["cpu"], 1e-3)
+        duration = self.job_work / cores * (1.0 + 10.0 * self.memory_pressure(state, workload))
+        return self._noisy(duration)
+
+    def resource_usage(self, state, workload):
+        replicas = max(state["replicas"], 1)
+        memory_mib = min(self.memory_demand_mib(state, workload), state["memory_mib"]) * replicas
+        cpu = min(self.cpu_per_request * workload, replicas * state["cpu"])
+        return {
+            "cpu": self._noisy(cpu),
+            "memory": self._noisy(memory_mib * 1024 ** 2),
+            "network": self._noisy(workload * 1e4)
+        }
@@ -0,0 +1,84 @@
+import numpy as np
+
+from drone.utils.monitoring import MonitoringInterface, summarize_samples
+
+
+class SimulatedMonitoring(MonitoringInterface):
+    """Monitoring that evaluates the response model on the simulated cluster.
+
+    Context comes from the workload trace at the virtual time. After an
+    actuation, performance and resource readings are averaged over samples
+    taken every `step` seconds of the post-settle window, mirroring windowed
+    Prometheus sampling.
+    """
+
+    canary_metrics = True
+    early_metrics = True
+
+    def __init__(self, cluster, trace, model, clock, settle_time=30, step=15):
+        self.cluster = cluster
+        self.trace = trace
+        self.model = model
+        self.clock = clock
+        self.settle_time = settle_time
+        self.step = step
+        self.last_aggregates = {}
+        self.queries = 0
+
+    def _sample_times(self):
+        now = self.clock.time()
+        if self.actuation_time is None or now <= self.actuation_time + self.settle_time:
+            return [now]
+        return list(np.arange(self.actuation_time + self.settle_time, now, self.step)) + [now]
+
+    def _collect(self, readers):
+        state = self.cluster.get_state()
+        samples = {name: [] for name in readers}
+        for t in self._sample_times():
+            workload = self.trace.at(t)["workload"]
+            for name, reader in readers.items():
+                samples[name].append(reader(state, workload))
+        results = {}
+        for name, values in samples.items():
+            self.last_aggregates[name] = summarize_samples(values)
+            results[name] = self.last_aggregates[name]["mean"]
+        return results
+
+    def get_performance_metrics(self):
+        self.queries += 1
+        return self._collect({"p90_latency": self.model.latency, "job_time": self.model.job_time})
+
+    def get_resource_usage(self):
+        self.queries += 1
+        readers = {name: (lambda state, workload, name=name: self.model.resource_usage(state, workload)[name])
+                   for name in ("cpu", "memory", "network")}
+        return self._collect(readers)
+
+    def get_early_metrics(self):
+        """The simulated metrics have no rate window, so an early read sees only the new configuration."""
+        return self.get_performance_metrics(), self.get_resource_usage()
+
+    def get_canary_metrics(self, canary):
+        """Readings of the canary's pods and of the main deployment's, sharing the workload per pod."""
+        if self.cluster.canary is None:
+            return None
+        self.queries += 1
+        tracks = {"canary": self.cluster.get_state(self.cluster.canary), "stable": self.cluster.get_state()}
+        pods = sum(state["replicas"] for state in tracks.values())
+        samples = {track: {"p90_latency": [], "job_time": [], "memory": []} for track in tracks}
+        for t in self._sample_times():
+            workload = self.trace.at(t)["workload"]
+            for track, state in tracks.items():
+                share = workload * state["replicas"] / pods
+                samples[track]["p90_latency"].append(self.model.latency(state, share))
+                samples[track]["job_time"].append(self.model.job_time(state, share))
+                samples[track]["memory"].append(self.model.resource_usage(state, share)["memory"])
+        return tuple({name: summarize_samples(values)["mean"] for name, values in samples[track].items()}
+                     for track in ("canary", "stable"))
+
+    def get_context(self):
+        self.queries += 1
+        return self.trace.at(self.clock.time())
+
+    def get_aggregates(self):
+        return dict(self.last_aggregates)
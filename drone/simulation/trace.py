@@ -0,0 +1,53 @@
+import json
+import numpy as np
+
+CONTEXT_FIELDS = ("workload", "cpu_util", "mem_util", "net_util", "spot_price")
+
+
+class WorkloadTrace:
+    """Context samples replayed against a (virtual) clock.
+
+    Each JSONL record is an object with a time offset ``t`` in seconds and
+    any of the context fields, e.g.
+    ``{"t": 60, "workload": 120.5, "cpu_util": 0.4, "spot_price": 0.8}``.
+    Records without ``t`` are spaced ``step`` seconds apart. Lookups hold
+    the most recent record and wrap around at the end of the trace.
+    """
+
+    def __init__(self, records, step=60.0):
+        if not records:
+            raise ValueError("Workload trace is empty")
+        self.times = np.array([float(r.get("t", i * step)) for i, r in enumerate(records)])
+        order = np.argsort(self.times, kind="stable")
+        self.times = self.times[order]
+        self.records = [records[i] for i in order]
+        self.duration = self.times[-1] + step
+
+    @classmethod
+    def load(cls, path, step=60.0):
+        with open(path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        return cls(records, step=step)
+
+    @classmethod
+    def diurnal(cls, days=1, step=60.0, base=100.0, amplitude=80.0, noise=0.05, seed=None):
+        """Synthetic day/night request-rate trace."""
+        rng = np.random.default_rng(seed)
+        t = np.arange(0, days * 86400, step)
+        phase = 2 * np.pi * t / 86400
+        workload = base + amplitude * np.sin(phase - np.pi / 2)
+        workload = np.maximum(workload * (1 + noise * rng.standard_normal(len(t))), 0.0)
+        records = [{"t": float(ti), "workload": float(w),
+                    "cpu_util": float(min(0.2 + 0.6 * w / (base + amplitude), 1.0)),
+                    "mem_util": 0.5, "net_util": float(w * 1e4), "spot_price": 1.0}
+                   for ti, w in zip(t, workload)]
+        return cls(records, step=step)
+
+    def __len__(self):
+        return len(self.records)
+
+    def at(self, t):
+        offset = t % self.duration
+        idx = max(int(np.searchsorted(self.times, offset, side="right")) - 1, 0)
+        record = self.records[idx]
+        return {name: float(record.get(name, 1.0 if name == "spot_price" else 0.0)) for name in CONTEXT_FIELDS}
@@ -1,11 +1,30 @@
-from drone.utils.monitoring import MonitoringInterface, PrometheusMonitoring
-from drone.utils.app_identifier import ApplicationIdentifier
-from drone.utils.enforcer import ObjectiveEnforcer, ResourceEnforcer
+from drone._lazy import lazy_exports
 
-__all__ = [
-    'MonitoringInterface',
-    'PrometheusMonitoring',
-    'ApplicationIdentifier',
-    'ObjectiveEnforcer',
-    'ResourceEnforcer'
-]
+_EXPORTS = {
+    'MonitoringInterface': 'drone.utils.monitoring',
+    'PrometheusMonitoring': 'drone.utils.monitoring',
+    'ApplicationIdentifier': 'drone.utils.app_identifier',
+    'ObjectiveEnforcer': 'drone.utils.enforcer',
+    'ResourceEnforcer': 'drone.utils.enforcer',
+    'SeriesStore': 'drone.utils.ingestion',
+    'IngestionServer': 'drone.utils.ingestion',
+    'PushMonitoring': 'drone.utils.ingestion',
+    'get_shared_ingestion_server': 'drone.utils.ingestion',
+    'OrchestratorMetrics': 'drone.utils.instrumentation',
+    'start_metrics_server': 'drone.utils.instrumentation',
+    'TraceWriter': 'drone.utils.trace',
+    'read_trace': 'drone.utils.trace',
+    'replay': 'drone.utils.trace',
+    'AdaptiveIntervalScheduler': 'drone.utils.scheduler',
+    'PendingObservationQueue': 'drone.utils.pending',
+    'ResourceBudgetAllocator': 'drone.utils.budget',
+    'get_shared_budget_allocator': 'drone.utils.budget',
+    'CostModel': 'drone.utils.cost',
+    'SpotPriceFeed': 'drone.utils.cost',
+    'ContextCache': 'drone.utils.context_cache',
+    'RemoteContextCache': 'drone.utils.context_cache',
+    'get_shared_context_cache': 'drone.utils.context_cache'
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -1,5 +1,4 @@
 import logging
-from kubernetes import client
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +25,8 @@ class ApplicationIdentifier:
         except (AttributeError, Exception) as e:
             logger.debug(f"Error checking batch jobs: {e}")
         try:
+            from kubernetes import client
+
             custom_objects_api = client.CustomObjectsApi()
             spark_apps = custom_objects_api.list_namespaced_custom_object(
                 group="sparkoperator.k8s.io", version="v1beta2", namespace=namespace,
@@ -0,0 +1,83 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def water_fill(total, demands, weights):
+    """Split `total` by weighted water-filling, capped at each demand.
+
+    Every application gets the same allocation per unit of weight unless it
+    asks for less, in which case it gets its demand and the rest is
+    re-split among the others. Capacity left once every demand is met is
+    shared out in proportion to weight, so it is not stranded.
+    """
+    allocation = {}
+    remaining = total
+    active = set(demands)
+    while active:
+        level = remaining / sum(weights[app] for app in active)
+        capped = {app for app in active if demands[app] <= level * weights[app]}
+        if not capped:
+            for app in active:
+                allocation[app] = level * weights[app]
+            return allocation
+        for app in capped:
+            allocation[app] = demands[app]
+            remaining -= demands[app]
+        active -= capped
+    if remaining > 0 and allocation:
+        weight_sum = sum(weights.values())
+        for app in allocation:
+            allocation[app] += remaining * weights[app] / weight_sum
+    return allocation
+
+
+class ResourceBudgetAllocator:
+    """Shares one cluster-wide resource limit among the applications managed in a process.
+
+    Each application reports the upper confidence bound of its resource
+    usage as predicted by its resource GP; applications that have not
+    reported yet claim an unlimited demand. Limits are recomputed on every
+    call by water-filling (see water_fill) with the applications' weights.
+    """
+
+    def __init__(self):
+        self.demands = {}
+        self.weights = {}
+        self._lock = threading.Lock()
+
+    def register(self, app, weight=1.0):
+        with self._lock:
+            self.weights[app] = weight
+            self.demands.setdefault(app, float("inf"))
+
+    def unregister(self, app):
+        with self._lock:
+            self.weights.pop(app, None)
+            self.demands.pop(app, None)
+
+    def report(self, app, demand):
+        with self._lock:
+            if app in self.weights:
+                self.demands[app] = max(float(demand), 0.0)
+
+    def allocate(self, total):
+        with self._lock:
+            return water_fill(total, dict(self.demands), dict(self.weights))
+
+    def limit_for(self, app, total):
+        """Share of `total` currently allocated to `app` (all of it if it is not registered)."""
+        return self.allocate(total).get(app, total)
+
+
+_shared_allocators = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_budget_allocator(resource="memory"):
+    """Return the allocator of `resource` shared by all orchestrators in this process."""
+    with _shared_lock:
+        if resource not in _shared_allocators:
+            _shared_allocators[resource] = ResourceBudgetAllocator()
+        return _shared_allocators[resource]
@@ -0,0 +1,199 @@
+import fcntl
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ContextCache:
+    """TTL cache for cluster-wide context queries with request coalescing.
+
+    Entries are keyed by (prometheus_url, query). Concurrent misses for the
+    same key wait on a single in-flight fetch instead of each querying
+    Prometheus, so query volume scales with distinct queries, not apps.
+    """
+
+    def __init__(self, ttl=15.0, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, prometheus_url, query, fetch):
+        key = (prometheus_url, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self.hits += 1
+                return entry[1]
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = _InFlight()
+                self._inflight[key] = inflight
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not leader:
+            inflight.event.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.value
+
+        try:
+            inflight.value = fetch(query)
+            with self._lock:
+                self._entries[key] = (self.clock() + self.ttl, inflight.value)
+            return inflight.value
+        except Exception as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight.event.set()
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _ContextRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                value = self.server.cache.get(request["url"], request["query"],
+                                              self.server.fetcher(request["url"]))
+                response = {"value": value}
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+class ContextCacheServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves a ContextCache to other orchestrator processes over a Unix socket.
+
+    Requests and responses are JSON lines: {"url": ..., "query": ...} ->
+    {"value": ...}, or {"error": ...} if Prometheus could not be queried.
+    Misses are fetched by this process through the cache.
+    """
+    daemon_threads = True
+
+    def __init__(self, path, cache):
+        from drone.utils.monitoring import PrometheusMonitoring
+
+        self.cache = cache
+        self._monitors = {}
+
+        def fetcher(url):
+            if url not in self._monitors:
+                self._monitors[url] = PrometheusMonitoring(prometheus_url=url)
+            return self._monitors[url].fetch_instant
+
+        self.fetcher = fetcher
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _ContextRequestHandler)
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name="drone-context-cache", daemon=True)
+        thread.start()
+        return thread
+
+
+class RemoteContextCache:
+    """Client for a ContextCacheServer; falls back to a direct fetch if it is unreachable."""
+
+    def __init__(self, path, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._file = None
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.path)
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+
+    def get(self, prometheus_url, query, fetch):
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._file.write((json.dumps({"url": prometheus_url, "query": query}) + "\n").encode())
+                self._file.flush()
+                response = json.loads(self._file.readline())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Context cache at {self.path} unavailable: {e}")
+                self.close()
+                return fetch(query)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["value"]
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._file = None
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_context_cache(ttl=15.0, socket_path=None):
+    """Return the context cache shared by all orchestrators in this process.
+
+    With socket_path, the first process to start serves the cache on that
+    Unix socket and later processes connect to it as clients. Processes
+    decide under a lock file next to the socket, so two of them starting
+    together cannot both replace the socket and serve.
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is not None:
+            return _shared_cache
+        if not socket_path:
+            _shared_cache = ContextCache(ttl=ttl)
+            return _shared_cache
+        with open(f"{socket_path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                probe.connect(socket_path)
+                probe.close()
+                _shared_cache = RemoteContextCache(socket_path)
+                logger.info(f"Using shared context cache at {socket_path}")
+                return _shared_cache
+            except OSError:
+                pass
+            cache = ContextCache(ttl=ttl)
+            # Binding before the lock is released; the socket only exists once it listens
+            ContextCacheServer(socket_path, cache).start()
+            _shared_cache = cache
+        logger.info(f"Serving shared context cache at {socket_path}")
+        return _shared_cache
@@ -0,0 +1,115 @@
+import json
+import logging
+import threading
+import time
+import numpy as np
+import requests
+
+logger = logging.getLogger(__name__)
+
+# On-demand prices per core-hour and GiB-hour
+DEFAULT_CPU_PRICE = 0.0425
+DEFAULT_MEMORY_PRICE = 0.00575
+
+
+class SpotPriceFeed:
+    """Spot price multipliers per zone, e.g. ``{"zone-a": 0.35, "default": 0.4}``.
+
+    Read from a JSON file or HTTP endpoint and cached for `ttl` seconds.
+    """
+
+    def __init__(self, source, ttl=300, timeout=2.0, clock=None):
+        self.source = source
+        self.ttl = ttl
+        self.timeout = timeout
+        self.clock = clock or time
+        self._prices = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self.source.startswith(("http://", "https://")):
+            response = requests.get(self.source, timeout=self.timeout)
+            response.raise_for_status()
+            prices = response.json()
+        else:
+            with open(self.source) as f:
+                prices = json.load(f)
+        if not isinstance(prices, dict):
+            raise ValueError(f"Expected an object of zone prices, got {type(prices).__name__}")
+        return {zone: float(price) for zone, price in prices.items()}
+
+    def prices(self):
+        """Current zone multipliers, refreshed from the source when older than the ttl."""
+        with self._lock:
+            now = self.clock.time()
+            if self._loaded_at is None or now - self._loaded_at >= self.ttl:
+                try:
+                    self._prices = self._load()
+                except (OSError, ValueError, requests.RequestException) as e:
+                    logger.warning(f"Error reading spot prices from {self.source}, keeping the last prices: {e}")
+                self._loaded_at = now
+            return self._prices
+
+    def multipliers(self, zones):
+        prices = self.prices()
+        default = prices.get("default", 1.0)
+        return np.array([prices.get(zone, default) for zone in zones], dtype=float)
+
+    def mean(self, zones=None):
+        """Mean multiplier over `zones`, or over every zone the source lists."""
+        if zones is None:
+            zones = [zone for zone in self.prices() if zone != "default"]
+        return float(np.mean(self.multipliers(zones))) if len(zones) else self.prices().get("default", 1.0)
+
+
+class CostModel:
+    """Hourly price of actions, each replica charged at its zone's CPU and memory prices.
+
+    Zones are scaled by their spot feed multiplier, or else all alike by the
+    spot price in the context.
+    """
+
+    def __init__(self, zones, cpu_price=DEFAULT_CPU_PRICE, memory_price=DEFAULT_MEMORY_PRICE,
+                 zone_prices=None, instance_types=None, spot_feed=None):
+        self.zones = list(zones)
+        self.spot_feed = spot_feed
+        instance_types = instance_types or {}
+        self.cpu_prices = np.full(len(self.zones), float(cpu_price))
+        self.memory_prices = np.full(len(self.zones), float(memory_price))
+        for i, zone in enumerate(self.zones):
+            prices = (zone_prices or {}).get(zone)
+            if prices is None:
+                continue
+            if isinstance(prices, str):
+                prices = {"instance_type": prices}
+            if "instance_type" in prices:
+                if prices["instance_type"] not in instance_types:
+                    raise ValueError(f"Zone {zone} uses unknown instance type {prices['instance_type']!r}")
+                prices = {**instance_types[prices["instance_type"]], **prices}
+            self.cpu_prices[i] = prices.get("cpu_price", cpu_price)
+            self.memory_prices[i] = prices.get("memory_price", memory_price)
+
+    def spot_multipliers(self, context=None):
+        if self.spot_feed is not None:
+            return self.spot_feed.multipliers(self.zones)
+        if context is not None and len(context) >= 5:
+            return np.full(len(self.zones), float(context[4]))
+        return np.ones(len(self.zones))
+
+    def costs(self, actions, context=None):
+        """Hourly cost of each row of `actions` in one vectorized pass."""
+        actions = np.atleast_2d(np.asarray(actions, dtype=float))
+        replicas = actions[:, 2:3]
+        placement = actions[:, 3:3 + len(self.zones)]
+        if placement.shape[1] != len(self.zones):
+            placement = np.ones((len(actions), len(self.zones)))
+        # Placements read back from a deployment only mark the zones in use,
+        # so spread the replicas over them (or over every zone if none is marked)
+        placement = np.where(placement.sum(axis=1, keepdims=True) > 0, placement, 1.0)
+        placement = replicas * placement / placement.sum(axis=1, keepdims=True)
+        per_replica = actions[:, 0:1] * self.cpu_prices + actions[:, 1:2] / 1024 * self.memory_prices
+        return np.sum(placement * per_replica * self.spot_multipliers(context), axis=1)
+
+    def cost(self, action, context=None):
+        return float(self.costs(action, context)[0])
@@ -1,5 +1,7 @@
 import logging
 
+from drone.kubernetes.capacity import ClusterCapacityIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,6 +47,13 @@ class ObjectiveEnforcer:
 
         return value <= self.performance_target
 
+    def get_performance_headroom(self, value):
+        # Fraction of the target still unused; negative when the target is missed
+        if not self.performance_target:
+            return None
+
+        return (self.performance_target - value) / self.performance_target
+
     def validate_cost(self, value):
         if self.cost_target is None:
             return True
@@ -56,10 +65,16 @@ class ResourceEnforcer:
     def __init__(
         self,
         resource_limits=None,
-        k8s_client=None
+        k8s_client=None,
+        capacity_index=None
     ):
         self.k8s_client = k8s_client
 
+        # Share the orchestrator's index when given, so the cluster is listed once
+        if capacity_index is None and k8s_client:
+            capacity_index = ClusterCapacityIndex(k8s_client)
+        self.capacity_index = capacity_index
+
         # Default resource limits (as fraction of total)
         self.resource_limits = resource_limits or {
             "cpu": 0.8,  # 80% of total CPU
@@ -69,62 +84,27 @@ class ResourceEnforcer:
 
         # Store absolute resource limits if available
         self.absolute_limits = {}
-
-        if k8s_client:
-            self._calculate_absolute_limits()
+        self._limits_version = None
+        self._limits_pinned = False
 
     def _calculate_absolute_limits(self):
-        if not self.k8s_client:
+        if not self.capacity_index:
             logger.warning(
                 "No Kubernetes client provided, using fractional limits only")
             return
 
         try:
-            nodes = self.k8s_client.get_nodes()
+            totals = self.capacity_index.get_total("allocatable")
+            self._limits_version = self.capacity_index.version
 
-            if not nodes:
+            if not self.capacity_index.node_names:
                 logger.warning("No nodes found in the cluster")
                 return
 
-            # Calculate total cluster resources
-            total_cpu = 0
-            total_memory = 0
-
-            for node in nodes:
-                if "allocatable" in node and "cpu" in node["allocatable"]:
-                    # Convert CPU string (e.g., "8") to float
-                    cpu_str = node["allocatable"]["cpu"]
-                    try:
-                        cpu = float(cpu_str)
-                        total_cpu += cpu
-                    except (ValueError, TypeError):
-                        # Handle case where CPU is specified with unit (e.g., "800m")
-                        if cpu_str.endswith('m'):
-                            try:
-                                total_cpu += float(cpu_str[:-1]) / 1000
-                            except (ValueError, TypeError):
-                                pass
-
-                if "allocatable" in node and "memory" in node["allocatable"]:
-                    # Convert memory string (e.g., "16Gi") to bytes
-                    mem_str = node["allocatable"]["memory"]
-                    try:
-                        if mem_str.endswith('Ki'):
-                            total_memory += float(mem_str[:-2]) * 1024
-                        elif mem_str.endswith('Mi'):
-                            total_memory += float(mem_str[:-2]) * 1024 * 1024
-                        elif mem_str.endswith('Gi'):
-                            total_memory += float(mem_str[:-2]) * \
-                                1024 * 1024 * 1024
-                        else:
-                            total_memory += float(mem_str)
-                    except (ValueError, TypeError, AttributeError):
-                        pass
-
             # Set absolute limits based on fractional limits
             self.absolute_limits = {
-                "cpu": total_cpu * self.resource_limits["cpu"],
-                "memory": total_memory * self.resource_limits["memory"]
+                "cpu": totals["cpu"] * self.resource_limits["cpu"],
+                "memory": totals["memory"] * self.resource_limits["memory"]
             }
 
             logger.info(
@@ -143,23 +123,29 @@ class ResourceEnforcer:
         self.resource_limits.update(limits)
         logger.info(f"Set resource limits: {self.resource_limits}")
 
-        if self.k8s_client:
+        if self.capacity_index:
             self._calculate_absolute_limits()
 
     def set_absolute_limits(self, limits):
         self.absolute_limits.update(limits)
+        # Explicit limits are not overwritten by later node events
+        self._limits_pinned = True
         logger.info(f"Set absolute resource limits: {self.absolute_limits}")
 
     def get_resource_limits(self):
         return self.resource_limits.copy()
 
     def get_absolute_limits(self):
+        if (self.capacity_index and not self._limits_pinned
+                and self.capacity_index.version != self._limits_version):
+            self._calculate_absolute_limits()
         return self.absolute_limits.copy()
 
     def validate_resource_usage(self, usage):
         # If absolute limits are available, use them
-        if self.absolute_limits:
-            for key, limit in self.absolute_limits.items():
+        absolute_limits = self.get_absolute_limits()
+        if absolute_limits:
+            for key, limit in absolute_limits.items():
                 if key in usage and usage[key] > limit:
                     logger.warning(
                         f"Resource usage {key}={usage[key]} exceeds limit {limit}")
@@ -170,8 +156,9 @@ class ResourceEnforcer:
     def get_resource_safety_margin(self, usage):
         safety_margins = {}
 
-        if self.absolute_limits:
-            for key, limit in self.absolute_limits.items():
+        absolute_limits = self.get_absolute_limits()
+        if absolute_limits:
+            for key, limit in absolute_limits.items():
                 if key in usage:
                     safety_margins[key] = max(0, (limit - usage[key]) / limit)
 
@@ -0,0 +1,271 @@
+import logging
+import re
+import threading
+import time
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from drone.utils.monitoring import AGGREGATES, MonitoringInterface, summarize_samples
+
+logger = logging.getLogger(__name__)
+
+# Prometheus text exposition line: name{label="value",...} value [timestamp_ms]
+_LINE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)(?:\s+(-?\d+))?\s*$')
+_LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+_ESCAPE_RE = re.compile(r'\\(.)')
+_ESCAPES = {"n": "\n"}
+
+
+def parse_line(line):
+    """Parse one exposition-format line into (name, labels, value, timestamp_seconds)."""
+    match = _LINE_RE.match(line.strip())
+    if not match:
+        raise ValueError(f"Invalid sample line: {line!r}")
+    name, labels, value, timestamp = match.groups()
+    # Label values escape backslash, double quote and newline
+    labels = {key: _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), value)
+              for key, value in _LABEL_RE.findall(labels or "")}
+    timestamp = int(timestamp) / 1000.0 if timestamp else None
+    return name, labels, float(value), timestamp
+
+
+class SeriesStore:
+    """In-process ring buffers of recent samples, one per series.
+
+    A series is identified by (name, namespace, app); the namespace and app
+    come from the sample labels and are None for cluster-wide series.
+    """
+
+    def __init__(self, capacity=1024, clock=time.time):
+        self.capacity = capacity
+        self.clock = clock
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def append(self, name, value, timestamp=None, namespace=None, app=None):
+        key = (name, namespace, app)
+        timestamp = self.clock() if timestamp is None else timestamp
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [np.zeros(self.capacity), np.zeros(self.capacity), 0]
+            times, values, count = series
+            slot = count % self.capacity
+            times[slot] = timestamp
+            values[slot] = value
+            series[2] = count + 1
+
+    def ingest(self, text):
+        accepted = 0
+        for line in text.splitlines():
+            if not line.strip() or line.startswith("#"):
+                continue
+            name, labels, value, timestamp = parse_line(line)
+            self.append(name, value, timestamp, labels.get("namespace"), labels.get("app"))
+            accepted += 1
+        return accepted
+
+    def _resolve(self, name, namespace, app):
+        for key in ((name, namespace, app), (name, namespace, None), (name, None, None)):
+            if key in self._series:
+                return self._series[key]
+        return None
+
+    def window(self, name, start, end=None, namespace=None, app=None):
+        """Samples of the most specific matching series with start <= t <= end."""
+        end = self.clock() if end is None else end
+        with self._lock:
+            series = self._resolve(name, namespace, app)
+            if series is None:
+                return np.zeros(0)
+            times, values, count = series
+            n = min(count, self.capacity)
+            mask = (times[:n] >= start) & (times[:n] <= end)
+            return values[:n][mask].copy()
+
+    def latest(self, name, namespace=None, app=None, max_age=None):
+        with self._lock:
+            series = self._resolve(name, namespace, app)
+            if series is None:
+                return None
+            times, values, count = series
+            slot = (series[2] - 1) % self.capacity
+            if max_age is not None and self.clock() - times[slot] > max_age:
+                return None
+            return float(values[slot])
+
+
+class _IngestionHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path != "/write":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            self.server.store.ingest(self.rfile.read(length).decode())
+        except (ValueError, UnicodeDecodeError) as e:
+            self.send_error(400, str(e))
+            return
+        self.send_response(204)
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path != "/healthz":
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class IngestionServer(ThreadingHTTPServer):
+    """HTTP receiver that streams pushed samples into a SeriesStore.
+
+    POST /write with a body of Prometheus text-format lines, e.g.
+    ``p90_latency{namespace="default",app="web"} 0.123 1700000000000``.
+    """
+    daemon_threads = True
+
+    def __init__(self, store, host="0.0.0.0", port=9091):
+        self.store = store
+        super().__init__((host, port), _IngestionHandler)
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name="drone-ingestion", daemon=True)
+        thread.start()
+        logger.info(f"Metrics ingestion listening on {self.server_address[0]}:{self.server_address[1]}")
+        return thread
+
+
+class PushMonitoring(MonitoringInterface):
+    """Monitoring backed by pushed samples instead of Prometheus polling.
+
+    After an actuation, metrics are aggregated over the post-settle window;
+    otherwise the latest sample no older than max_age is used. Series with
+    no samples are read from the fallback monitoring, if any.
+    """
+    early_metrics = True
+
+    def __init__(
+        self,
+        store,
+        app_name=None,
+        namespace="default",
+        performance_series=None,
+        resource_series=None,
+        context_series=None,
+        settle_time=30,
+        max_age=120,
+        aggregate="mean",
+        fallback=None
+    ):
+        self.store = store
+        self.app_name = app_name
+        self.namespace = namespace
+        self.settle_time = settle_time
+        self.max_age = max_age
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate: {aggregate}, expected one of {', '.join(AGGREGATES)}")
+        self.aggregate = aggregate
+        self.fallback = fallback
+        self.last_aggregates = {}
+        self.performance_series = performance_series or {
+            "job_time": "job_time",
+            "p90_latency": "p90_latency"
+        }
+        self.resource_series = resource_series or {
+            "cpu": "cpu_usage",
+            "memory": "memory_usage",
+            "network": "network_usage"
+        }
+        self.context_series = context_series or {
+            "workload": "workload",
+            "cpu_util": "cpu_util",
+            "mem_util": "mem_util",
+            "net_util": "net_util",
+            "spot_price": "spot_price"
+        }
+
+    def mark_actuation(self, timestamp=None):
+        super().mark_actuation(timestamp)
+        if self.fallback is not None:
+            self.fallback.mark_actuation(self.actuation_time)
+
+    def _read(self, series, windowed, start=None):
+        results = {}
+        missing = []
+        if start is None and self.actuation_time is not None:
+            start = self.actuation_time + self.settle_time
+        for name, series_name in series.items():
+            if windowed and self.actuation_time is not None:
+                samples = self.store.window(series_name, start, namespace=self.namespace, app=self.app_name)
+                summary = summarize_samples(samples)
+                if summary["count"] > 0:
+                    self.last_aggregates[name] = summary
+                    results[name] = summary[self.aggregate]
+                    continue
+            # A latest-value read; drop the aggregates of an earlier window
+            self.last_aggregates.pop(name, None)
+            value = self.store.latest(series_name, namespace=self.namespace, app=self.app_name,
+                                      max_age=self.max_age)
+            if value is None:
+                missing.append(name)
+            else:
+                results[name] = value
+        return results, missing
+
+    def _with_fallback(self, results, missing, fallback_method):
+        if missing:
+            fallback_values = fallback_method() if self.fallback is not None else {}
+            for name in missing:
+                results[name] = fallback_values.get(name, 0.0)
+        return results
+
+    def get_performance_metrics(self):
+        results, missing = self._read(self.performance_series, windowed=True)
+        return self._with_fallback(results, missing,
+                                   lambda: self.fallback.get_performance_metrics())
+
+    def get_resource_usage(self):
+        results, missing = self._read(self.resource_series, windowed=True)
+        return self._with_fallback(results, missing,
+                                   lambda: self.fallback.get_resource_usage())
+
+    def get_early_metrics(self):
+        """Samples pushed since the last actuation, or the fallback's early read if some are missing."""
+        if self.actuation_time is None:
+            return None
+        performance, missing = self._read(self.performance_series, windowed=True, start=self.actuation_time)
+        resources, missing_resources = self._read(self.resource_series, windowed=True, start=self.actuation_time)
+        if missing or missing_resources:
+            return self.fallback.get_early_metrics() if self.fallback is not None else None
+        return performance, resources
+
+    def get_context(self):
+        results, missing = self._read(self.context_series, windowed=False)
+        return self._with_fallback(results, missing,
+                                   lambda: self.fallback.get_context())
+
+    def get_aggregates(self):
+        return dict(self.last_aggregates)
+
+    @property
+    def error_count(self):
+        return getattr(self.fallback, "error_count", 0)
+
+
+_shared_server = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_ingestion_server(host="0.0.0.0", port=9091, capacity=1024):
+    """Start (once per process) and return the ingestion server shared by all orchestrators."""
+    global _shared_server
+    with _shared_lock:
+        if _shared_server is None:
+            _shared_server = IngestionServer(SeriesStore(capacity=capacity), host=host, port=port)
+            _shared_server.start()
+        return _shared_server
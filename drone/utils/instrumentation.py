@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("context_fetch", "gp_fit", "acquisition", "actuation", "settle_wait", "metric_collection")
+
+REGISTRY = CollectorRegistry()
+
+_LABELS = ["app", "namespace", "mode"]
+
+PHASE_SECONDS = Histogram(
+    "drone_phase_duration_seconds", "Duration of each orchestration phase",
+    _LABELS + ["phase"], registry=REGISTRY,
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120))
+ITERATION_SECONDS = Histogram(
+    "drone_iteration_duration_seconds", "Duration of a full orchestrate_once call",
+    _LABELS, registry=REGISTRY,
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300))
+GP_WINDOW_SIZE = Gauge("drone_gp_window_size", "Observations in the GP sliding window", _LABELS, registry=REGISTRY)
+SAFE_SET_SIZE = Gauge("drone_safe_set_size", "Actions considered safe for selection", _LABELS, registry=REGISTRY)
+ITERATION = Gauge("drone_iteration", "Current orchestration iteration", _LABELS, registry=REGISTRY)
+LAST_REWARD = Gauge("drone_last_reward", "Reward of the last iteration", _LABELS, registry=REGISTRY)
+CONTROL_INTERVAL = Gauge("drone_control_interval_seconds", "Wait before the next iteration", _LABELS,
+                         registry=REGISTRY)
+LAST_COST = Gauge("drone_last_cost", "Cost of the last iteration", _LABELS, registry=REGISTRY)
+FAILED_ACTUATIONS = Counter("drone_failed_actuations", "Resource actions that failed to apply",
+                            _LABELS, registry=REGISTRY)
+SKIPPED_ACTUATIONS = Counter("drone_skipped_actuations",
+                             "Reconfigurations skipped as their expected gain was within the switching cost",
+                             _LABELS, registry=REGISTRY)
+ABANDONED_ACTIONS = Counter("drone_abandoned_actions", "Actions abandoned after an early low-fidelity read",
+                            _LABELS, registry=REGISTRY)
+CANARIES = Counter("drone_canaries", "Candidate actions evaluated on a canary, by whether they were promoted",
+                   _LABELS + ["promoted"], registry=REGISTRY)
+CHANGEPOINTS = Counter("drone_changepoints", "Change points that shrank the GP window", _LABELS, registry=REGISTRY)
+PROMETHEUS_ERRORS = Counter("drone_prometheus_errors", "Failed Prometheus queries", _LABELS, registry=REGISTRY)
+
+_server_lock = threading.Lock()
+_server_port = None
+
+
+def start_metrics_server(port, addr="0.0.0.0"):
+    """Serve REGISTRY on http://addr:port/metrics, once per process."""
+    global _server_port
+    with _server_lock:
+        if _server_port is not None:
+            if _server_port != port:
+                logger.warning(f"Metrics server already running on port {_server_port}, ignoring port {port}")
+            return
+        start_http_server(port, addr=addr, registry=REGISTRY)
+        _server_port = port
+        logger.info(f"Serving orchestrator metrics on {addr}:{port}/metrics")
+
+
+class OrchestratorMetrics:
+    """Per-orchestrator view of the process-wide Drone metrics.
+
+    Phase durations of the latest iteration are also kept in last_timings so
+    they can be logged or traced without scraping.
+    """
+
+    def __init__(self, app_name, namespace="default", mode="public"):
+        self.labels = {"app": app_name, "namespace": namespace, "mode": mode}
+        self.last_timings = {}
+        self._prometheus_errors_seen = 0
+        self._changepoints_seen = 0
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.last_timings[name] = self.last_timings.get(name, 0.0) + duration
+            PHASE_SECONDS.labels(phase=name, **self.labels).observe(duration)
+
+    def start_iteration(self):
+        self.last_timings = {}
+
+    def record_iteration(self, result, window_size, safe_set_size, duration):
+        ITERATION_SECONDS.labels(**self.labels).observe(duration)
+        ITERATION.labels(**self.labels).set(result["iteration"])
+        GP_WINDOW_SIZE.labels(**self.labels).set(window_size)
+        SAFE_SET_SIZE.labels(**self.labels).set(safe_set_size)
+        if np.isfinite(result["reward"]):
+            # Not yet known while a batch job's reward is pending
+            LAST_REWARD.labels(**self.labels).set(result["reward"])
+        LAST_COST.labels(**self.labels).set(result["cost"])
+
+    def set_interval(self, seconds):
+        CONTROL_INTERVAL.labels(**self.labels).set(seconds)
+
+    def failed_actuation(self):
+        FAILED_ACTUATIONS.labels(**self.labels).inc()
+
+    def skipped_actuation(self):
+        SKIPPED_ACTUATIONS.labels(**self.labels).inc()
+
+    def abandoned_action(self):
+        ABANDONED_ACTIONS.labels(**self.labels).inc()
+
+    def canary_evaluated(self, promoted):
+        CANARIES.labels(promoted=str(bool(promoted)).lower(), **self.labels).inc()
+
+    def sync_prometheus_errors(self, total_errors):
+        """Advance the error counter to a monitoring instance's running error total."""
+        if total_errors > self._prometheus_errors_seen:
+            PROMETHEUS_ERRORS.labels(**self.labels).inc(total_errors - self._prometheus_errors_seen)
+        self._prometheus_errors_seen = total_errors
+
+    def sync_changepoints(self, total_changepoints):
+        if total_changepoints > self._changepoints_seen:
+            CHANGEPOINTS.labels(**self.labels).inc(total_changepoints - self._changepoints_seen)
+        self._changepoints_seen = total_changepoints
@@ -1,10 +1,48 @@
 import logging
+import time
+import numpy as np
 import requests
 
 logger = logging.getLogger(__name__)
 
 
+# summarize_samples aggregates a reading can be taken from
+AGGREGATES = ("mean", "p50", "max")
+
+
+def summarize_samples(values):
+    """Robust aggregates of the samples observed in a window."""
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return {"mean": 0.0, "p50": 0.0, "max": 0.0, "count": 0}
+    return {
+        "mean": float(np.mean(values)),
+        "p50": float(np.median(values)),
+        "max": float(np.max(values)),
+        "count": int(len(values))
+    }
+
+
 class MonitoringInterface:
+    actuation_time = None
+    # Whether get_canary_metrics can tell a canary's pods from the others
+    canary_metrics = False
+    # Whether get_early_metrics can read just the time since the last actuation
+    early_metrics = False
+
+    def mark_actuation(self, timestamp=None):
+        self.actuation_time = time.time() if timestamp is None else timestamp
+
+    def get_aggregates(self):
+        return {}
+
+    def get_canary_metrics(self, canary):
+        return None
+
+    def get_early_metrics(self):
+        return None
+
     def get_performance_metrics(self):
         raise NotImplementedError("Subclasses must implement this method")
 
@@ -22,24 +60,49 @@ class PrometheusMonitoring(MonitoringInterface):
         app_name=None,
         namespace="default",
         performance_metrics=None,
-        context_metrics=None
+        context_metrics=None,
+        sampling_mode="instant",
+        settle_time=30,
+        step=5,
+        rate_window=None,
+        aggregate="mean",
+        context_cache=None
     ):
         self.prometheus_url = prometheus_url
         self.app_name = app_name
         self.namespace = namespace
 
-        # Default performance metrics if none provided
-        self.performance_metrics = performance_metrics or {
-            # For batch jobs - job completion time
-            "job_time": f'rate(job_completion_time_seconds{{namespace="{namespace}",app="{app_name}"}}[5m])',
-            # For microservices - P90 latency
-            "p90_latency": f'histogram_quantile(0.9, sum(rate(http_request_duration_seconds_bucket{{namespace="{namespace}",app="{app_name}"}}[5m])) by (le))'
-        }
+        # "instant" reads the latest value of each query, "window" aggregates a
+        # query_range over the interval starting settle_time after actuation
+        if sampling_mode not in ("instant", "window"):
+            raise ValueError(f"Unknown sampling mode: {sampling_mode}")
+        self.sampling_mode = sampling_mode
+        self.settle_time = settle_time
+        self.step = step
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate: {aggregate}, expected one of {', '.join(AGGREGATES)}")
+        self.aggregate = aggregate
+        self.last_aggregates = {}
+        self.error_count = 0
+        # Context queries are cluster- or namespace-wide, so they can be
+        # shared with other orchestrators through a ContextCache
+        self.context_cache = context_cache
+
+        # Rate windows must fit inside the observation window, otherwise the
+        # samples still reflect the previous configuration
+        rate_window = rate_window or ("5m" if sampling_mode == "instant" else "30s")
+        self.rate_window = rate_window
+
+        # Default performance metrics if none provided. Only the defaults
+        # can be restricted to the pods of a canary
+        self.performance_metrics = performance_metrics or self._performance_queries()
+        self.canary_metrics = performance_metrics is None
+        self.early_metrics = performance_metrics is None
 
         # Default context metrics if none provided
         self.context_metrics = context_metrics or {
             # Workload intensity - requests per second
-            "workload": f'sum(rate(http_requests_total{{namespace="{namespace}"}}[5m]))',
+            "workload": f'sum(rate(http_requests_total{{namespace="{namespace}"}}[{rate_window}]))',
             # CPU utilization across the cluster
             "cpu_util": 'avg(node_cpu_utilization)',
             # Memory utilization across the cluster
@@ -50,48 +113,150 @@ class PrometheusMonitoring(MonitoringInterface):
             "spot_price": '1'  # This would be replaced with a real query in production
         }
 
+    def _performance_queries(self, pods="", rate_window=None):
+        """Default performance queries; `pods` adds label matchers restricting them to some pods."""
+        selector = f'namespace="{self.namespace}",app="{self.app_name}"{pods}'
+        rate_window = rate_window or self.rate_window
+        return {
+            # For batch jobs - job completion time
+            "job_time": f'rate(job_completion_time_seconds{{{selector}}}[{rate_window}])',
+            # For microservices - P90 latency
+            "p90_latency": f'histogram_quantile(0.9, sum(rate(http_request_duration_seconds_bucket{{{selector}}}[{rate_window}])) by (le))'
+        }
+
+    def fetch_instant(self, query):
+        """Value of an instant query, 0.0 if it has no data; raises if Prometheus cannot be queried."""
+        response = requests.get(
+            f"{self.prometheus_url}/api/v1/query",
+            params={"query": query}
+        )
+        response.raise_for_status()
+        result = response.json()
+
+        # Extract the value from the response
+        if result["status"] == "success" and result["data"]["result"]:
+            return float(result["data"]["result"][0]["value"][1])
+        logger.warning(f"No data for query: {query}")
+        return 0.0
+
     def query_prometheus(self, query):
+        try:
+            return self.fetch_instant(query)
+        except Exception as e:
+            logger.error(f"Error querying Prometheus: {e}")
+            self.error_count += 1
+            return 0.0
+
+    def query_prometheus_range(self, query, start, end, step=None):
         try:
             response = requests.get(
-                f"{self.prometheus_url}/api/v1/query",
-                params={"query": query}
+                f"{self.prometheus_url}/api/v1/query_range",
+                params={"query": query, "start": start, "end": end, "step": step or self.step}
             )
             response.raise_for_status()
             result = response.json()
 
-            # Extract the value from the response
+            # Extract the samples of the first series
             if result["status"] == "success" and result["data"]["result"]:
-                return float(result["data"]["result"][0]["value"][1])
+                return [float(value) for _, value in result["data"]["result"][0]["values"]]
             else:
-                logger.warning(f"No data for query: {query}")
-                return 0.0
+                logger.warning(f"No data in range for query: {query}")
+                return []
 
         except Exception as e:
-            logger.error(f"Error querying Prometheus: {e}")
-            return 0.0
+            logger.error(f"Error querying Prometheus range: {e}")
+            self.error_count += 1
+            return []
 
-    def get_performance_metrics(self):
+    def get_window(self, end=None):
+        """Post-settle observation window (start, end), or None if there is none yet."""
+        if self.sampling_mode != "window" or self.actuation_time is None:
+            return None
+        end = time.time() if end is None else end
+        start = self.actuation_time + self.settle_time
+        if end <= start:
+            return None
+        return start, end
+
+    def _collect(self, queries):
         results = {}
-        for name, query in self.performance_metrics.items():
-            results[name] = self.query_prometheus(query)
+        window = self.get_window()
+        for name, query in queries.items():
+            if window is None:
+                # An instant read; drop the aggregates of an earlier window
+                self.last_aggregates.pop(name, None)
+                results[name] = self.query_prometheus(query)
+                continue
+            summary = summarize_samples(self.query_prometheus_range(query, *window))
+            self.last_aggregates[name] = summary
+            if summary["count"] == 0:
+                # Window too short for a single sample, fall back to the latest value
+                results[name] = self.query_prometheus(query)
+            else:
+                results[name] = summary[self.aggregate]
 
         return results
 
-    def get_resource_usage(self):
-        # Query for the application's resource usage
-        cpu_query = f'sum(container_cpu_usage_seconds_total{{namespace="{self.namespace}",pod=~"{self.app_name}-.*"}})'
-        mem_query = f'sum(container_memory_working_set_bytes{{namespace="{self.namespace}",pod=~"{self.app_name}-.*"}})'
-        net_query = f'sum(container_network_transmit_bytes_total{{namespace="{self.namespace}",pod=~"{self.app_name}-.*"}} + container_network_receive_bytes_total{{namespace="{self.namespace}",pod=~"{self.app_name}-.*"}})'
+    def get_performance_metrics(self):
+        return self._collect(self.performance_metrics)
 
+    def _resource_queries(self, pods=""):
+        # Query for the application's resource usage
+        selector = f'namespace="{self.namespace}",pod=~"{self.app_name}-.*"{pods}'
+        cpu_query = f'sum(container_cpu_usage_seconds_total{{{selector}}})'
+        mem_query = f'sum(container_memory_working_set_bytes{{{selector}}})'
+        net_query = f'sum(container_network_transmit_bytes_total{{{selector}}} + container_network_receive_bytes_total{{{selector}}})'
         return {
-            "cpu": self.query_prometheus(cpu_query),
-            "memory": self.query_prometheus(mem_query),
-            "network": self.query_prometheus(net_query)
+            "cpu": cpu_query,
+            "memory": mem_query,
+            "network": net_query
         }
 
+    def get_resource_usage(self):
+        return self._collect(self._resource_queries())
+
+    def get_canary_metrics(self, canary):
+        """Performance and memory of the canary's pods and of the application's other pods.
+
+        Returns (canary, stable) dicts keyed like get_performance_metrics,
+        plus "memory", or None if the performance queries are custom.
+        """
+        if not self.canary_metrics:
+            return None
+        readings = []
+        for pods in (f',pod=~"{canary}-.*"', f',pod!~"{canary}-.*"'):
+            queries = self._performance_queries(pods)
+            queries["memory"] = self._resource_queries(pods)["memory"]
+            readings.append(self._collect(queries))
+        return tuple(readings)
+
+    def get_early_metrics(self):
+        """Performance and resource usage with rates taken over the time since actuation only."""
+        if not self.early_metrics or self.actuation_time is None:
+            return None
+        rate_window = f"{max(int(time.time() - self.actuation_time), 1)}s"
+        performance = {name: self.query_prometheus(query)
+                       for name, query in self._performance_queries(rate_window=rate_window).items()}
+        # Working set is a gauge, its latest value is already the new configuration's
+        resources = {"memory": self.query_prometheus(self._resource_queries()["memory"])}
+        return performance, resources
+
+    def get_aggregates(self):
+        """Aggregates (mean, p50, max, count) per metric from the last windowed read."""
+        return dict(self.last_aggregates)
+
     def get_context(self):
         results = {}
         for name, query in self.context_metrics.items():
-            results[name] = self.query_prometheus(query)
+            if self.context_cache is not None:
+                # Failed fetches raise instead of returning 0.0, so they are not cached
+                try:
+                    results[name] = self.context_cache.get(self.prometheus_url, query, self.fetch_instant)
+                except Exception as e:
+                    logger.error(f"Error querying Prometheus: {e}")
+                    self.error_count += 1
+                    results[name] = 0.0
+            else:
+                results[name] = self.query_prometheus(query)
 
         return results
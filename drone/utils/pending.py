@@ -0,0 +1,79 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PendingObservationQueue:
+    """Actions whose reward arrives only once the job runs they affected complete.
+
+    Each entry covers the time from its action being put in place until the
+    next entry is added; completed jobs are attributed to the entry in
+    whose window they started. An entry resolves once `min_jobs` of its jobs
+    have completed, with their durations as the observation. After
+    `timeout` seconds it resolves with the jobs completed so far, or is
+    dropped if there are none.
+    """
+
+    def __init__(self, timeout=6 * 3600, min_jobs=1):
+        self.timeout = timeout
+        self.min_jobs = min_jobs
+        self.entries = []
+        # Jobs already attributed, by name, with their start times for pruning
+        self._seen = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def since(self):
+        """Start of the oldest unresolved window, or None if nothing is pending."""
+        return self.entries[0]["start"] if self.entries else None
+
+    def add(self, iteration, action, context, start, **observation):
+        """Open a window for `action` at `start`, closing the previous one.
+
+        Extra keyword arguments (cost, resource, ...) are kept with the entry
+        and returned when it resolves.
+        """
+        if self.entries and self.entries[-1]["end"] is None:
+            self.entries[-1]["end"] = start
+        self.entries.append({"iteration": iteration, "action": action, "context": context, "start": start,
+                             "end": None, "durations": [], **observation})
+
+    def _entry_for(self, start_time):
+        for entry in self.entries:
+            if entry["start"] <= start_time and (entry["end"] is None or start_time < entry["end"]):
+                return entry
+        return None
+
+    def resolve(self, jobs, now):
+        """Attribute completed jobs; return the entries resolved by them, oldest first.
+
+        `jobs` are dicts with name, start_time and duration, as returned by
+        KubernetesClient.get_completed_jobs.
+        """
+        for job in jobs:
+            if job["name"] in self._seen:
+                continue
+            entry = self._entry_for(job["start_time"])
+            if entry is None:
+                continue
+            self._seen[job["name"]] = job["start_time"]
+            entry["durations"].append(job["duration"])
+        resolved = []
+        remaining = []
+        for entry in self.entries:
+            if len(entry["durations"]) >= self.min_jobs:
+                resolved.append(entry)
+            elif now - entry["start"] > self.timeout:
+                if entry["durations"]:
+                    resolved.append(entry)
+                else:
+                    logger.warning(f"No job of iteration {entry['iteration']} completed within "
+                                   f"{self.timeout:.0f}s, dropping its observation")
+            else:
+                remaining.append(entry)
+        self.entries = remaining
+        since = self.since
+        self._seen = {name: start for name, start in self._seen.items() if since is not None and start >= since}
+        return resolved
@@ -0,0 +1,75 @@
+import logging
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveIntervalScheduler:
+    """Chooses the wait before the next orchestration iteration.
+
+    The interval grows while the model is confident, the context calm and
+    the SLO has headroom, shrinks when either moves and drops to
+    `min_interval` on an SLO violation.
+    """
+
+    def __init__(self, base_interval=60, min_interval=15, max_interval=600, growth=1.5,
+                 uncertainty_threshold=0.5, volatility_threshold=0.2, headroom_threshold=0.1, history=10,
+                 level_smoothing=0.1):
+        self.base_interval = base_interval
+        self.min_interval = min(min_interval, base_interval)
+        self.max_interval = max(max_interval, base_interval)
+        self.growth = growth
+        self.uncertainty_threshold = uncertainty_threshold
+        self.volatility_threshold = volatility_threshold
+        self.headroom_threshold = headroom_threshold
+        self.rewards = deque(maxlen=history)
+        self.interval = base_interval
+        self.last_context = None
+        self.last_action = None
+        self.level_smoothing = level_smoothing
+        self._level = None
+        self._jitter = None
+
+    def _volatility(self, context):
+        if self.last_context is None or len(self.last_context) != len(context):
+            self._level = np.abs(context)
+            self._jitter = np.zeros(len(context))
+            return 0.0
+        change = np.abs(context - self.last_context)
+        scale = np.maximum(np.maximum(np.abs(self.last_context), self._level), 1e-8)
+        relative = np.where(change > 3 * self._jitter, change / scale, 0.0)
+        w = self.level_smoothing
+        self._level = (1 - w) * self._level + w * np.abs(context)
+        self._jitter = np.sqrt((1 - w) * self._jitter ** 2 + w * change ** 2)
+        return float(np.max(relative))
+
+    def _uncertainty(self, posterior_std):
+        if len(self.rewards) < 2 or posterior_std is None or not np.isfinite(posterior_std):
+            return np.inf
+        spread = float(np.std(self.rewards))
+        return posterior_std / spread if spread > 0 else 0.0
+
+    def next_interval(self, result, headroom=None):
+        context = np.asarray(result.get("observed_context", result["context"]), dtype=float)
+        action = np.asarray(result["action"], dtype=float)
+        volatility = self._volatility(context)
+        uncertainty = self._uncertainty(result.get("posterior_std"))
+        repeated = self.last_action is not None and np.array_equal(action, self.last_action)
+        if np.isfinite(result["reward"]):
+            self.rewards.append(result["reward"])
+        self.last_context = context
+        self.last_action = action
+
+        if headroom is not None and headroom < 0:
+            self.interval = self.min_interval
+        elif volatility > self.volatility_threshold or (headroom is not None and headroom < self.headroom_threshold):
+            self.interval = max(self.min_interval, min(self.interval, self.base_interval) / self.growth)
+        elif uncertainty < self.uncertainty_threshold * (2 if repeated else 1):
+            self.interval = min(self.max_interval, max(self.interval, self.base_interval) * self.growth)
+        else:
+            self.interval = self.base_interval
+        logger.debug(f"Next interval {self.interval:.0f}s (volatility={volatility:.3f}, "
+                     f"uncertainty={uncertainty:.3f}, headroom={headroom})")
+        return self.interval
@@ -0,0 +1,290 @@
+"""Append-only binary trace of orchestration iterations.
+
+A trace file starts with a magic line and a JSON header (dimensions, phase
+names, action space, metadata), followed by length-prefixed chunks. Each
+chunk is a numpy structured array of buffered iterations written with
+np.save, so a trace is compact, columnar per chunk and cheap to load.
+
+    python -m drone.utils.trace summary drone-trace.bin
+    python -m drone.utils.trace csv drone-trace.bin out.csv
+    python -m drone.utils.trace replay drone-trace.bin --mode public
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import struct
+import sys
+import numpy as np
+
+from drone.utils.instrumentation import PHASES
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"DRONETRACE1\n"
+_LENGTH = struct.Struct("<I")
+
+
+def trace_dtype(action_dim, context_dim, phases=PHASES):
+    return np.dtype([
+        ("iteration", "<i4"),
+        ("timestamp", "<f8"),
+        ("action", "<f8", (action_dim,)),
+        ("context", "<f8", (context_dim,)),
+        ("observed_context", "<f8", (context_dim,)),
+        ("performance", "<f8"),
+        ("cost", "<f8"),
+        ("reward", "<f8"),
+        ("resource", "<f8"),
+        ("is_safe", "?"),
+        ("posterior_mean", "<f8"),
+        ("posterior_std", "<f8"),
+        ("timings", "<f4", (len(phases),))
+    ])
+
+
+class TraceWriter:
+    """Buffered, rotating writer of orchestrate_once results.
+
+    Records are buffered in memory and written as one chunk every
+    buffer_size iterations. When the file exceeds max_bytes it is rotated to
+    path.1 ... path.<backups>, like logging.handlers.RotatingFileHandler.
+    An existing file is appended to only if its header matches; otherwise
+    it is rotated away first.
+    """
+
+    def __init__(self, path, buffer_size=32, max_bytes=64 * 1024 ** 2, backups=5,
+                 action_space=None, metadata=None):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.action_space = action_space
+        self.metadata = metadata or {}
+        self.dtype = None
+        self._header = None
+        self._buffer = []
+        self._file = None
+
+    def _open(self):
+        exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        if exists and _read_header(self.path) != json.loads(self._header):
+            logger.info(f"Trace {self.path} was written with another layout, rotating it")
+            self._rotate()
+            exists = False
+        self._file = open(self.path, "ab")
+        if not exists:
+            self._file.write(MAGIC)
+            self._file.write(_LENGTH.pack(len(self._header)))
+            self._file.write(self._header)
+
+    def _init_header(self, result):
+        action_dim = len(result["action"])
+        context_dim = len(result["context"])
+        self.dtype = trace_dtype(action_dim, context_dim)
+        header = {
+            "action_dim": action_dim,
+            "context_dim": context_dim,
+            "phases": list(PHASES),
+            "action_space": np.asarray(self.action_space).tolist() if self.action_space is not None else None,
+            "metadata": self.metadata
+        }
+        self._header = json.dumps(header).encode()
+
+    def append(self, result, timings=None, timestamp=None):
+        if self.dtype is None:
+            self._init_header(result)
+        record = np.zeros((), dtype=self.dtype)
+        record["iteration"] = result["iteration"]
+        record["timestamp"] = timestamp if timestamp is not None else np.nan
+        record["action"] = result["action"]
+        record["context"] = result["context"]
+        record["observed_context"] = result.get("observed_context", result["context"])
+        record["performance"] = result["performance"]
+        record["cost"] = result["cost"]
+        record["reward"] = result["reward"]
+        record["resource"] = result.get("resource", np.nan)
+        record["is_safe"] = bool(result["is_safe"])
+        record["posterior_mean"] = result.get("posterior_mean", np.nan)
+        record["posterior_std"] = result.get("posterior_std", np.nan)
+        timings = timings or {}
+        record["timings"] = [timings.get(phase, np.nan) for phase in PHASES]
+        self._buffer.append(record)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._open()
+        chunk = io.BytesIO()
+        np.save(chunk, np.array(self._buffer, dtype=self.dtype), allow_pickle=False)
+        data = chunk.getvalue()
+        self._file.write(_LENGTH.pack(len(data)))
+        self._file.write(data)
+        self._file.flush()
+        self._buffer = []
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for i in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _read_header(path):
+    """Header of trace file `path`, or None if it is not a readable trace."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+            return json.loads(f.read(length))
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def read_trace(path):
+    """Return (header, records) of a trace file; records is a structured array."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a Drone trace")
+        (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+        header = json.loads(f.read(length))
+        chunks = []
+        while True:
+            prefix = f.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size:
+                break
+            (length,) = _LENGTH.unpack(prefix)
+            data = f.read(length)
+            if len(data) < length:
+                logger.warning(f"Truncated chunk at end of {path}")
+                break
+            chunks.append(np.load(io.BytesIO(data), allow_pickle=False))
+    dtype = trace_dtype(header["action_dim"], header["context_dim"], header["phases"])
+    records = np.concatenate(chunks) if chunks else np.zeros(0, dtype=dtype)
+    return header, records
+
+
+def read_rotated(path):
+    """Read a trace and its rotated backups, oldest first.
+
+    Backups written with another header than the newest file are left out.
+    """
+    paths = [path] if os.path.exists(path) else []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        paths.append(f"{path}.{i}")
+        i += 1
+    header, parts = None, []
+    for p in paths:
+        file_header, records = read_trace(p)
+        if header is not None and file_header != header:
+            logger.info(f"Stopping at {p}, written with another layout")
+            break
+        header = file_header
+        parts.append(records)
+    if header is None:
+        raise FileNotFoundError(path)
+    return header, np.concatenate(parts[::-1])
+
+
+def replay(records, bandit):
+    """Rebuild bandit state by feeding it the traced observations in order."""
+    for record in records:
+        if not np.isfinite(record["performance"]):
+            # Iteration whose batch-job reward was pending; it is traced again once resolved
+            continue
+        if hasattr(bandit, "resource_gp"):
+            bandit.update(record["action"], record["context"], record["performance"], record["resource"])
+        else:
+            bandit.update(record["action"], record["context"], record["performance"], record["cost"])
+    return bandit
+
+
+def _summary(header, records):
+    print(f"{len(records)} iterations, action_dim={header['action_dim']}, "
+          f"context_dim={header['context_dim']}, metadata={header['metadata']}")
+    print(f"{'iter':>5} {'reward':>10} {'cost':>8} {'safe':>5} {'post_mean':>10} {'post_std':>9} "
+          + " ".join(f"{phase[:10]:>10}" for phase in header["phases"]))
+    for r in records:
+        print(f"{r['iteration']:5d} {r['reward']:10.4f} {r['cost']:8.4f} {str(r['is_safe']):>5} "
+              f"{r['posterior_mean']:10.4f} {r['posterior_std']:9.4f} "
+              + " ".join(f"{t:10.4f}" for t in r["timings"]))
+
+
+def _csv(header, records, output):
+    columns = []
+    for name in records.dtype.names:
+        shape = records.dtype[name].shape
+        if shape:
+            labels = header["phases"] if name == "timings" else range(shape[0])
+            columns += [(f"{name}_{label}", name, i) for i, label in enumerate(labels)]
+        else:
+            columns.append((name, name, None))
+    with open(output, "w") as f:
+        f.write(",".join(c[0] for c in columns) + "\n")
+        for r in records:
+            f.write(",".join(str(r[field] if i is None else r[field][i]) for _, field, i in columns) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and replay Drone iteration traces")
+    parser.add_argument("command", choices=["summary", "csv", "replay"])
+    parser.add_argument("path")
+    parser.add_argument("output", nargs="?", help="Output file for csv")
+    parser.add_argument("--mode", choices=["public", "private"],
+                        help="Bandit to replay into (default: the mode recorded in the trace)")
+    parser.add_argument("--resource-limit", type=float, default=8.0)
+    args = parser.parse_args(argv)
+
+    header, records = read_rotated(args.path)
+    if args.command == "summary":
+        _summary(header, records)
+    elif args.command == "csv":
+        if not args.output:
+            parser.error("csv requires an output file")
+        _csv(header, records, args.output)
+    else:
+        from drone.core.algorithms import PublicCloudBandit, PrivateCloudBandit
+
+        if header["action_space"] is None:
+            parser.error("trace has no action space to rebuild the bandit from")
+        action_space = np.array(header["action_space"])
+        metadata = header["metadata"]
+        mode = args.mode or metadata.get("mode", "public")
+        if mode == "public":
+            bandit = PublicCloudBandit(action_space=action_space, alpha=metadata.get("alpha", 0.5),
+                                       beta=metadata.get("beta", 0.5))
+        else:
+            bandit = PrivateCloudBandit(action_space=action_space, resource_limit=args.resource_limit)
+        replay(records, bandit)
+        context = records[-1]["context"]
+        action = bandit.select_action(context)
+        mean, std = bandit.predict(action, context)
+        print(f"Replayed {len(records)} iterations; next action {action.tolist()} "
+              f"(posterior mean {mean:.4f}, std {std:.4f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,6 @@
 import argparse
 import logging
 import sys
-from drone import DroneOrchestrator
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,9 +20,13 @@ def parse_args():
     parser.add_argument("--mode", choices=["public", "private"], default="public")
     parser.add_argument("--prometheus-url", default="http://localhost:9090")
     parser.add_argument("--in-cluster", action="store_true")
+    parser.add_argument("--mock", action="store_true")
+    parser.add_argument("--trace-file")
+    parser.add_argument("--app-type", choices=["microservice", "batch"], default="microservice")
     parser.add_argument("--config-file")
     parser.add_argument("--iterations", type=int)
     parser.add_argument("--interval", type=int, default=60)
+    parser.add_argument("--metrics-port", type=int)
     parser.add_argument("--verbose", action="store_true")
     return parser.parse_args()
 
@@ -32,13 +35,27 @@ def main():
     if args.verbose:
         logger.setLevel(logging.DEBUG)
     try:
+        if args.metrics_port:
+            from drone.utils.instrumentation import start_metrics_server
+            start_metrics_server(args.metrics_port)
+        components = {}
+        if args.mock:
+            from drone.simulation import build_simulation
+            from drone.orchestrator import load_config
+            sampling = load_config(args.config_file).get("metrics", {}).get("sampling", {})
+            components = build_simulation(namespace=args.namespace, trace_file=args.trace_file,
+                                          app_type=args.app_type, settle_time=sampling.get("settle_time", 30))
+            if not args.iterations:
+                args.iterations = len(components["monitoring"].trace)
+        from drone.orchestrator import DroneOrchestrator
         orchestrator = DroneOrchestrator(
             app_name=args.app_name,
             namespace=args.namespace,
             mode=args.mode,
             prometheus_url=args.prometheus_url,
             in_cluster=args.in_cluster,
-            config_file=args.config_file
+            config_file=args.config_file,
+            **components
         )
         orchestrator.start(
             iterations=args.iterations,